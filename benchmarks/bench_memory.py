@@ -0,0 +1,114 @@
+"""
+Memory benchmark of the game objects: bytes held per live game (one per
+concurrent session) and bytes allocated per round, measured with tracemalloc,
+for the original list-of-Card implementation and the current int-encoded one.
+
+Run from the project root:
+    python3 benchmarks/bench_memory.py
+"""
+import random
+import sys
+import os
+import tracemalloc
+
+# Add parent directory to path for package imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from black_jeck.BlackJeckLogic import BlackjackGame
+
+NUM_GAMES = 10_000
+NUM_ROUNDS = 10_000
+
+
+# Original implementation (Card objects with __dict__, list-backed Deck/Hand) #
+class OldCard:
+
+    def __init__(self, rank: int, suit: int):
+        self.rank = rank
+        self.suit = suit
+
+    def get_value(self) -> int:
+        if self.rank == 1:
+            return 11
+        elif 2 <= self.rank <= 10:
+            return self.rank
+        else:
+            return 10
+
+class OldDeck:
+    def __init__(self):
+        self.cards = []
+        self.reset()
+
+    def reset(self):
+        self.cards = []
+        for suit_idx in range(4):
+            for rank in range(1, 14):
+                self.cards.append(OldCard(rank, suit_idx))
+        random.shuffle(self.cards)
+
+    def deal_card(self):
+        if len(self.cards) == 0:
+            self.reset()
+        return self.cards.pop()
+
+class OldHand:
+    def __init__(self):
+        self.cards = []
+        self.total_value = 0
+
+    def add_card(self, card):
+        self.cards.append(card)
+        self.total_value += card.get_value()
+
+class OldGame:
+    def __init__(self):
+        self.deck = OldDeck()
+        self.player_hand = OldHand()
+        self.dealer_hand = OldHand()
+
+
+def play_round(game):
+    for hand in (game.player_hand, game.dealer_hand, game.player_hand, game.dealer_hand):
+        hand.add_card(game.deck.deal_card())
+    while game.dealer_hand.total_value < 17:
+        game.dealer_hand.add_card(game.deck.deal_card())
+
+
+def bytes_per_live_game(game_class) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    games = [game_class() for _ in range(NUM_GAMES)]
+    for game in games:
+        play_round(game)
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del games
+    return held / NUM_GAMES
+
+
+def peak_bytes_per_round(game_class) -> float:
+    """Average peak memory of playing one round on a new game."""
+    tracemalloc.start()
+    allocated = 0
+    for _ in range(NUM_ROUNDS):
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        game = game_class()
+        play_round(game)
+        allocated += tracemalloc.get_traced_memory()[1] - current
+        del game
+    tracemalloc.stop()
+    return allocated / NUM_ROUNDS
+
+
+def main():
+    print(f"{'implementation':<16} {'bytes/live game':>16} {'peak bytes/round':>17}")
+    for name, game_class in (("list of Card", OldGame), ("int-encoded", BlackjackGame)):
+        held = bytes_per_live_game(game_class)
+        per_round = peak_bytes_per_round(game_class)
+        print(f"{name:<16} {held:>16.0f} {per_round:>17.0f}")
+
+
+if __name__ == "__main__":
+    main()
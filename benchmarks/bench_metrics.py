@@ -0,0 +1,51 @@
+"""
+Micro-benchmark of the server metrics: per-event cost of the recording calls the
+engines make on the hot path (target: under 1 µs per event).
+
+Run from the project root:
+    python3 benchmarks/bench_metrics.py
+"""
+import sys
+import os
+import timeit
+
+# Add parent directory to path for package imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from black_jeck.BlackJeckMetrics import ServerMetrics
+
+NUMBER = 200_000
+TARGET_NS = 1000.0
+
+SETUP = "import time"
+CASES = [
+    ("counter += 1", "metrics.rounds += 1"),
+    ("result tally", "metrics.results[result] += 1"),
+    ("histogram observe", "metrics.decision_to_card.observe(0.0004)"),
+    ("timed phase (2x perf_counter)", "started = time.perf_counter(); "
+                                      "metrics.stand_to_result.observe(time.perf_counter() - started)"),
+]
+
+
+def bench(statement: str, metrics: ServerMetrics) -> float:
+    """Best per-event time in nanoseconds."""
+    timer = timeit.Timer(statement, SETUP, globals={"metrics": metrics, "result": 2})
+    return min(timer.repeat(repeat=5, number=NUMBER)) / NUMBER * 1e9
+
+
+def main():
+    metrics = ServerMetrics()
+    print(f"{'event':<32} {'cost (ns)':>10}")
+    worst = 0.0
+    for name, statement in CASES:
+        cost = bench(statement, metrics)
+        worst = max(worst, cost)
+        print(f"{name:<32} {cost:>10.1f}")
+    print(f"Worst case {worst:.1f} ns per event ({'within' if worst < TARGET_NS else 'over'} the "
+          f"{TARGET_NS:.0f} ns target)")
+    if worst >= TARGET_NS:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
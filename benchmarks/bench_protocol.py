@@ -0,0 +1,94 @@
+"""
+Micro-benchmark of the packet codecs: per-message cost of the original
+format-string struct calls against the precompiled codecs and payload table.
+
+Run from the project root:
+    python3 benchmarks/bench_protocol.py
+"""
+import struct
+import sys
+import os
+import timeit
+
+# Add parent directory to path for package imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from black_jeck.BlackJeckPacketProtocol import MAGIC_COOKIE, MSG_PAYLOAD, MSG_REQUEST, NAME_LEN,\
+     REQUEST_FMT, CLIENT_PAYLOAD_FMT, SERVER_PAYLOAD_FMT, SERVER_PAYLOAD_SIZE,\
+     encode_request, decode_request, encode_client_payload, decode_client_payload,\
+     encode_server_payload, encode_server_payload_into, decode_server_payload, decode_server_payload_from
+
+NUMBER = 200_000
+
+
+# Original implementations (format string parsed on every call) #
+def old_pad_name(name: str) -> bytes:
+    return name.encode()[:NAME_LEN].ljust(NAME_LEN, b'\x00')
+
+def old_encode_request(num_rounds: int, client_name: str) -> bytes:
+    return struct.pack(REQUEST_FMT, MAGIC_COOKIE, MSG_REQUEST, num_rounds, old_pad_name(client_name))
+
+def old_decode_request(data: bytes):
+    cookie, msg_type, rounds, name = struct.unpack(REQUEST_FMT, data)
+    if cookie != MAGIC_COOKIE or msg_type != MSG_REQUEST:
+        raise ValueError("Invalid REQUEST packet")
+    return rounds, name.split(b'\x00', 1)[0].decode()
+
+def old_encode_client_payload(decision: str) -> bytes:
+    return struct.pack(CLIENT_PAYLOAD_FMT, MAGIC_COOKIE, MSG_PAYLOAD, decision.encode())
+
+def old_decode_client_payload(data: bytes) -> str:
+    cookie, msg_type, decision = struct.unpack(CLIENT_PAYLOAD_FMT, data)
+    if cookie != MAGIC_COOKIE or msg_type != MSG_PAYLOAD:
+        raise ValueError("Invalid CLIENT PAYLOAD")
+    return decision.decode().strip('\x00').upper()
+
+def old_encode_server_payload(result: int, rank: int, suit: int) -> bytes:
+    return struct.pack(SERVER_PAYLOAD_FMT, MAGIC_COOKIE, MSG_PAYLOAD, result, rank, suit)
+
+def old_decode_server_payload(data: bytes):
+    cookie, msg_type, result, rank, suit = struct.unpack(SERVER_PAYLOAD_FMT, data)
+    if cookie != MAGIC_COOKIE or msg_type != MSG_PAYLOAD:
+        raise ValueError("Invalid SERVER PAYLOAD")
+    return result, rank, suit
+
+
+def bench(func, *args) -> float:
+    """Best per-call time in nanoseconds."""
+    timer = timeit.Timer("func(*args)", globals={"func": func, "args": args})
+    return min(timer.repeat(repeat=5, number=NUMBER)) / NUMBER * 1e9
+
+
+def main():
+    request = encode_request(10, "Team_LOVE")
+    client_payload = encode_client_payload("Stand")
+    server_payload = encode_server_payload(1, 12, 3)
+    buffer = bytearray(SERVER_PAYLOAD_SIZE * 8)
+
+    cases = [
+        ("encode_request", (old_encode_request, encode_request), (10, "Team_LOVE")),
+        ("decode_request", (old_decode_request, decode_request), (request,)),
+        ("encode_client_payload", (old_encode_client_payload, encode_client_payload), ("Stand",)),
+        ("decode_client_payload", (old_decode_client_payload, decode_client_payload), (client_payload,)),
+        ("encode_server_payload", (old_encode_server_payload, encode_server_payload), (1, 12, 3)),
+        ("encode_server_payload_into", (old_encode_server_payload, encode_server_payload_into), None),
+        ("decode_server_payload", (old_decode_server_payload, decode_server_payload), (server_payload,)),
+        ("decode_server_payload_from", (old_decode_server_payload, decode_server_payload_from), None),
+    ]
+
+    print(f"{'message':<28} {'before (ns)':>12} {'after (ns)':>12} {'speedup':>8}")
+    for name, (old, new), args in cases:
+        if name == "encode_server_payload_into":
+            before = bench(old, 1, 12, 3)
+            after = bench(new, buffer, SERVER_PAYLOAD_SIZE, 1, 12, 3)
+        elif name == "decode_server_payload_from":
+            before = bench(old, server_payload)
+            after = bench(new, buffer, SERVER_PAYLOAD_SIZE)
+        else:
+            before = bench(old, *args)
+            after = bench(new, *args)
+        print(f"{name:<28} {before:>12.1f} {after:>12.1f} {before / after:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark of the binary round log: cost of RoundLog.record() on the session's
+path (pack + enqueue, the file is written by the background thread), and
+round_stats aggregation throughput over memory-mapped segments (needs numpy).
+
+Run from the project root:
+    python3 benchmarks/bench_round_log.py --records 2000000
+"""
+import argparse
+import sys
+import os
+import tempfile
+import time
+import timeit
+
+# Add parent directory to path for package imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from black_jeck.BlackJeckLogic import BlackjackGame
+from black_jeck.BlackJeckRoundLog import RoundLog, segment_header
+from black_jeck.round_stats import RECORD_DTYPE, read_round_log
+
+NUMBER = 200_000
+ROUND_RESULT = BlackjackGame.ROUND_RESULT
+
+
+def bench_record(directory: str) -> float:
+    """Best per-record cost of RoundLog.record() in nanoseconds."""
+    round_log = RoundLog()
+    round_log.open(directory)
+    game = BlackjackGame()
+    for _ in range(2):
+        game.player_hit()
+        game.dealer_hit()
+    try:
+        timer = timeit.Timer("round_log.record(game, 'Team_LOVE', 7)",
+                             globals={"round_log": round_log, "game": game})
+        return min(timer.repeat(repeat=5, number=NUMBER)) / NUMBER * 1e9
+    finally:
+        round_log.close()
+
+
+def write_segment(path: str, records: int, players: int):
+    """A segment of random rounds, built as one record array."""
+    rng = np.random.default_rng(1)
+    data = np.zeros(records, dtype=RECORD_DTYPE)
+    data["time"] = time.time() - np.sort(rng.uniform(0, 24 * 3600, records))[::-1]
+    data["player"] = rng.integers(0, players, records, dtype=np.uint64) * 0x9E3779B97F4A7C15
+    data["round"] = rng.integers(1, 256, records)
+    data["result"] = rng.choice([ROUND_RESULT.TIE, ROUND_RESULT.DEALER_WINS, ROUND_RESULT.PLAYER_WINS],
+                                records, p=[0.08, 0.49, 0.43])
+    with open(path, "wb") as f:
+        f.write(segment_header())
+        f.write(data.tobytes())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Round log benchmark")
+    parser.add_argument("--records", type=int, default=2_000_000, help="records to aggregate")
+    parser.add_argument("--players", type=int, default=1000, help="distinct players in those records")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"RoundLog.record (pack + enqueue): {bench_record(os.path.join(directory, 'live')):.1f} ns per round")
+
+        segment = os.path.join(directory, "rounds.bjr")
+        write_segment(segment, args.records, args.players)
+        started_at = time.perf_counter()
+        stats = read_round_log([segment])
+        elapsed = time.perf_counter() - started_at
+        print(f"round_stats over {stats.rounds:,} records, {len(stats.players)} players: {elapsed:.3f}s "
+              f"({stats.rounds / elapsed / 1e6:.1f} M records/sec)")
+
+
+if __name__ == "__main__":
+    main()
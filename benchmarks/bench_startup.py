@@ -0,0 +1,77 @@
+"""
+Start-up benchmark of the entry points: import time of each entry module in a
+fresh interpreter, measured with `python -X importtime`, against a fixed budget.
+Also fails if a module that only some code paths need (psutil, NumPy, the
+terminal UI, asyncio, http.server) is imported at start-up.
+
+Run from the project root:
+    python3 benchmarks/bench_startup.py
+"""
+import argparse
+import subprocess
+import sys
+import os
+from typing import Dict, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPEAT = 7 # best of - the first (pyc-compiling) run is discarded
+
+# entry module -> (import budget in ms, modules it must not import)
+ENTRY_POINTS = {
+    "black_jeck.BlackJeckBot": (90.0, ("psutil", "numpy", "black_jeck.GameUI", "asyncio")),
+    "black_jeck.BlackJeckClient": (60.0, ("psutil", "numpy", "black_jeck.GameUI", "asyncio")),
+    "black_jeck.BlackJeckServer": (80.0, ("psutil", "numpy", "black_jeck.GameUI", "asyncio", "http.server")),
+}
+
+
+def import_times(module: str) -> Dict[str, int]:
+    """Cumulative import time in µs of every module 'module' pulls in."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def measure(module: str) -> Tuple[float, Dict[str, int]]:
+    """Best import time of 'module' in ms, and the modules of that run."""
+    import_times(module) # warm-up: writes the .pyc files
+    best, best_times = None, {}
+    for _ in range(REPEAT):
+        times = import_times(module)
+        if best is None or times[module] < best:
+            best, best_times = times[module], times
+    return best / 1000, best_times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the start-up import time of the entry points")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget (slow machines)")
+    args = parser.parse_args(argv)
+
+    print(f"{'entry module':<30} {'import (ms)':>12} {'budget (ms)':>12}")
+    failed = False
+    for module, (budget_ms, forbidden) in ENTRY_POINTS.items():
+        elapsed_ms, times = measure(module)
+        budget_ms *= args.scale
+        print(f"{module:<30} {elapsed_ms:>12.1f} {budget_ms:>12.1f}")
+        if elapsed_ms > budget_ms:
+            print(f"  over budget - slowest imports: " +
+                  ", ".join(f"{name} {cost / 1000:.1f} ms" for name, cost in
+                            sorted(times.items(), key=lambda item: -item[1])[1:6]))
+            failed = True
+        imported = [name for name in forbidden if name in times]
+        if imported:
+            print(f"  imported at start-up: {', '.join(imported)}")
+            failed = True
+    print("Start-up over budget" if failed else "Start-up within budget")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+"""
+Benchmark suite of the hot paths: packet codecs, socket framing, game logic, the
+terminal renderer and a loopback end-to-end run against the server. Standard
+library only.
+
+Results are written as JSON; a later run can be compared against them and fails
+(exit code 1) when any benchmark got slower than the threshold.
+
+Run from the project root:
+    python3 benchmarks/suite.py --output baseline.json
+    python3 benchmarks/suite.py --compare baseline.json --threshold 0.10
+    python3 benchmarks/suite.py --only codec,logic --quick
+"""
+import argparse
+import contextlib
+import json
+import platform
+import socket
+import statistics
+import sys
+import os
+import threading
+import time
+import timeit
+
+# Add parent directory to path for package imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from black_jeck import BlackJeckPacketProtocol as P
+from black_jeck.BlackJeckLogic import BlackjackGame, Deck, Shoe, Card, RANK_VALUES
+from black_jeck.GameUI import GameUI
+from network.TCPConnection import FramedReader, recv_exact
+
+GROUPS = ("codec", "framing", "logic", "ui", "e2e")
+DEFAULT_THRESHOLD = 0.10 # 10% slower fails the comparison
+FRAMES_PER_BATCH = 64 # frames written to the socketpair before reading them back
+STAND_ON = 17 # policy of the end-to-end players
+
+
+class Results:
+    """Benchmark name -> {"value", "unit", "better"} ("lower" or "higher")."""
+
+    def __init__(self):
+        self.entries = {}
+
+    def add(self, name: str, value: float, unit: str, better: str = "lower"):
+        self.entries[name] = {"value": value, "unit": unit, "better": better}
+        print(f"{name:<44} {value:>14,.1f} {unit}")
+
+
+def time_per_call(statement: str, number: int, repeat: int, **names) -> float:
+    """Best per-call time in nanoseconds."""
+    timer = timeit.Timer(statement, globals=names)
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e9
+
+
+# Codecs #
+
+def bench_codec(results: Results, number: int, repeat: int):
+    hit_masks = P.build_hit_masks(lambda player_sum, dealer_up: "HITTT" if player_sum < STAND_ON else "STAND")
+    offer = P.encode_offer(4242, "Team_LOVE")
+    offer_ext = P.encode_offer_ext(4242, "Team_LOVE", 3, 1000, 42)
+    request = P.encode_request(10, "Team_LOVE")
+    auto_request = P.encode_auto_request(10, "Team_LOVE", hit_masks)
+    client_payload = P.encode_client_payload("Stand")
+    server_payload = P.encode_server_payload(1, 12, 3)
+    buffer = bytearray(64)
+    P.encode_server_payload_into(buffer, 0, 1, 12, 3)
+    P.encode_client_payload_into(buffer, 32, "Hittt")
+
+    cases = {
+        "encode_offer": ("P.encode_offer(4242, 'Team_LOVE')", {}),
+        "decode_offer": ("P.decode_offer(offer)", {"offer": offer}),
+        "encode_offer_ext": ("P.encode_offer_ext(4242, 'Team_LOVE', 3, 1000, 42)", {}),
+        "decode_offer_info": ("P.decode_offer_info(offer_ext)", {"offer_ext": offer_ext}),
+        "encode_probe": ("P.encode_probe()", {}),
+        "decode_probe": ("P.decode_probe(probe)", {"probe": P.encode_probe()}),
+        "encode_request": ("P.encode_request(10, 'Team_LOVE')", {}),
+        "decode_request": ("P.decode_request(request)", {"request": request}),
+        "decode_request_header": ("P.decode_request_header(request)", {"request": request}),
+        "encode_auto_request": ("P.encode_auto_request(10, 'Team_LOVE', hit_masks)", {"hit_masks": hit_masks}),
+        "decode_auto_policy": ("P.decode_auto_policy(policy)", {"policy": auto_request[P.REQUEST_SIZE:]}),
+        "auto_decision": ("P.auto_decision(hit_masks, 15, 10)", {"hit_masks": hit_masks}),
+        "encode_client_payload": ("P.encode_client_payload('Stand')", {}),
+        "encode_client_payload_into": ("P.encode_client_payload_into(buffer, 32, 'Stand')", {"buffer": buffer}),
+        "decode_client_payload": ("P.decode_client_payload(payload)", {"payload": client_payload}),
+        "decode_client_payload_from": ("P.decode_client_payload_from(buffer, 32)", {"buffer": buffer}),
+        "encode_server_payload": ("P.encode_server_payload(1, 12, 3)", {}),
+        "encode_server_payload_into": ("P.encode_server_payload_into(buffer, 0, 1, 12, 3)", {"buffer": buffer}),
+        "decode_server_payload": ("P.decode_server_payload(payload)", {"payload": server_payload}),
+        "decode_server_payload_from": ("P.decode_server_payload_from(buffer, 0)", {"buffer": buffer}),
+    }
+    for name, (statement, names) in cases.items():
+        results.add(f"codec.{name}", time_per_call(statement, number, repeat, P=P, **names), "ns/op")
+
+
+# Framing #
+
+def bench_framing(results: Results, number: int, repeat: int):
+    """Per-frame cost of reading SERVER PAYLOADs from a socketpair, FRAMES_PER_BATCH at a time."""
+    sender, receiver = socket.socketpair()
+    batch = P.encode_server_payload(1, 12, 3) * FRAMES_PER_BATCH
+    reader = FramedReader(receiver)
+    size = P.SERVER_PAYLOAD_SIZE
+    batches = max(number // FRAMES_PER_BATCH, 1)
+
+    def read_exact():
+        for _ in range(batches):
+            sender.sendall(batch)
+            for _ in range(FRAMES_PER_BATCH):
+                recv_exact(receiver, size)
+
+    def read_frame():
+        for _ in range(batches):
+            sender.sendall(batch)
+            for _ in range(FRAMES_PER_BATCH):
+                reader.read_frame(size)
+
+    def read_frames():
+        for _ in range(batches):
+            sender.sendall(batch)
+            reader.read_frames(size, FRAMES_PER_BATCH)
+
+    try:
+        for name, func in (("recv_exact", read_exact), ("FramedReader.read_frame", read_frame),
+                           ("FramedReader.read_frames", read_frames)):
+            best = min(timeit.repeat(func, repeat=repeat, number=1))
+            results.add(f"framing.{name}", best / (batches * FRAMES_PER_BATCH) * 1e9, "ns/frame")
+    finally:
+        sender.close()
+        receiver.close()
+
+
+# Game logic #
+
+def play_round(game: BlackjackGame) -> int:
+    """One round with the server's flow and the hit-below-17 policy."""
+    game.new_round()
+    game.player_hit()
+    game.player_hit()
+    if game.result == game.ROUND_RESULT.DEALER_WINS:
+        return game.result
+    game.dealer_hit()
+    game.dealer_hit()
+    while game.player_hand.total_value < STAND_ON:
+        game.player_hit()
+        if game.result == game.ROUND_RESULT.DEALER_WINS:
+            return game.result
+    while game.dealer_hand.total_value < 17:
+        game.dealer_hit()
+    game.decide_winner()
+    return game.result
+
+
+def deal_deck(deck: Deck):
+    deck.reset()
+    for _ in range(52):
+        deck.deal_card()
+
+
+def bench_logic(results: Results, number: int, repeat: int):
+    number = max(number // 10, 1)
+    results.add("logic.Deck.reset", time_per_call("deck.reset()", number, repeat, deck=Deck()), "ns/op")
+    results.add("logic.Shoe(6).reset", time_per_call("shoe.reset()", number, repeat, shoe=Shoe(6)), "ns/op")
+    per_deck = time_per_call("deal_deck(deck)", number, repeat, deal_deck=deal_deck, deck=Deck())
+    results.add("logic.Deck.reset+52 deal_card", per_deck, "ns/op")
+    results.add("logic.BlackjackGame round (fresh deck)",
+                time_per_call("play_round(game)", number, repeat, play_round=play_round, game=BlackjackGame()), "ns/op")
+    results.add("logic.BlackjackGame round (6-deck shoe)",
+                time_per_call("play_round(game)", number, repeat, play_round=play_round,
+                              game=BlackjackGame(Shoe(6))), "ns/op")
+
+
+# Terminal renderer #
+
+class NullOutput:
+    """stdout that drops everything - measures building the frames, not the terminal."""
+
+    def write(self, text: str) -> int:
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def bench_ui(results: Results, number: int, repeat: int):
+    number = max(number // 20, 1)
+    player = [Card(10, 0), Card(6, 1)]
+    hit = player + [Card(3, 2)]
+    dealer = [Card(9, 3)]
+    frame = GameUI.render_game_state(1, player, dealer, 16, 9)
+    with contextlib.redirect_stdout(NullOutput()):
+        GameUI.redraw = False
+        per_frame = time_per_call("GameUI.print_game_state(1, hit, dealer, 19, 9)", number, repeat,
+                                  GameUI=GameUI, hit=hit, dealer=dealer)
+        GameUI.redraw = True
+        per_redraw = time_per_call("GameUI._shown = frame; GameUI.print_game_state(1, hit, dealer, 19, 9)",
+                                   number, repeat, GameUI=GameUI, frame=frame, hit=hit, dealer=dealer)
+        GameUI.redraw = False
+        GameUI._shown = []
+    results.add("ui.print_game_state frame", per_frame, "ns/frame")
+    results.add("ui.print_game_state redraw (one new card)", per_redraw, "ns/frame")
+
+
+# Loopback end-to-end #
+
+def play_session(port: int, rounds: int, hit_masks, auto: bool, latencies: list):
+    """One headless session on a fresh connection, following the server's payload flow."""
+    sock = socket.create_connection(("127.0.0.1", port))
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    try:
+        request = P.encode_auto_request(rounds, "Bench", hit_masks) if auto else P.encode_request(rounds, "Bench")
+        sock.sendall(request)
+        reader = FramedReader(sock)
+        hit, stand = P.encode_client_payload("Hittt"), P.encode_client_payload("Stand")
+        for _ in range(rounds):
+            player_sum = 0
+            for data in reader.read_frames(P.SERVER_PAYLOAD_SIZE, 2):
+                result, rank, _ = P.decode_server_payload(data)
+                player_sum += RANK_VALUES[rank]
+            if result == BlackjackGame.ROUND_RESULT.DEALER_WINS:
+                continue
+            _, up_rank, _ = P.decode_server_payload(reader.read_frame(P.SERVER_PAYLOAD_SIZE))
+            dealer_up = RANK_VALUES[up_rank]
+            while True:
+                sent_at = time.perf_counter()
+                if P.auto_decision(hit_masks, player_sum, dealer_up) == "HITTT":
+                    if not auto:
+                        sock.sendall(hit)
+                    result, rank, _ = P.decode_server_payload(reader.read_frame(P.SERVER_PAYLOAD_SIZE))
+                    player_sum += RANK_VALUES[rank]
+                    if not auto:
+                        latencies.append(time.perf_counter() - sent_at)
+                    if result == BlackjackGame.ROUND_RESULT.DEALER_WINS:
+                        break
+                else:
+                    if not auto:
+                        sock.sendall(stand)
+                    while P.decode_server_payload(reader.read_frame(P.SERVER_PAYLOAD_SIZE))[0] == \
+                            BlackjackGame.ROUND_RESULT.NOT_OVER:
+                        pass
+                    if not auto:
+                        latencies.append(time.perf_counter() - sent_at)
+                    break
+    finally:
+        sock.close()
+
+
+def start_server(engine: str) -> int:
+    """Serve on a loopback port from a daemon thread, return the port."""
+    from black_jeck.BlackJeckServer import parse_args, serve
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(128)
+    args = parse_args(["--engine", engine])
+    threading.Thread(target=serve, args=(listener, args), daemon=True).start()
+    return listener.getsockname()[1]
+
+
+def bench_e2e(results: Results, sessions: int, rounds: int, players: int):
+    hit_masks = P.build_hit_masks(lambda player_sum, dealer_up: "HITTT" if player_sum < STAND_ON else "STAND")
+    for engine in ("blocking", "asyncio"):
+        port = start_server(engine)
+        for auto in (False, True):
+            latencies = []
+            per_player = max(sessions // players, 1)
+
+            def player():
+                for _ in range(per_player):
+                    play_session(port, rounds, hit_masks, auto, latencies)
+
+            threads = [threading.Thread(target=player) for _ in range(players)]
+            started_at = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started_at
+
+            mode = "auto" if auto else "interactive"
+            results.add(f"e2e.{engine}.{mode}.rounds_per_sec", per_player * players * rounds / elapsed,
+                        "rounds/s", better="higher")
+            if latencies:
+                cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+                results.add(f"e2e.{engine}.{mode}.p50_decision", cuts[49] * 1e6, "us")
+                results.add(f"e2e.{engine}.{mode}.p99_decision", cuts[98] * 1e6, "us")
+
+
+# Comparison #
+
+def compare(current: dict, baseline: dict, threshold: float) -> int:
+    """Print the change of every benchmark in both runs, return the number of regressions."""
+    regressions = 0
+    print(f"\n{'benchmark':<44} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, entry in current.items():
+        base = baseline.get(name)
+        if base is None or not base["value"]:
+            continue
+        change = entry["value"] / base["value"] - 1
+        slower = -change if entry["better"] == "higher" else change
+        flag = ""
+        if slower > threshold:
+            regressions += 1
+            flag = "  SLOWER"
+        print(f"{name:<44} {base['value']:>12,.1f} {entry['value']:>12,.1f} {change:>+7.1%}{flag}")
+    print(f"{regressions} regression(s) beyond {threshold:.0%}")
+    return regressions
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="BlackJeck benchmark suite")
+    parser.add_argument("--only", help=f"comma separated groups to run ({', '.join(GROUPS)})")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations (noisier, for a smoke run)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a JSON file of an earlier run")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown that counts as a regression")
+    parser.add_argument("--sessions", type=int, default=40, help="e2e: sessions per engine and mode")
+    parser.add_argument("--rounds", type=int, default=50, help="e2e: rounds per session (1-255)")
+    parser.add_argument("--players", type=int, default=4, help="e2e: concurrent players")
+    args = parser.parse_args(argv)
+    args.groups = args.only.split(",") if args.only else list(GROUPS)
+    unknown = set(args.groups) - set(GROUPS)
+    if unknown:
+        parser.error(f"unknown groups: {', '.join(sorted(unknown))}")
+    if not 1 <= args.rounds <= 255:
+        parser.error("--rounds must be between 1 and 255")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    number, repeat = (20_000, 3) if args.quick else (200_000, 5)
+    results = Results()
+
+    if "codec" in args.groups:
+        bench_codec(results, number, repeat)
+    if "framing" in args.groups:
+        bench_framing(results, number, repeat)
+    if "logic" in args.groups:
+        bench_logic(results, number, repeat)
+    if "ui" in args.groups:
+        bench_ui(results, number, repeat)
+    if "e2e" in args.groups:
+        sessions = max(args.sessions // 4, args.players) if args.quick else args.sessions
+        bench_e2e(results, sessions, args.rounds, args.players)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results.entries,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        if compare(results.entries, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
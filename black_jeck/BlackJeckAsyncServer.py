@@ -0,0 +1,332 @@
+import argparse
+import asyncio
+import random
+import signal
+import socket
+import threading
+import time
+
+from black_jeck.BlackJeckLogic import BlackjackGame, Deck
+from black_jeck.BlackJeckServer import server_print_winner, new_deck, new_capture, session_seed, start_drain, draining,\
+     SessionCounter, LINGER_RESET
+from black_jeck.BlackJeckCapture import SessionCapture, capture_writer, DECISION_CODES
+from black_jeck.BlackJeckRoundLog import FLAG_AUTO
+from black_jeck.BlackJeckLog import log, new_session_id
+from black_jeck.BlackJeckMetrics import metrics
+from black_jeck.BlackJeckDeadlines import SessionDeadlines, SessionTimeout, IdleSessions, TIMEOUT_STAND
+from network.TCPConnection import recv_exact_async
+from black_jeck.BlackJeckPacketProtocol import decode_request_header, decode_auto_policy, decode_seed, auto_decision,\
+     encode_server_payload, decode_client_payload, MSG_AUTO_REQUEST, MSG_SEEDED_REQUEST,\
+     REQUEST_SIZE, AUTO_POLICY_SIZE, SEED_SIZE, CLIENT_PAYLOAD_SIZE, SERVER_PAYLOAD_SIZE
+
+DRAIN_POLL_SEC = 0.05
+
+
+def serve(tcp_sock: socket.socket, args: argparse.Namespace, counter: SessionCounter = None):
+    """Serve clients on an already listening socket, one coroutine per connection."""
+    asyncio.run(_serve(tcp_sock, args, counter or SessionCounter()))
+
+
+def shed(writer: asyncio.StreamWriter):
+    """Refuse a connection at once - over capacity or draining - instead of queueing it."""
+    metrics.connections_shed += 1
+    writer.get_extra_info("socket").setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, LINGER_RESET)
+    writer.transport.abort()
+
+
+async def _serve(tcp_sock: socket.socket, args: argparse.Namespace, counter: SessionCounter):
+    loop = asyncio.get_running_loop()
+    idle = IdleSessions() # deadlines of every session waiting on its client
+    sweeper = loop.create_task(idle.run())
+    sessions = set() # writers of the sessions in play - cut if the drain deadline passes
+    stopped = asyncio.Event()
+    tables = None
+    if args.table_seats: # players share tables instead of playing alone against their own dealer
+        from black_jeck.BlackJeckTable import TableManager
+        tables = TableManager(args)
+
+    async def on_connect(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        metrics.connections_accepted += 1
+        if counter.active >= args.max_sessions or draining.is_set():
+            shed(writer)
+            return
+        accepted_at = time.perf_counter()
+        counter.session_started()
+        sessions.add(writer)
+        deadlines = SessionDeadlines(args, counter.record_timeout)
+        try:
+            await handle_client(reader, writer, args, tables, idle, deadlines, accepted_at)
+        finally:
+            sessions.discard(writer)
+            counter.session_ended()
+
+    async def drain():
+        deadline = loop.time() + args.drain_timeout
+        while sessions and loop.time() < deadline: # sessions end after their current round
+            await asyncio.sleep(DRAIN_POLL_SEC)
+        cut(f"drain deadline passed, closing {len(sessions)} sessions")
+
+    def cut(reason: str):
+        if sessions:
+            log.warning("Shutting down: %s", reason)
+            for writer in list(sessions):
+                writer.transport.abort()
+        stopped.set()
+
+    def on_signal():
+        if not start_drain(counter.active, args.drain_timeout):
+            cut(f"stopping now, closing {len(sessions)} sessions") # second signal
+            return
+        server.close() # stop accepting, the sessions in play go on
+        loop.create_task(drain())
+
+    server = await asyncio.start_server(on_connect, sock=tcp_sock, backlog=args.backlog)
+    if threading.current_thread() is threading.main_thread(): # signals only reach the main thread
+        loop.add_signal_handler(signal.SIGTERM, on_signal)
+        if signal.getsignal(signal.SIGINT) is not signal.SIG_IGN: # workers leave Ctrl+C to the parent
+            loop.add_signal_handler(signal.SIGINT, on_signal)
+    try:
+        await stopped.wait()
+    finally:
+        server.close()
+        sweeper.cancel()
+
+
+async def read_within(idle: IdleSessions, reader: asyncio.StreamReader, size: int, timeout: float, on_expire) -> bytes:
+    """Read exactly 'size' bytes, 'on_expire' is called if they did not arrive within 'timeout' seconds."""
+    if timeout is None:
+        return await recv_exact_async(reader, size)
+    token = idle.watch(timeout, on_expire)
+    try:
+        return await recv_exact_async(reader, size)
+    finally:
+        idle.unwatch(token)
+
+
+async def handle_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, args: argparse.Namespace,
+                        tables=None, idle: IdleSessions = None, deadlines: SessionDeadlines = None,
+                        accepted_at: float = None):
+    addr = writer.get_extra_info("peername")
+    # asyncio only sets it for sockets created with proto=IPPROTO_TCP
+    writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1) # no Nagle delay on small payloads
+
+    if idle is None: # an empty IdleSessions is falsy
+        idle = IdleSessions()
+        asyncio.get_running_loop().create_task(idle.run())
+    if deadlines is None:
+        deadlines = SessionDeadlines(args)
+
+    def request_expired():
+        deadlines.timed_out("request")
+        writer.transport.abort() # the pending read fails with ConnectionError
+
+    capture = None
+    try:
+        try:
+            header = await read_within(idle, reader, REQUEST_SIZE, deadlines.request_timeout, request_expired)
+            msg_type, rounds, name = decode_request_header(header) # decode request from client
+            hit_masks = None
+            seed = None
+            auto = msg_type == MSG_AUTO_REQUEST
+            if msg_type == MSG_SEEDED_REQUEST: # client chose the seed - a reproducible session
+                seed, auto = decode_seed(await read_within(idle, reader, SEED_SIZE, deadlines.request_timeout,
+                                                           request_expired))
+                metrics.bytes_received += SEED_SIZE
+            if auto: # client sent its decision policy - play without waiting for decisions
+                policy = await read_within(idle, reader, AUTO_POLICY_SIZE, deadlines.request_timeout, request_expired)
+                hit_masks = decode_auto_policy(policy)
+            metrics.bytes_received += REQUEST_SIZE + (AUTO_POLICY_SIZE if hit_masks else 0)
+        except (ConnectionError, ValueError) as e:
+            if deadlines.expired:
+                metrics.connections_rejected += 1
+                raise SessionTimeout("request")
+            if isinstance(e, ConnectionError): # closed without a request - usually a client measuring the connect RTT
+                metrics.connections_probed += 1
+                log.debug("Client %s closed the connection before sending a request", addr)
+                return
+            metrics.connections_rejected += 1
+            raise
+        new_session_id() # every connection runs in its own task - the id stays with it
+        log.info("New client connected from %s", addr) # log client address (IP and port)
+        if accepted_at is not None:
+            metrics.accept_to_request.observe(time.perf_counter() - accepted_at)
+        if rounds < 1:
+            metrics.connections_rejected += 1
+            log.warning("Invalid number of rounds")
+            return
+
+        if tables and seed is None: # a seeded session needs a dealer of its own to be reproducible
+            await tables.play(reader, writer, rounds, name, hit_masks, deadlines) # play at a shared table
+        else:
+            seed = session_seed(args, seed)
+            log.debug("Session seed %d", seed)
+            capture = new_capture(args, name, rounds, seed, hit_masks)
+            await play_game(reader, writer, rounds, name, new_deck(args, random.Random(seed)), hit_masks, idle,
+                            deadlines, capture) # play game with client
+
+    except SessionTimeout as e:
+        log.warning("Dropped client %s: %s", addr, e)
+    except ConnectionError as e:
+        if draining.is_set(): # cut by the drain deadline or a second signal
+            log.warning("Dropped client %s: server is shutting down", addr)
+        else:
+            log.error("Error handling client %s: %s", addr, e)
+    except Exception as e: # handle exception
+        log.error("Error handling client %s: %s", addr, e)
+    finally: # close connection
+        if capture:
+            capture_writer.write(capture)
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass
+
+
+async def play_game(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, rounds: int, player_name: str,
+                    deck: Deck = None, hit_masks=None, idle: IdleSessions = None, deadlines: SessionDeadlines = None,
+                    capture: SessionCapture = None):
+    # Same round flow as BlackJeckServer.play_game, with awaitable socket I/O
+    game = BlackjackGame(deck) # one game for the whole session, the deck persists across rounds
+    auto = hit_masks is not None
+    flags = FLAG_AUTO if auto else 0 # round log flags
+    frames = [] # payloads of the current round phase
+    writes = 0 # number of transport writes
+
+    async def flush():
+        nonlocal writes
+        writer.writelines(frames) # one transport write per phase
+        metrics.bytes_sent += len(frames) * SERVER_PAYLOAD_SIZE
+        if capture is not None:
+            capture.sent += b"".join(frames)
+        frames.clear()
+        writes += 1
+        if deadlines is None or deadlines.decision_timeout is None:
+            await writer.drain()
+            return
+        # a client that stops reading must not pin the session's buffers
+        token = idle.watch(deadlines.decision_timeout, writer.transport.abort)
+        try:
+            await writer.drain()
+        finally:
+            idle.unwatch(token)
+
+    async def read_decision() -> str:
+        if deadlines is None:
+            data = await recv_exact_async(reader, CLIENT_PAYLOAD_SIZE)
+            metrics.bytes_received += CLIENT_PAYLOAD_SIZE
+            return decode_client_payload(data)
+        timeout, kind = deadlines.next_wait()
+        task = asyncio.current_task()
+        stand = False # set when the deadline passed under the stand policy
+
+        def decision_expired():
+            nonlocal stand
+            deadlines.timed_out(kind)
+            if deadlines.policy == TIMEOUT_STAND:
+                stand = True
+                task.cancel() # stop the read - a partial frame stays unread, the session ends after the round
+            else:
+                writer.transport.abort()
+
+        try:
+            data = await read_within(idle, reader, CLIENT_PAYLOAD_SIZE, timeout, decision_expired)
+        except asyncio.CancelledError:
+            if not stand:
+                raise
+            if hasattr(task, "uncancel"): # Python 3.11+: the cancellation was ours, not the caller's
+                task.uncancel()
+            return "STAND" # finish the round as if the player stood
+        except ConnectionError:
+            if deadlines.expired:
+                raise SessionTimeout(kind)
+            raise
+        metrics.bytes_received += CLIENT_PAYLOAD_SIZE # only decisions that arrived
+        return decode_client_payload(data)
+
+    log.info("Starting %d rounds with player %s%s", rounds, player_name, " (auto-play)" if auto else "")
+
+    for round_num in range(1, rounds + 1):
+        if deadlines and deadlines.session_over():
+            log.info("Closing session of player %s after a timeout", player_name)
+            rounds = round_num - 1
+            break
+        if draining.is_set():
+            log.info("Closing session of player %s: server is shutting down", player_name)
+            rounds = round_num - 1
+            break
+
+        log.debug("Round %d/%d - %s", round_num, rounds, player_name)
+
+        game.new_round() # clear the hands, reshuffle if needed
+
+        # Initial deal phase
+        first_card_player = game.player_hit()
+        frames.append(encode_server_payload(game.result, first_card_player.rank, first_card_player.suit))
+
+        second_card_player = game.player_hit()
+        frames.append(encode_server_payload(game.result, second_card_player.rank, second_card_player.suit))
+
+        if game.result == game.ROUND_RESULT.DEALER_WINS: # player busts
+            await flush()
+            server_print_winner(game, player_name, round_num, flags)
+            continue # Dealer wins, no need to continue the round
+
+        first_card_dealer = game.dealer_hit()
+        frames.append(encode_server_payload(game.result, first_card_dealer.rank, first_card_dealer.suit))
+        if not auto:
+            await flush()
+
+        second_card_dealer = game.dealer_hit() # second card of dealer hidden
+
+        # Player turn
+        while True:
+            if auto:
+                decision = auto_decision(hit_masks, game.player_hand.total_value, first_card_dealer.get_value())
+            else:
+                decision = await read_decision() # decode decision from client
+                decided_at = time.perf_counter()
+                if capture is not None and decision in DECISION_CODES:
+                    capture.decisions.append(DECISION_CODES[decision])
+
+            if decision == "HITTT":
+                card = game.player_hit()
+                # NOT_OVER unless the player busts (the hidden dealer card must not leak)
+                hit_result = game.ROUND_RESULT.DEALER_WINS if game.player_hand.is_bust() else game.ROUND_RESULT.NOT_OVER
+                frames.append(encode_server_payload(hit_result, card.rank, card.suit)) # send card to client
+
+                if game.result == game.ROUND_RESULT.DEALER_WINS: # player busts
+                    await flush()
+                    if not auto:
+                        metrics.decision_to_card.observe(time.perf_counter() - decided_at)
+                    server_print_winner(game, player_name, round_num, flags)
+                    break
+                if not auto:
+                    await flush()
+                    metrics.decision_to_card.observe(time.perf_counter() - decided_at)
+
+            elif decision == "STAND":
+                # Dealer phase - all dealer cards and the result leave together
+                # expose the second card of the dealer (still NOT_OVER, even if two Aces bust the dealer)
+                frames.append(encode_server_payload(game.ROUND_RESULT.NOT_OVER, second_card_dealer.rank, second_card_dealer.suit))
+
+                # Dealer draws until reaching 17+
+                while game.dealer_hand.total_value < 17:
+                    card = game.dealer_hit()
+                    # Always send NOT_OVER for cards (result will be sent after loop)
+                    frames.append(encode_server_payload(game.ROUND_RESULT.NOT_OVER, card.rank, card.suit))
+
+                # After loop: dealer has 17+ or busted, decide winner
+                game.decide_winner()
+                # Send final result packet (use last card in hand)
+                last_card = game.dealer_hand.cards[-1]
+                frames.append(encode_server_payload(game.result, last_card.rank, last_card.suit))
+                await flush()
+                if not auto:
+                    metrics.stand_to_result.observe(time.perf_counter() - decided_at)
+
+                server_print_winner(game, player_name, round_num, flags)
+
+                break # Dealer played, decide winner of round
+
+    log.info("Finished %d rounds with player %s (%.1f writes per round)", rounds, player_name, writes / max(rounds, 1))
@@ -0,0 +1,223 @@
+import argparse
+import json
+import socket
+import statistics
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Dict, List, Tuple
+
+from black_jeck.BlackJeckDiscovery import discover
+from black_jeck.BlackJeckPacketProtocol import encode_request, encode_auto_request, encode_seeded_request,\
+     build_hit_masks, auto_decision, derive_seed, MAX_SEED
+from black_jeck.BlackJeckClient import play_game
+
+BOT_NAME = "Bot"
+MAX_ROUNDS = 255 # rounds field of the REQUEST is one byte
+
+
+# Decision policies #
+# A policy is called with (player_sum, dealer_sum) and returns "HITTT" or "STAND".
+# When the player decides, dealer_sum is the value of the dealer's up-card.
+
+class AlwaysStand:
+
+    def __call__(self, player_sum: int, dealer_sum: int) -> str:
+        return "STAND"
+
+
+class HitBelow:
+
+    def __init__(self, threshold: int):
+        self.threshold = threshold
+
+    def __call__(self, player_sum: int, dealer_sum: int) -> str:
+        return "HITTT" if player_sum < self.threshold else "STAND"
+
+
+class StrategyTable:
+    """
+    Decision per (player total, dealer up-card value).
+
+    The JSON file maps "<player_total>,<dealer_up>" to "HIT" or "STAND".
+    Missing entries hit below 17 (the dealer's own rule).
+    """
+
+    DEFAULT_STAND_ON = 17
+
+    def __init__(self, table: Dict[Tuple[int, int], str]):
+        self.table = table
+
+    @classmethod
+    def load(cls, path: str) -> "StrategyTable":
+        with open(path) as f:
+            raw = json.load(f)
+        table = {}
+        for key, action in raw.items():
+            player_total, dealer_up = (int(part) for part in key.split(","))
+            table[(player_total, dealer_up)] = "HITTT" if action.upper().startswith("HIT") else "STAND"
+        return cls(table)
+
+    def __call__(self, player_sum: int, dealer_sum: int) -> str:
+        decision = self.table.get((player_sum, dealer_sum))
+        if decision is None:
+            decision = "HITTT" if player_sum < self.DEFAULT_STAND_ON else "STAND"
+        return decision
+
+
+def make_policy(args: argparse.Namespace):
+    if args.policy == "stand":
+        return AlwaysStand()
+    if args.policy == "hit-below":
+        return HitBelow(args.threshold)
+    return StrategyTable.load(args.table)
+
+
+# Load generator #
+
+@dataclass
+class LoadStats:
+    rounds: int = 0
+    sessions: int = 0
+    errors: int = 0
+    connect_times: List[float] = field(default_factory=list)
+    latencies: List[float] = field(default_factory=list) # Hit/Stand round-trips
+    wins: int = 0
+    ties: int = 0
+    losses: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+def run_player(server_ip: str, server_port: int, name: str, num_rounds: int, sessions: int,
+               policy, stats: LoadStats, auto: bool = False, seed: int = None):
+    """
+    One simulated player: play 'sessions' sessions of 'num_rounds' rounds each.
+
+    With 'seed' every session sends a SEEDED REQUEST, seeds 'seed', 'seed' + 1 step, ...
+    """
+    hit_masks = None
+    if auto: # the server plays the policy - follow the cards with exactly the same decisions
+        hit_masks = build_hit_masks(policy)
+        request = encode_auto_request(num_rounds, name, hit_masks)
+        policy = partial(auto_decision, hit_masks)
+    else:
+        request = encode_request(num_rounds, name)
+
+    for session in range(sessions):
+        latencies = []
+        if seed is not None:
+            request = encode_seeded_request(num_rounds, name, derive_seed(seed, session), hit_masks)
+        try:
+            started_at = time.perf_counter()
+            sock = socket.create_connection((server_ip, server_port))
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1) # no Nagle delay on small payloads
+            connect_time = time.perf_counter() - started_at
+            try:
+                sock.sendall(request)
+                wins, ties, losses = play_game(sock, num_rounds, decide=policy, show=False,
+                                               latencies=latencies, auto=auto)
+            finally:
+                sock.close()
+        except Exception as e:
+            print(f"{name}: session failed: {e}")
+            with stats.lock:
+                stats.errors += 1
+            continue
+
+        with stats.lock:
+            stats.sessions += 1
+            stats.rounds += num_rounds
+            stats.connect_times.append(connect_time)
+            stats.latencies.extend(latencies)
+            stats.wins += wins
+            stats.ties += ties
+            stats.losses += losses
+
+
+def percentiles(values: List[float]) -> Tuple[float, float, float]:
+    """p50, p95 and p99 of 'values'."""
+    if not values:
+        return 0.0, 0.0, 0.0
+    if len(values) == 1:
+        return values[0], values[0], values[0]
+    cuts = statistics.quantiles(values, n=100)
+    return cuts[49], cuts[94], cuts[98]
+
+
+def print_report(stats: LoadStats, elapsed: float):
+    print("=" * 50)
+    print(f"Sessions: {stats.sessions} ({stats.errors} failed) | Rounds: {stats.rounds} in {elapsed:.2f}s")
+    print(f"Rounds/sec: {stats.rounds / elapsed:.1f}" if elapsed > 0 else "Rounds/sec: -")
+    print(f"Wins / Ties / Losses: {stats.wins} / {stats.ties} / {stats.losses}")
+    if stats.connect_times:
+        print(f"Connection setup: mean {statistics.fmean(stats.connect_times) * 1000:.3f} ms")
+    p50, p95, p99 = percentiles(stats.latencies)
+    print(f"Hit/Stand round-trip ({len(stats.latencies)}): "
+          f"p50 {p50 * 1000:.3f} ms | p95 {p95 * 1000:.3f} ms | p99 {p99 * 1000:.3f} ms")
+    print("=" * 50)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Headless BlackJeck bot client and load generator")
+    parser.add_argument("--host", help="server address (default: wait for a UDP offer)")
+    parser.add_argument("--port", type=int, help="server TCP port (required with --host)")
+    parser.add_argument("--players", type=int, default=1, help="number of concurrent simulated players")
+    parser.add_argument("--rounds", type=int, default=10, help=f"rounds per session (1-{MAX_ROUNDS})")
+    parser.add_argument("--sessions", type=int, default=1, help="sessions per player")
+    parser.add_argument("--policy", choices=("stand", "hit-below", "table"), default="hit-below")
+    parser.add_argument("--threshold", type=int, default=17, help="hit-below: hit while the sum is below this")
+    parser.add_argument("--table", help="table: JSON strategy table file")
+    parser.add_argument("--auto", action="store_true",
+                        help="send the policy with the request and let the server play it (no decision round-trips)")
+    parser.add_argument("--seed", type=int,
+                        help="play reproducible sessions: player i's session j deals from a seed derived from this one")
+    args = parser.parse_args(argv)
+
+    if args.host and args.port is None:
+        parser.error("--port is required with --host")
+    if not 1 <= args.rounds <= MAX_ROUNDS:
+        parser.error(f"--rounds must be between 1 and {MAX_ROUNDS}")
+    if args.policy == "table" and not args.table:
+        parser.error("--table is required with --policy table")
+    if args.seed is not None and not 0 <= args.seed <= MAX_SEED:
+        parser.error(f"--seed must be between 0 and {MAX_SEED}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    policy = make_policy(args)
+
+    if args.host:
+        server_ip, server_port = args.host, args.port
+    else:
+        print("Listening for server offers...")
+        server = discover(use_cache=False) # fastest server offering right now
+        server_ip, server_port = server.ip, server.port
+        print(f"Server offer received from {server_ip}:{server_port} - {server.name}")
+
+    stats = LoadStats()
+    players = [
+        threading.Thread(
+            target=run_player,
+            args=(server_ip, server_port, f"{BOT_NAME}{i}", args.rounds, args.sessions, policy, stats, args.auto,
+                  None if args.seed is None else derive_seed(args.seed, i << 32)),
+            daemon=True
+        )
+        for i in range(args.players)
+    ]
+
+    started_at = time.perf_counter()
+    for player in players:
+        player.start()
+    try:
+        for player in players:
+            player.join()
+    except KeyboardInterrupt: # Ctrl+C - report what finished so far
+        print("\nStopping bots...")
+    print_report(stats, time.perf_counter() - started_at)
+
+
+if __name__ == "__main__":
+    main()
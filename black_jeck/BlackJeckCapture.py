@@ -0,0 +1,136 @@
+import atexit
+import base64
+import json
+import queue
+import threading
+import time
+from typing import Iterator, List, Optional, Sequence
+
+from black_jeck.BlackJeckLog import log
+
+# Session capture: one JSON object per line and per session -
+#   request (name, rounds, seed, auto-play policy), the server's deck configuration,
+#   the client's decisions in order ("H" = Hit, "S" = Stand) and every byte the
+#   server sent (base64). Replaying the request and decisions against a server with
+#   the same configuration must give back the same bytes.
+CAPTURE_VERSION = 1
+DECISION_CODES = {"HITTT": "H", "STAND": "S"}
+DECISIONS = {"H": "Hittt", "S": "Stand"} # client payload of a decision code
+
+
+class SessionCapture:
+    """Everything one session needs for a replay, filled in while it is played."""
+
+    __slots__ = ("name", "rounds", "seed", "hit_masks", "decks", "penetration", "started",
+                 "decisions", "sent")
+
+    def __init__(self, name: str, rounds: int, seed: int, hit_masks: Optional[Sequence[int]] = None,
+                 decks: int = 0, penetration: float = 0.75, started: float = None):
+        self.name = name
+        self.rounds = rounds
+        self.seed = seed
+        self.hit_masks = hit_masks
+        self.decks = decks
+        self.penetration = penetration
+        self.started = time.time() if started is None else started
+        self.decisions: List[str] = []
+        self.sent = bytearray() # server payloads, in order
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "version": CAPTURE_VERSION,
+            "time": round(self.started, 6),
+            "name": self.name,
+            "rounds": self.rounds,
+            "seed": self.seed,
+            "policy": list(self.hit_masks) if self.hit_masks is not None else None,
+            "decks": self.decks,
+            "penetration": self.penetration,
+            "decisions": "".join(self.decisions),
+            "server": base64.b64encode(self.sent).decode(),
+        })
+
+    @classmethod
+    def from_json(cls, line: str) -> "SessionCapture":
+        entry = json.loads(line)
+        if entry.get("version") != CAPTURE_VERSION:
+            raise ValueError(f"Unsupported capture version {entry.get('version')}")
+        capture = cls(entry["name"], entry["rounds"], entry["seed"],
+                      tuple(entry["policy"]) if entry["policy"] is not None else None,
+                      entry["decks"], entry["penetration"], entry["time"])
+        capture.decisions = list(entry["decisions"])
+        capture.sent = bytearray(base64.b64decode(entry["server"]))
+        return capture
+
+
+def read_captures(path: str) -> Iterator[SessionCapture]:
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield SessionCapture.from_json(line)
+
+
+class CaptureWriter:
+    """
+    Appends finished sessions to a capture file from a background thread.
+
+    The session only hands its SessionCapture over - serialising and writing
+    happen off the game loop, like the log and the round log.
+    """
+
+    def __init__(self):
+        self.path = None
+        self._queue = None # None = not capturing
+        self._thread = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._queue is not None
+
+    def open(self, path: str):
+        self.path = path
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._write, args=(self._queue,), daemon=True)
+        self._thread.start()
+        log.info("Capturing sessions to %s", path)
+
+    def write(self, capture: SessionCapture):
+        if self._queue is not None:
+            self._queue.put(capture)
+
+    def close(self):
+        """Write out the queued sessions and stop the writer thread."""
+        if self._queue is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._queue = None
+        self._thread = None
+
+    def _write(self, captures: queue.SimpleQueue):
+        with open(self.path, "a") as f:
+            while True:
+                capture = captures.get()
+                if capture is None:
+                    return
+                lines = [capture.to_json()]
+                try:
+                    while True: # everything queued meanwhile goes in the same write
+                        capture = captures.get_nowait()
+                        if capture is None:
+                            break
+                        lines.append(capture.to_json())
+                except queue.Empty:
+                    pass
+                try:
+                    f.write("\n".join(lines) + "\n")
+                    f.flush()
+                except OSError as e:
+                    log.error("Capture write failed, %d sessions lost: %s", len(lines), e)
+                if capture is None:
+                    return
+
+
+# Session capture of this process (--capture; worker N appends to FILE.N)
+capture_writer = CaptureWriter()
+atexit.register(capture_writer.close)
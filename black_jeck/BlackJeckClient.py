@@ -1,16 +1,15 @@
+import argparse
 import socket
 import sys
-import os
+import time
+from functools import partial
+from typing import Callable, List
 
-# Add parent directory to path for package imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from black_jeck.UDPBroadcastOffer import UDPBroadcastOffer
-from network.TCPConnection import recv_exact
+from black_jeck.BlackJeckDiscovery import discover, save_cached_server, DEFAULT_WINDOW_SEC
+from network.TCPConnection import FramedReader
 from black_jeck.BlackJeckPacketProtocol import decode_server_payload, encode_request,\
      encode_client_payload, SERVER_PAYLOAD_SIZE
 from black_jeck.BlackJeckLogic import BlackjackGame, Card
-from black_jeck.GameUI import GameUI
 
 # Result codes #
 RESULT_NOT_OVER = BlackjackGame.ROUND_RESULT.NOT_OVER
@@ -19,17 +18,42 @@ RESULT_LOSS = BlackjackGame.ROUND_RESULT.DEALER_WINS
 RESULT_TIE = BlackjackGame.ROUND_RESULT.TIE
 
 
-def main():
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="BlackJeck client")
+    parser.add_argument("--window", type=float, default=DEFAULT_WINDOW_SEC,
+                        help="seconds to collect server offers before choosing one")
+    parser.add_argument("--no-probe", action="store_true",
+                        help="take the first server that offers instead of the one with the fastest connect")
+    parser.add_argument("--no-cache", action="store_true", help="do not try the last server first")
+    display = parser.add_mutually_exclusive_group()
+    display.add_argument("--quiet", action="store_true",
+                         help="draw no cards or round results, only the statistics of each session")
+    display.add_argument("--redraw", action="store_true",
+                         help="update each round in place with ANSI cursor control (terminals only)")
+    parser.add_argument("--hints", metavar="TABLE",
+                        help="show the decision of this strategy table (e.g. written by odds.py) in the prompt")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
     print("BlackJeck Client started")
+    if args.redraw and sys.stdout.isatty():
+        from black_jeck.GameUI import GameUI
+        GameUI.redraw = True
+    hints = None
+    if args.hints:
+        from black_jeck.BlackJeckBot import StrategyTable
+        hints = StrategyTable.load(args.hints)
     
     while True:
         sock = None
         try:
-            # Listen for server offers
+            # Find a server - the last one we played on, or the fastest one offering
             print("Listening for server offers...")
-            broadcaster = UDPBroadcastOffer()
-            server_ip, server_tcp_port, server_name = broadcaster.listen()
-            print(f"Server offer received from {server_ip}:{server_tcp_port} - {server_name}")
+            server = discover(args.window, probe_rtt=not args.no_probe, use_cache=not args.no_cache)
+            server_ip, server_tcp_port, server_name = server.ip, server.port, server.name
+            rtt = f" ({server.rtt * 1000:.1f} ms)" if server.rtt is not None else ""
+            print(f"Server offer received from {server_ip}:{server_tcp_port} - {server_name}{rtt}")
 
             # Get player name and number of rounds
             player_name = input("Enter your name: ")
@@ -51,10 +75,17 @@ def main():
             
             # Create TCP socket and connect to server
             sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1) # no Nagle delay on small payloads
             sock.connect((server_ip, server_tcp_port))
             sock.sendall(encode_request(num_rounds, player_name)) # send request to server
 
-            wins, ties, losses = play_game(sock, num_rounds) # play game
+            if args.quiet:
+                wins, ties, losses = play_game(sock, num_rounds, decide=partial(ask_decision_quiet, hints=hints),
+                                               show=False)
+            else:
+                wins, ties, losses = play_game(sock, num_rounds, decide=partial(ask_decision, hints=hints)) # play game
+            save_cached_server(server) # try this server first next time
+            from black_jeck.GameUI import GameUI
             GameUI.print_statistics(player_name, wins, ties, losses) # print statistics
 
         except KeyboardInterrupt: # Ctrl+C
@@ -65,10 +96,51 @@ def main():
                 sock.close()
 
 
-def play_game(sock: socket.socket, num_rounds: int):
+def read_decision(read: Callable[[str], str], prompt: str) -> str:
+    """Ask until Hit or Stand is typed."""
+    decision = None
+    while decision not in ("HITTT", "STAND", "HITT", "HIT"):
+        decision = read(prompt).strip().upper()
+    return "STAND" if decision == "STAND" else "HITTT"
+
+
+def hint(hints, player_sum: int, dealer_sum: int) -> str:
+    """' (hint: Hit)' with a strategy table, else nothing."""
+    if hints is None:
+        return ""
+    return " (hint: Hit)" if hints(player_sum, dealer_sum) == "HITTT" else " (hint: Stand)"
+
+
+def ask_decision(player_sum: int, dealer_sum: int, hints=None) -> str:
+    """Interactive decision policy - ask the player until Hit or Stand is typed."""
+    from black_jeck.GameUI import GameUI # already loaded by play_game - GameUI.ask counts the prompt lines
+    return read_decision(GameUI.ask, f"Please type Hit or Stand{hint(hints, player_sum, dealer_sum)}: ")
+
+
+def ask_decision_quiet(player_sum: int, dealer_sum: int, hints=None) -> str:
+    """Interactive policy of --quiet: no cards are drawn, so the prompt shows the sums."""
+    return read_decision(input, f"Your sum {player_sum}, dealer shows {dealer_sum} - "
+                                f"Hit or Stand{hint(hints, player_sum, dealer_sum)}: ")
+
+
+def play_game(sock: socket.socket, num_rounds: int,
+              decide: Callable[[int, int], str] = ask_decision, show: bool = True,
+              latencies: List[float] = None, auto: bool = False):
+    """
+    Play 'num_rounds' rounds on a connected socket.
+
+    decide(player_sum, dealer_sum) returns "HITTT" or "STAND". With show=False nothing
+    is rendered (headless bots). If 'latencies' is given, the round-trip time of every
+    Hit/Stand decision (send -> last answer packet) is appended to it in seconds.
+    With auto=True the server plays the policy sent in an AUTO REQUEST: no decisions are
+    sent, 'decide' (the same policy) is only used to follow the stream of cards.
+    """
     wins = 0
     ties = 0
     losses = 0
+    reader = FramedReader(sock) # buffered reads for the whole session
+    if show:
+        from black_jeck.GameUI import GameUI # headless bots never import the renderer
 
     for round_num in range(1, num_rounds + 1):
         # Track round state
@@ -78,8 +150,7 @@ def play_game(sock: socket.socket, num_rounds: int):
         dealer_sum = 0
 
         # Receive first two player cards
-        for _ in range(2):
-            data = recv_exact(sock, SERVER_PAYLOAD_SIZE)
+        for data in reader.read_frames(SERVER_PAYLOAD_SIZE, 2):
             round_result, rank, suit_idx = decode_server_payload(data)
             card = Card(rank, suit_idx)
             player_cards.append(card)
@@ -87,47 +158,54 @@ def play_game(sock: socket.socket, num_rounds: int):
 
         # Check if player busted (can be 2 Aces)
         if round_result == RESULT_LOSS:
-            GameUI.print_result(round_result, round_num, player_sum, dealer_sum)
+            if show:
+                GameUI.print_result(round_result, round_num, player_sum, dealer_sum)
             losses += 1
             continue
 
         # Receive dealer first card
-        data = recv_exact(sock, SERVER_PAYLOAD_SIZE)
+        data = reader.read_frame(SERVER_PAYLOAD_SIZE)
         round_result, rank, suit_idx = decode_server_payload(data)
         card = Card(rank, suit_idx)
         dealer_cards.append(card)
         dealer_sum += card.get_value()
         
         # Display initial state
-        GameUI.print_game_state(round_num, player_cards, dealer_cards, player_sum, dealer_sum)
+        if show:
+            GameUI.print_game_state(round_num, player_cards, dealer_cards, player_sum, dealer_sum)
 
         # Player's turn
         while True:
-            decision = None
-            while decision not in ("HITTT", "STAND", "HITT", "HIT"):
-                decision = input("Please type Hit or Stand: ").strip().upper()
-
-            if decision in ("HITTT", "HITT", "HIT"):
-                sock.sendall(encode_client_payload("Hittt")) # send 'hit' to server
-                data = recv_exact(sock, SERVER_PAYLOAD_SIZE)
+            decision = decide(player_sum, dealer_sum)
+            sent_at = time.perf_counter()
+
+            if decision == "HITTT":
+                if not auto:
+                    sock.sendall(encode_client_payload("Hittt")) # send 'hit' to server
+                data = reader.read_frame(SERVER_PAYLOAD_SIZE)
+                if latencies is not None and not auto:
+                    latencies.append(time.perf_counter() - sent_at)
                 round_result, rank, suit = decode_server_payload(data)
                 card = Card(rank, suit)
                 player_cards.append(card)
                 player_sum += card.get_value()
                 
-                GameUI.print_game_state(round_num, player_cards, dealer_cards, player_sum, dealer_sum)
+                if show:
+                    GameUI.print_game_state(round_num, player_cards, dealer_cards, player_sum, dealer_sum)
 
                 if round_result == RESULT_LOSS: # player busted (over 21)
-                    GameUI.print_result(round_result, round_num, player_sum, dealer_sum)
+                    if show:
+                        GameUI.print_result(round_result, round_num, player_sum, dealer_sum)
                     losses += 1
                     break
             
             elif decision == "STAND":
-                sock.sendall(encode_client_payload("Stand")) # send 'stand' to server
+                if not auto:
+                    sock.sendall(encode_client_payload("Stand")) # send 'stand' to server
                 
                 # Receive dealer cards until final result
                 while True:
-                    data = recv_exact(sock, SERVER_PAYLOAD_SIZE)
+                    data = reader.read_frame(SERVER_PAYLOAD_SIZE)
                     round_result, rank, suit = decode_server_payload(data)
                     
                     if round_result == RESULT_NOT_OVER: # dealer not busted
@@ -135,7 +213,8 @@ def play_game(sock: socket.socket, num_rounds: int):
                         card = Card(rank, suit)
                         dealer_cards.append(card)
                         dealer_sum += card.get_value()
-                        GameUI.print_game_state(round_num, player_cards, dealer_cards, player_sum, dealer_sum)
+                        if show:
+                            GameUI.print_game_state(round_num, player_cards, dealer_cards, player_sum, dealer_sum)
                     else:
                         # Final result received
                         if round_result == RESULT_WIN:
@@ -145,8 +224,11 @@ def play_game(sock: socket.socket, num_rounds: int):
                         else:
                             losses += 1
                         break
-                
-                GameUI.print_result(round_result, round_num, player_sum, dealer_sum)
+
+                if latencies is not None and not auto:
+                    latencies.append(time.perf_counter() - sent_at)
+                if show:
+                    GameUI.print_result(round_result, round_num, player_sum, dealer_sum)
                 break
 
     return wins, ties, losses
@@ -0,0 +1,103 @@
+import argparse
+import heapq
+import itertools
+import time
+from typing import Callable, Optional, Tuple
+
+DEFAULT_REQUEST_TIMEOUT_SEC = 10.0
+DEFAULT_DECISION_TIMEOUT_SEC = 60.0
+DEFAULT_SESSION_TIMEOUT_SEC = 0.0 # 0 = no limit
+
+# What happens to a session whose client missed a decision deadline
+TIMEOUT_DROP = "drop" # close the connection
+TIMEOUT_STAND = "stand" # finish the round as if the player stood, then close the connection
+TIMEOUT_POLICIES = (TIMEOUT_DROP, TIMEOUT_STAND)
+
+TIMEOUT_KINDS = ("request", "decision", "session")
+
+
+class SessionTimeout(Exception):
+    """The client missed one of the session deadlines."""
+
+    def __init__(self, kind: str):
+        super().__init__(f"{kind} timeout")
+        self.kind = kind
+
+
+class SessionDeadlines:
+    """Deadlines of one session: reading the request, each decision, and the whole session."""
+
+    def __init__(self, args: argparse.Namespace, on_timeout: Callable[[str], None] = None):
+        self.request_timeout = args.request_timeout or None
+        self.decision_timeout = args.decision_timeout or None
+        self.session_deadline = time.monotonic() + args.session_timeout if args.session_timeout else None
+        self.policy = args.timeout_policy
+        self.on_timeout = on_timeout # called with the kind of every timeout (for the counters)
+        self.expired = False # set once a deadline passed - the session ends after the current round
+
+    def next_wait(self) -> Tuple[Optional[float], str]:
+        """Seconds the next decision may take and which limit that is (None = no limit)."""
+        timeout, kind = self.decision_timeout, "decision"
+        if self.session_deadline is not None:
+            remaining = max(0.0, self.session_deadline - time.monotonic())
+            if timeout is None or remaining < timeout:
+                timeout, kind = remaining, "session"
+        return timeout, kind
+
+    def session_over(self) -> bool:
+        """True once a deadline passed or the session budget is spent - checked between rounds."""
+        if not self.expired and self.session_deadline is not None and time.monotonic() >= self.session_deadline:
+            self.timed_out("session")
+        return self.expired
+
+    def timed_out(self, kind: str):
+        self.expired = True
+        if self.on_timeout:
+            self.on_timeout(kind)
+
+
+class IdleSessions:
+    """
+    Sessions waiting on their client (asyncio engine).
+
+    Deadlines sit in one heap and a single sweeper task evicts the expired ones,
+    instead of a timer and a wrapper task for every read.
+    """
+
+    SWEEP_INTERVAL_SEC = 0.25
+
+    def __init__(self):
+        self._heap = [] # (deadline, token)
+        self._callbacks = {} # token -> called on expiry, removed when the wait ends
+        self._tokens = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._callbacks)
+
+    def watch(self, timeout: float, on_expire: Callable[[], None]) -> int:
+        token = next(self._tokens)
+        heapq.heappush(self._heap, (time.monotonic() + timeout, token))
+        self._callbacks[token] = on_expire
+        return token
+
+    def unwatch(self, token: int):
+        self._callbacks.pop(token, None) # the heap entry is dropped lazily
+
+    def sweep(self, now: float):
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, token = heapq.heappop(heap)
+            on_expire = self._callbacks.pop(token, None)
+            if on_expire:
+                on_expire()
+
+        # rebuild when most entries belong to waits that already ended
+        if len(heap) > 2 * len(self._callbacks) + 64:
+            self._heap = [entry for entry in heap if entry[1] in self._callbacks]
+            heapq.heapify(self._heap)
+
+    async def run(self):
+        import asyncio # the blocking engine never sweeps - keep it off the start-up path
+        while True:
+            await asyncio.sleep(self.SWEEP_INTERVAL_SEC)
+            self.sweep(time.monotonic())
@@ -0,0 +1,103 @@
+import json
+import os
+from dataclasses import dataclass
+from typing import List, Optional
+
+from black_jeck.UDPBroadcastOffer import UDPBroadcastOffer
+from network.TCPConnection import probe_connect_rtt
+
+DEFAULT_WINDOW_SEC = 1.2 # a bit more than one offer interval - hears every running server
+PROBE_WINDOW_SEC = 0.15 # servers that answer probes reply within a few round-trips
+PROBE_TIMEOUT_SEC = 0.5 # candidates slower than this to connect are skipped
+CACHE_PATH = os.environ.get("BLACKJECK_SERVER_CACHE",
+                            os.path.join(os.path.expanduser("~"), ".blackjeck_last_server.json"))
+
+
+@dataclass
+class ServerCandidate:
+    ip: str
+    port: int
+    name: str
+    rtt: Optional[float] = None # TCP connect time in seconds, None = not probed
+    spare: Optional[int] = None # free session slots from a LOAD OFFER, None = not advertised
+    instance_id: Optional[int] = None
+
+
+def load_cached_server(path: str = CACHE_PATH) -> Optional[ServerCandidate]:
+    try:
+        with open(path) as f:
+            cached = json.load(f)
+        return ServerCandidate(cached["ip"], int(cached["port"]), cached["name"])
+    except (OSError, ValueError, KeyError, TypeError): # missing or broken cache - just discover
+        return None
+
+
+def save_cached_server(server: ServerCandidate, path: str = CACHE_PATH):
+    """Remember a server that served a session, for the next start."""
+    try:
+        with open(path, "w") as f:
+            json.dump({"ip": server.ip, "port": server.port, "name": server.name}, f)
+    except OSError:
+        pass # the cache is only a shortcut
+
+
+def probe(candidates: List[ServerCandidate], timeout: float = PROBE_TIMEOUT_SEC) -> List[ServerCandidate]:
+    """Measure the connect RTT of every candidate at once, return the reachable ones, fastest first."""
+    if not candidates:
+        return []
+    from concurrent.futures import ThreadPoolExecutor # only paid for when there is something to probe
+    with ThreadPoolExecutor(max_workers=len(candidates)) as pool:
+        rtts = pool.map(lambda server: probe_connect_rtt(server.ip, server.port, timeout), candidates)
+        for server, rtt in zip(candidates, rtts):
+            server.rtt = rtt
+    return sorted((server for server in candidates if server.rtt is not None), key=lambda server: server.rtt)
+
+
+def dedupe(candidates: List[ServerCandidate]) -> List[ServerCandidate]:
+    """One candidate per server process: a server heard on several addresses (LAN IP and loopback) keeps the first."""
+    seen = set()
+    unique = []
+    for server in candidates:
+        if server.instance_id: # plain OFFERs carry no id - only ip and port tell them apart
+            if server.instance_id in seen:
+                continue
+            seen.add(server.instance_id)
+        unique.append(server)
+    return unique
+
+
+def rank(candidates: List[ServerCandidate]) -> List[ServerCandidate]:
+    """Most spare capacity first, full servers last, then by connect RTT."""
+    return sorted(candidates, key=lambda server: (server.spare == 0, -(server.spare or 0),
+                                                   server.rtt if server.rtt is not None else 0.0))
+
+
+def discover(window_sec: float = DEFAULT_WINDOW_SEC, probe_rtt: bool = True,
+             use_cache: bool = True) -> ServerCandidate:
+    """
+    Pick a server to play on.
+
+    The cached last server is tried first and returned at once if it accepts a
+    connection. Otherwise servers are probed for an immediate offer; if none
+    answers (servers without probe support), offers are collected for 'window_sec'
+    until at least one arrives. Offers are deduplicated by ip and port and by the
+    server's instance id (a LOAD OFFER is never replaced by a plain OFFER), and the
+    server with the most spare capacity wins, the lowest connect RTT breaking ties
+    (with 'probe_rtt' off the RTT is not measured).
+    """
+    if use_cache:
+        cached = load_cached_server()
+        if cached and probe([cached]):
+            return cached
+
+    listener = UDPBroadcastOffer()
+    window = PROBE_WINDOW_SEC
+    while True:
+        candidates = dedupe([ServerCandidate(ip, info.port, info.name, spare=info.spare,
+                                             instance_id=info.instance_id or None)
+                             for ip, info in listener.collect(window, probe=True)])
+        if probe_rtt:
+            candidates = probe(candidates)
+        if candidates:
+            return rank(candidates)[0]
+        window = window_sec
@@ -0,0 +1,97 @@
+import atexit
+import contextvars
+import itertools
+import json
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+DEFAULT_LOG_LEVEL = "INFO" # per-round detail is logged at DEBUG
+
+# Server log - records are queued by the engines and written by a listener thread
+log = logging.getLogger("blackjeck")
+
+# Id of the session the current thread / task is serving ("" outside a session)
+session_id = contextvars.ContextVar("session_id", default="")
+_session_ids = itertools.count(1)
+
+_listener = None
+
+
+def new_session_id() -> str:
+    """Unique within the host: worker processes have their own pid."""
+    session = f"{os.getpid()}-{next(_session_ids)}"
+    session_id.set(session)
+    return session
+
+
+class SessionFilter(logging.Filter):
+    """Stamps every record with the session id of the code that logged it."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.session = session_id.get()
+        return True
+
+
+class ConsoleFormatter(logging.Formatter):
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        session = getattr(record, "session", "")
+        return f"[{session}] {message}" if session else message
+
+
+class JsonLinesFormatter(logging.Formatter):
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": round(record.created, 6),
+            "level": record.levelname,
+            "session": getattr(record, "session", ""),
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+def setup_logging(level: str = DEFAULT_LOG_LEVEL, json_lines: bool = False, stream=None):
+    """
+    Route the server log through a queue to a listener thread.
+
+    The engines only build a record and put it on the queue; formatting and the
+    write to 'stream' (default stdout) happen off the game loop. Records below
+    'level' are dropped before any formatting. Safe to call again in a forked
+    worker: the listener thread of the parent does not exist there.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(SessionFilter()) # runs in the logging thread / task, where the session is known
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonLinesFormatter() if json_lines else ConsoleFormatter("%(message)s"))
+
+    log.handlers[:] = [queue_handler]
+    log.setLevel(level)
+    log.propagate = False
+
+    _listener = QueueListener(log_queue, output)
+    _listener.start()
+
+
+def stop_logging():
+    """Write out the queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
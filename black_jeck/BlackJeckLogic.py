@@ -11,64 +11,145 @@ RANK_NAMES = {
     8: '8', 9: '9', 10: '10', 11: 'J', 12: 'Q', 13: 'K'
 }
 
+# Card values by rank: Ace=11, 2-10, face cards=10 (index 0 unused)
+RANK_VALUES = (0, 11, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10)
+
+# Cards are stored as one byte: (rank << 2) | suit
+def card_code(rank: int, suit: int) -> int:
+    return (rank << 2) | suit
+
+# Card value by card code
+CARD_VALUES = bytes(RANK_VALUES[code >> 2] for code in range(len(RANK_VALUES) << 2))
+
 class Card:
+    __slots__ = ('rank', 'suit')
     
     def __init__(self, rank: int, suit: int):
         self.rank = rank
         self.suit = suit
+
+    @property
+    def code(self) -> int:
+        return (self.rank << 2) | self.suit
+
+    @staticmethod
+    def from_code(code: int) -> 'Card':
+        return CARDS[code] # shared instance - cards are never modified
     
     def get_value(self) -> int:
-        if self.rank == 1:  # Ace
-            return 11
-        elif 2 <= self.rank <= 10:  # Number cards
-            return self.rank
-        else:  # Face cards (Jack, Queen, King)
-            return 10
+        return RANK_VALUES[self.rank]
+
+# One shared Card per card code (index = code, None for unused codes)
+CARDS: List[Optional[Card]] = [None] * len(CARD_VALUES)
+for _suit_idx in range(4):
+    for _rank in range(1, 14):
+        CARDS[card_code(_rank, _suit_idx)] = Card(_rank, _suit_idx)
+
+# Full deck in reset order: suits outer, ranks inner
+FULL_DECK = bytes(card_code(rank, suit_idx) for suit_idx in range(4) for rank in range(1, 14))
+
+# Most cards one hand can take: every card is worth at least 2, so at most 10 stay under 21 and the 11th busts
+MAX_HAND_CARDS = 11
+
+# Most cards one round of a private game can take: the player's hand and the dealer's
+ROUND_CARDS = 2 * MAX_HAND_CARDS
     
 class Deck:
-    def __init__(self):
-        self.cards: List[Card] = [] # list of cards
+    __slots__ = ('cards', 'remaining', 'rng')
+
+    def __init__(self, rng: random.Random = None):
+        self.cards = bytearray(FULL_DECK) # card codes, dealt from the end
+        self.remaining = 0 # number of cards left to deal
+        self.rng = rng or random # a seeded Random makes the session reproducible
         self.reset()
     
     def reset(self):
         # reset the deck
-        self.cards = []
-        for suit_idx in range(4):  # 4 suits
-            for rank in range(1, 14):  # ranks 1-13
-                self.cards.append(Card(rank, suit_idx))
+        self.cards[:] = FULL_DECK
+        self.remaining = len(FULL_DECK)
         self.shuffle()
     
     def shuffle(self):
         # shuffle the deck
-        random.shuffle(self.cards)
+        self.rng.shuffle(self.cards)
     
     def deal_card(self) -> Optional[Card]:
         # deal a card from the deck
-        if len(self.cards) == 0:
+        if self.remaining == 0:
             self.reset()
-        return self.cards.pop() # return the top card
+        self.remaining -= 1
+        return CARDS[self.cards[self.remaining]] # return the top card
+
+    def needs_shuffle(self) -> bool:
+        # a single deck is reshuffled for every round
+        return self.remaining < len(self.cards)
+
+class Shoe(Deck):
+    """Several decks shuffled together and dealt across rounds until the cut card is reached."""
+    __slots__ = ('num_decks', 'cut_card')
+
+    MIN_DECKS = 1
+    MAX_DECKS = 8
+
+    def __init__(self, num_decks: int = 6, penetration: float = 0.75, rng: random.Random = None):
+        if not self.MIN_DECKS <= num_decks <= self.MAX_DECKS:
+            raise ValueError(f"Number of decks must be between {self.MIN_DECKS} and {self.MAX_DECKS}")
+        if not 0 < penetration <= 1:
+            raise ValueError("Penetration must be in (0, 1]")
+        self.num_decks = num_decks
+        # reshuffle once no more than this many cards are left behind the cut card
+        self.cut_card = int(len(FULL_DECK) * num_decks * (1 - penetration))
+        super().__init__(rng)
+
+    def reset(self):
+        # put all the decks back and shuffle
+        self.cards[:] = FULL_DECK * self.num_decks
+        self.remaining = len(self.cards)
+        self.shuffle()
+
+    def needs_shuffle(self) -> bool:
+        return self.remaining <= self.cut_card # cut card reached
 
 class Hand:
+    __slots__ = ('codes', 'total_value')
+
     def __init__(self):
-        self.cards = [] # list of cards in the hand
+        self.codes = bytearray() # card codes of the cards in the hand
         self.total_value = 0 # total value of the hand
+
+    @property
+    def cards(self) -> List[Card]:
+        return [CARDS[code] for code in self.codes] # list of cards in the hand
         
     def add_card(self, card: Card):
-        self.cards.append(card) # add a card to the hand
-        self.total_value += card.get_value() # add the value of the card to the hand
+        code = card.code
+        self.codes.append(code) # add a card to the hand
+        self.total_value += CARD_VALUES[code] # add the value of the card to the hand
 
     def is_bust(self):
         return self.total_value > 21 # return True if the hand is bust
 
+    def clear(self):
+        self.codes.clear() # remove all cards from the hand
+        self.total_value = 0
+
 class BlackjackGame:
     # Round Result
     ROUND_RESULT = IntEnum('ROUND_RESULT', ['NOT_OVER', 'TIE', 'DEALER_WINS', 'PLAYER_WINS'])
 
-    def __init__(self):
-        self.deck = Deck()
+    def __init__(self, deck: Deck = None, rng: random.Random = None):
+        self.deck = deck or Deck(rng) # a Shoe keeps dealing across rounds
         self.player_hand = Hand()
         self.dealer_hand = Hand()
         self.result = self.ROUND_RESULT.NOT_OVER # result of the round
+
+    def new_round(self):
+        # clear the hands, shuffle when the deck asks for it or could run out mid-round
+        if self.deck.needs_shuffle() or self.deck.remaining < ROUND_CARDS:
+            self.deck.reset()
+        self.player_hand.clear()
+        self.dealer_hand.clear()
+        self.result = self.ROUND_RESULT.NOT_OVER
     
     def player_hit(self) -> Optional[Card]:
         card = self.deck.deal_card()
@@ -0,0 +1,171 @@
+import bisect
+import signal
+import threading
+import time
+from typing import TYPE_CHECKING, List, Sequence
+
+from black_jeck.BlackJeckLogic import BlackjackGame
+from black_jeck.BlackJeckLog import log
+
+if TYPE_CHECKING: # http.server is imported only when --metrics-port is given
+    from http.server import ThreadingHTTPServer
+
+ROUND_RESULT = BlackjackGame.ROUND_RESULT
+
+# Latency bucket upper bounds in seconds: 50 µs .. 10 s
+LATENCY_BUCKETS_SEC = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                       0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_HOST = "127.0.0.1" # the metrics endpoint is only served locally
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8" # Prometheus text format
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram.
+
+    observe() is one C-level bisect and three integer adds, cheap enough to
+    record every event. Buckets are cumulative only when rendered.
+    """
+
+    __slots__ = ("name", "help", "bounds", "counts", "sum", "count")
+
+    def __init__(self, name: str, help: str, bounds: Sequence[float] = LATENCY_BUCKETS_SEC):
+        self.name = name
+        self.help = help
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1) # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, lines: List[str]):
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} histogram")
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound:g}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{self.name}_sum {self.sum:.6f}")
+        lines.append(f"{self.name}_count {self.count}")
+
+
+class ServerMetrics:
+    """
+    Counters and latency histograms of one server process.
+
+    Counters are plain int attributes, bumped in place by the engines - no locks,
+    no label lookups on the hot path. Session gauges are read from the engine's
+    SessionCounter when the metrics are rendered.
+    """
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.connections_accepted = 0
+        self.connections_rejected = 0 # invalid request or none in time
+        self.connections_probed = 0 # closed before sending anything - a client measuring the connect RTT
+        self.connections_shed = 0 # refused at once: over --max-sessions or draining
+        self.rounds = 0
+        self.results = [0] * 5 # indexed by ROUND_RESULT
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.accept_to_request = Histogram("blackjeck_accept_to_request_seconds",
+                                           "Time from accepting a connection to its decoded request")
+        self.decision_to_card = Histogram("blackjeck_decision_to_card_seconds",
+                                          "Time from a received Hit to the card being sent")
+        self.stand_to_result = Histogram("blackjeck_stand_to_result_seconds",
+                                         "Time from a received Stand to the round result being sent")
+        self.sessions = None # SessionCounter of the engine, set by serve()
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+
+        def counter(name: str, help: str, value, kind: str = "counter"):
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {value}")
+
+        counter("blackjeck_connections_accepted_total", "Accepted TCP connections", self.connections_accepted)
+        counter("blackjeck_connections_rejected_total", "Connections closed without a valid request",
+                self.connections_rejected)
+        counter("blackjeck_connections_probed_total", "Connections the client closed before sending a request",
+                self.connections_probed)
+        counter("blackjeck_connections_shed_total", "Connections refused because the server was full or draining",
+                self.connections_shed)
+        if self.sessions is not None:
+            counter("blackjeck_sessions_active", "Sessions being played", self.sessions.active, "gauge")
+            counter("blackjeck_sessions_total", "Sessions started", self.sessions.total)
+            lines.append("# HELP blackjeck_timeouts_total Sessions cut by a deadline")
+            lines.append("# TYPE blackjeck_timeouts_total counter")
+            for kind, count in self.sessions.timeouts.items():
+                lines.append(f'blackjeck_timeouts_total{{kind="{kind}"}} {count}')
+        counter("blackjeck_rounds_total", "Rounds played", self.rounds)
+        lines.append("# HELP blackjeck_round_results_total Round results")
+        lines.append("# TYPE blackjeck_round_results_total counter")
+        for result, label in ((ROUND_RESULT.PLAYER_WINS, "win"), (ROUND_RESULT.TIE, "tie"),
+                              (ROUND_RESULT.DEALER_WINS, "loss")):
+            lines.append(f'blackjeck_round_results_total{{result="{label}"}} {self.results[result]}')
+        counter("blackjeck_bytes_sent_total", "Payload bytes sent to clients", self.bytes_sent)
+        counter("blackjeck_bytes_received_total", "Payload bytes received from clients", self.bytes_received)
+        counter("blackjeck_uptime_seconds", "Seconds since the metrics were created",
+                f"{time.monotonic() - self.started_at:.3f}", "gauge")
+        for histogram in (self.accept_to_request, self.decision_to_card, self.stand_to_result):
+            histogram.render(lines)
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """One line for the console."""
+        elapsed = time.monotonic() - self.started_at
+        wins, ties, losses = (self.results[result] for result in
+                              (ROUND_RESULT.PLAYER_WINS, ROUND_RESULT.TIE, ROUND_RESULT.DEALER_WINS))
+        return (f"Connections: {self.connections_accepted} accepted, {self.connections_rejected} rejected, "
+                f"{self.connections_probed} probes, {self.connections_shed} shed | "
+                f"Rounds: {self.rounds} ({self.rounds / elapsed:.1f}/sec) | "
+                f"Wins / Ties / Losses: {wins} / {ties} / {losses}")
+
+
+# Metrics of this process (every worker process has its own copy)
+metrics = ServerMetrics()
+
+
+def dump_metrics(sig=None, frame=None):
+    """SIGUSR1 handler: print the metrics to the console."""
+    print(metrics.summary())
+    print(metrics.render(), end="")
+
+
+def install_dump_signal():
+    if hasattr(signal, "SIGUSR1"): # not on Windows
+        signal.signal(signal.SIGUSR1, dump_metrics)
+
+
+def start_metrics_server(port: int) -> "ThreadingHTTPServer":
+    """Serve GET /metrics on localhost:'port' from a daemon thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass # scrapes would flood the game output
+
+    http_server = ThreadingHTTPServer((METRICS_HOST, port), MetricsHandler)
+    http_server.daemon_threads = True
+    threading.Thread(target=http_server.serve_forever, daemon=True).start()
+    log.info("Metrics on http://%s:%d/metrics", METRICS_HOST, http_server.server_address[1])
+    return http_server
@@ -1,15 +1,22 @@
 import struct
+from functools import lru_cache
+from typing import Callable, NamedTuple, Optional, Sequence, Tuple
 
 MAGIC_COOKIE = 0xabcddcba
 
 MSG_OFFER   = 0x2
 MSG_REQUEST = 0x3
 MSG_PAYLOAD = 0x4
+MSG_AUTO_REQUEST = 0x5 # REQUEST followed by an auto-play policy
+MSG_OFFER_EXT = 0x6 # OFFER with the server's load
+MSG_PROBE = 0x7 # client asks servers for an immediate offer
+MSG_SEEDED_REQUEST = 0x8 # REQUEST followed by the seed of the session's deck
 
 NAME_LEN = 32
 DECISION_LEN = 5
 
 # Helpers #
+@lru_cache(maxsize=1024) # names repeat for every offer / request of the same server / player
 def pad_name(name: str) -> bytes: # pad the name to the length of NAME_LEN
     return name.encode()[:NAME_LEN].ljust(NAME_LEN, b'\x00')
 
@@ -18,11 +25,11 @@ def read_name(raw: bytes) -> str: # read the name from the bytes
 
 # OFFER #
 OFFER_FMT = "!IBH32s" # ! = network byte order, I = unsigned int, B = unsigned char, H = unsigned short, 32s = bytes string
-OFFER_SIZE = struct.calcsize(OFFER_FMT) 
+OFFER_STRUCT = struct.Struct(OFFER_FMT) # compiled once, not parsed on every call
+OFFER_SIZE = OFFER_STRUCT.size
 
 def encode_offer(tcp_port: int, server_name: str) -> bytes:
-    return struct.pack(
-        OFFER_FMT,
+    return OFFER_STRUCT.pack(
         MAGIC_COOKIE,
         MSG_OFFER,
         tcp_port,
@@ -30,18 +37,81 @@ def encode_offer(tcp_port: int, server_name: str) -> bytes:
     )
 
 def decode_offer(data: bytes):
-    cookie, msg_type, port, name = struct.unpack(OFFER_FMT, data)
+    cookie, msg_type, port, name = OFFER_STRUCT.unpack(data)
     if cookie != MAGIC_COOKIE or msg_type != MSG_OFFER:
         raise ValueError("Invalid OFFER packet")
     return port, read_name(name)
 
+# LOAD OFFER (offer extension) #
+# Sent next to the plain 38-byte OFFER, with its own message type so that clients
+# that only know the OFFER ignore it. Carries the server's load so clients can pick
+# the server with the most spare capacity, and an instance id that stays the same
+# for the lifetime of the server process (same server seen on several addresses).
+OFFER_VERSION = 1
+OFFER_EXT_FMT = "!IBH32sBHHQ" # OFFER fields, version, active sessions, capacity, instance id
+OFFER_EXT_STRUCT = struct.Struct(OFFER_EXT_FMT)
+OFFER_EXT_SIZE = OFFER_EXT_STRUCT.size
+MAX_LOAD_FIELD = 0xffff
+
+class OfferInfo(NamedTuple):
+    port: int
+    name: str
+    version: int = 0 # 0 = plain OFFER, no load information
+    active: int = 0
+    capacity: int = 0
+    instance_id: int = 0
+
+    @property
+    def spare(self) -> Optional[int]:
+        """Free session slots, None when the server did not say."""
+        return max(self.capacity - self.active, 0) if self.version else None
+
+def encode_offer_ext(tcp_port: int, server_name: str, active: int, capacity: int, instance_id: int) -> bytes:
+    return OFFER_EXT_STRUCT.pack(
+        MAGIC_COOKIE,
+        MSG_OFFER_EXT,
+        tcp_port,
+        pad_name(server_name),
+        OFFER_VERSION,
+        min(active, MAX_LOAD_FIELD),
+        min(capacity, MAX_LOAD_FIELD),
+        instance_id
+    )
+
+def decode_offer_info(data: bytes) -> OfferInfo:
+    # OFFER or LOAD OFFER
+    if len(data) == OFFER_SIZE:
+        return OfferInfo(*decode_offer(data))
+    cookie, msg_type, port, name, version, active, capacity, instance_id = OFFER_EXT_STRUCT.unpack_from(data)
+    if cookie != MAGIC_COOKIE or msg_type != MSG_OFFER_EXT or version < 1:
+        raise ValueError("Invalid LOAD OFFER packet")
+    # later versions only append fields
+    return OfferInfo(port, read_name(name), version, active, capacity, instance_id)
+
+# PROBE #
+# Sent by a client to the probe port (UDPBroadcast.PROBE_PORT); servers answer at once
+# with unicast offers instead of the client waiting for the next periodic broadcast.
+PROBE_FMT = "!IBB" # cookie, type, highest offer version the client understands
+PROBE_STRUCT = struct.Struct(PROBE_FMT)
+PROBE_SIZE = PROBE_STRUCT.size
+
+def encode_probe() -> bytes:
+    return PROBE_STRUCT.pack(MAGIC_COOKIE, MSG_PROBE, OFFER_VERSION)
+
+def decode_probe(data: bytes) -> int:
+    # returns the client's offer version
+    cookie, msg_type, version = PROBE_STRUCT.unpack_from(data)
+    if cookie != MAGIC_COOKIE or msg_type != MSG_PROBE:
+        raise ValueError("Invalid PROBE packet")
+    return version
+
 # REQUEST #
 REQUEST_FMT = "!IBB32s"
-REQUEST_SIZE = struct.calcsize(REQUEST_FMT)
+REQUEST_STRUCT = struct.Struct(REQUEST_FMT)
+REQUEST_SIZE = REQUEST_STRUCT.size
 
 def encode_request(num_rounds: int, client_name: str) -> bytes:
-    return struct.pack(
-        REQUEST_FMT,
+    return REQUEST_STRUCT.pack(
         MAGIC_COOKIE,
         MSG_REQUEST,
         num_rounds,
@@ -49,45 +119,143 @@ def encode_request(num_rounds: int, client_name: str) -> bytes:
     )
 
 def decode_request(data: bytes):
-    cookie, msg_type, rounds, name = struct.unpack(REQUEST_FMT, data)
+    cookie, msg_type, rounds, name = REQUEST_STRUCT.unpack(data)
     if cookie != MAGIC_COOKIE or msg_type != MSG_REQUEST:
         raise ValueError("Invalid REQUEST packet")
     return rounds, read_name(name)
 
+def decode_request_header(data: bytes):
+    # REQUEST, AUTO REQUEST or SEEDED REQUEST - returns (msg_type, rounds, name)
+    cookie, msg_type, rounds, name = REQUEST_STRUCT.unpack(data)
+    if cookie != MAGIC_COOKIE or msg_type not in (MSG_REQUEST, MSG_AUTO_REQUEST, MSG_SEEDED_REQUEST):
+        raise ValueError("Invalid REQUEST packet")
+    return msg_type, rounds, read_name(name)
+
+# AUTO REQUEST #
+# A REQUEST with type MSG_AUTO_REQUEST, followed by the decision policy: for every dealer
+# up-card value 2-11, a bitmask of the player totals to hit on (bit t = hit on total t).
+# The server plays the rounds on its own and sends the same payloads as in the
+# interactive flow, without waiting for client decisions. A server that does not know
+# the extension rejects the request, so an interactive REQUEST is never affected.
+DEALER_UP_VALUES = range(2, 12)
+AUTO_POLICY_FMT = f"!{len(DEALER_UP_VALUES)}I"
+AUTO_POLICY_STRUCT = struct.Struct(AUTO_POLICY_FMT)
+AUTO_POLICY_SIZE = AUTO_POLICY_STRUCT.size
+MAX_POLICY_TOTAL = 31
+
+def build_hit_masks(decide: Callable[[int, int], str]) -> Tuple[int, ...]:
+    # decide(player_sum, dealer_sum) -> "HITTT" / "STAND", like the client policies
+    return tuple(
+        sum(1 << total for total in range(MAX_POLICY_TOTAL + 1) if decide(total, dealer_up) == "HITTT")
+        for dealer_up in DEALER_UP_VALUES
+    )
+
+def auto_decision(hit_masks: Sequence[int], player_sum: int, dealer_up: int) -> str:
+    if player_sum <= MAX_POLICY_TOTAL and hit_masks[dealer_up - DEALER_UP_VALUES.start] >> player_sum & 1:
+        return "HITTT"
+    return "STAND"
+
+def encode_auto_request(num_rounds: int, client_name: str, hit_masks: Sequence[int]) -> bytes:
+    return REQUEST_STRUCT.pack(
+        MAGIC_COOKIE,
+        MSG_AUTO_REQUEST,
+        num_rounds,
+        pad_name(client_name)
+    ) + AUTO_POLICY_STRUCT.pack(*hit_masks)
+
+def decode_auto_policy(data: bytes) -> Tuple[int, ...]:
+    return AUTO_POLICY_STRUCT.unpack(data)
+
+# SEEDED REQUEST #
+# A REQUEST with type MSG_SEEDED_REQUEST, followed by a SEED frame: the seed of the
+# session's deck shuffles and a flags byte. With SEED_AUTO set, an auto-play policy
+# (as in the AUTO REQUEST) follows the SEED frame. The same seed, decisions and
+# server configuration (--decks, --penetration) always deal the same cards, so a
+# captured session can be replayed and its payloads compared byte for byte.
+SEED_FMT = "!QB" # seed, flags
+SEED_STRUCT = struct.Struct(SEED_FMT)
+SEED_SIZE = SEED_STRUCT.size
+SEED_AUTO = 0x1 # an auto-play policy follows
+MAX_SEED = (1 << 64) - 1
+SEED_STEP = 0x9E3779B97F4A7C15 # odd 64-bit step - consecutive indexes get well spread seeds
+
+def derive_seed(base: int, index: int) -> int:
+    # seed number 'index' of the sequence starting at 'base'
+    return (base + index * SEED_STEP) & MAX_SEED
+
+def encode_seeded_request(num_rounds: int, client_name: str, seed: int, hit_masks: Sequence[int] = None) -> bytes:
+    request = REQUEST_STRUCT.pack(
+        MAGIC_COOKIE,
+        MSG_SEEDED_REQUEST,
+        num_rounds,
+        pad_name(client_name)
+    ) + SEED_STRUCT.pack(seed, SEED_AUTO if hit_masks is not None else 0)
+    if hit_masks is not None:
+        request += AUTO_POLICY_STRUCT.pack(*hit_masks)
+    return request
+
+def decode_seed(data: bytes) -> Tuple[int, bool]:
+    # returns (seed, whether an auto-play policy follows)
+    seed, flags = SEED_STRUCT.unpack(data)
+    return seed, bool(flags & SEED_AUTO)
+
 # PAYLOAD – Client → Server #
 CLIENT_PAYLOAD_FMT = "!IB5s"
-CLIENT_PAYLOAD_SIZE = struct.calcsize(CLIENT_PAYLOAD_FMT)
+CLIENT_PAYLOAD_STRUCT = struct.Struct(CLIENT_PAYLOAD_FMT)
+CLIENT_PAYLOAD_SIZE = CLIENT_PAYLOAD_STRUCT.size
 
 def encode_client_payload(decision: str) -> bytes:
-    return struct.pack(
-        CLIENT_PAYLOAD_FMT,
+    return CLIENT_PAYLOAD_STRUCT.pack(
         MAGIC_COOKIE,
         MSG_PAYLOAD,
         decision.encode()
     )
 
+def encode_client_payload_into(buffer, offset: int, decision: str) -> None:
+    CLIENT_PAYLOAD_STRUCT.pack_into(buffer, offset, MAGIC_COOKIE, MSG_PAYLOAD, decision.encode())
+
 def decode_client_payload(data: bytes) -> str:
-    cookie, msg_type, decision = struct.unpack(CLIENT_PAYLOAD_FMT, data)
+    cookie, msg_type, decision = CLIENT_PAYLOAD_STRUCT.unpack(data)
+    if cookie != MAGIC_COOKIE or msg_type != MSG_PAYLOAD:
+        raise ValueError("Invalid CLIENT PAYLOAD")
+    return decision.decode().strip('\x00').upper()
+
+def decode_client_payload_from(buffer, offset: int = 0) -> str:
+    cookie, msg_type, decision = CLIENT_PAYLOAD_STRUCT.unpack_from(buffer, offset)
     if cookie != MAGIC_COOKIE or msg_type != MSG_PAYLOAD:
         raise ValueError("Invalid CLIENT PAYLOAD")
     return decision.decode().strip('\x00').upper()
 
 # PAYLOAD – Server → Client #
 SERVER_PAYLOAD_FMT = "!IBBHB" # ! = network byte order, I = unsigned int, B = unsigned char, H = unsigned short, B = unsigned char
-SERVER_PAYLOAD_SIZE = struct.calcsize(SERVER_PAYLOAD_FMT)
+SERVER_PAYLOAD_STRUCT = struct.Struct(SERVER_PAYLOAD_FMT)
+SERVER_PAYLOAD_SIZE = SERVER_PAYLOAD_STRUCT.size
+
+# All valid server payloads: 4 round results x 13 ranks x 4 suits = 208 byte strings
+SERVER_PAYLOADS = {
+    (result, rank, suit): SERVER_PAYLOAD_STRUCT.pack(MAGIC_COOKIE, MSG_PAYLOAD, result, rank, suit)
+    for result in range(1, 5) # BlackjackGame.ROUND_RESULT values
+    for rank in range(1, 14)
+    for suit in range(4)
+}
 
 def encode_server_payload(result: int, rank: int, suit: int) -> bytes:
-    return struct.pack(
-        SERVER_PAYLOAD_FMT,
-        MAGIC_COOKIE,
-        MSG_PAYLOAD,
-        result,
-        rank,
-        suit
-    )
+    payload = SERVER_PAYLOADS.get((result, rank, suit))
+    if payload is None: # not a real card / result - pack it as is
+        payload = SERVER_PAYLOAD_STRUCT.pack(MAGIC_COOKIE, MSG_PAYLOAD, result, rank, suit)
+    return payload
+
+def encode_server_payload_into(buffer, offset: int, result: int, rank: int, suit: int) -> None:
+    SERVER_PAYLOAD_STRUCT.pack_into(buffer, offset, MAGIC_COOKIE, MSG_PAYLOAD, result, rank, suit)
 
 def decode_server_payload(data: bytes):
-    cookie, msg_type, result, rank, suit = struct.unpack(SERVER_PAYLOAD_FMT, data)
+    cookie, msg_type, result, rank, suit = SERVER_PAYLOAD_STRUCT.unpack(data)
+    if cookie != MAGIC_COOKIE or msg_type != MSG_PAYLOAD:
+        raise ValueError("Invalid SERVER PAYLOAD")
+    return result, rank, suit
+
+def decode_server_payload_from(buffer, offset: int = 0):
+    cookie, msg_type, result, rank, suit = SERVER_PAYLOAD_STRUCT.unpack_from(buffer, offset)
     if cookie != MAGIC_COOKIE or msg_type != MSG_PAYLOAD:
         raise ValueError("Invalid SERVER PAYLOAD")
     return result, rank, suit
\ No newline at end of file
@@ -0,0 +1,129 @@
+import atexit
+import os
+import queue
+import struct
+import threading
+import time
+
+from black_jeck.BlackJeckLogic import BlackjackGame
+from black_jeck.BlackJeckLog import log, session_id
+
+# Round log segment: a 16-byte header, then fixed-width 64-byte records
+#   header: magic, format version, record size
+#   record: time (unix seconds), player name hash, session id, player card codes,
+#           dealer card codes (zero padded - card codes are never 0), round number,
+#           ROUND_RESULT value, flags
+MAX_CARDS = 12 # per hand - more than any hand can hold before 21 (Ace always 11)
+HEADER = struct.Struct("<4sHH8x")
+RECORD = struct.Struct(f"<dQ16s{MAX_CARDS}s{MAX_CARDS}sHBB4x")
+MAGIC = b"BJRL"
+VERSION = 1
+SEGMENT_SUFFIX = ".bjr"
+
+FLAG_AUTO = 0x1 # round played by the server from an AUTO REQUEST policy
+
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024 # a new segment file is started after this size
+NAME_HASH_CACHE_SIZE = 4096
+
+
+def name_hash(player_name: str) -> int:
+    """Stable 64-bit hash of a player name (the same in every process and run)."""
+    import hashlib # only once a round is logged - keeps server start-up light
+    return int.from_bytes(hashlib.blake2b(player_name.encode(), digest_size=8).digest(), "little")
+
+
+def segment_header() -> bytes:
+    return HEADER.pack(MAGIC, VERSION, RECORD.size)
+
+
+class RoundLog:
+    """
+    Append-only binary log of every finished round.
+
+    record() packs one fixed-width record and puts it on a queue - the session
+    never touches the file. A background thread writes whatever is queued in one
+    write and starts a new segment file every 'segment_bytes'. Segments are named
+    by start time and pid, so worker processes log side by side in one directory.
+    """
+
+    def __init__(self):
+        self.directory = None
+        self.segment_bytes = DEFAULT_SEGMENT_BYTES
+        self._queue = None # None = not logging, record() returns at once
+        self._thread = None
+        self._name_hashes = {}
+
+    def open(self, directory: str, segment_bytes: int = DEFAULT_SEGMENT_BYTES):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._write_segments, args=(self._queue,), daemon=True)
+        self._thread.start()
+        log.info("Logging rounds to %s", directory)
+
+    def record(self, game: BlackjackGame, player_name: str, round_num: int, flags: int = 0):
+        if self._queue is None:
+            return
+        player = self._name_hashes.get(player_name)
+        if player is None:
+            if len(self._name_hashes) >= NAME_HASH_CACHE_SIZE: # names come from clients - keep it bounded
+                self._name_hashes.clear()
+            player = self._name_hashes[player_name] = name_hash(player_name)
+        self._queue.put(RECORD.pack(time.time(), player, session_id.get().encode(),
+                                    game.player_hand.codes, game.dealer_hand.codes,
+                                    round_num, game.result, flags))
+
+    def close(self):
+        """Write out the queued records and stop the writer thread."""
+        if self._queue is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._queue = None
+        self._thread = None
+
+    def _new_segment(self, number: int):
+        name = time.strftime("rounds-%Y%m%d-%H%M%S") + f"-{os.getpid()}-{number}{SEGMENT_SUFFIX}"
+        segment = open(os.path.join(self.directory, name), "wb")
+        segment.write(segment_header())
+        return segment
+
+    def _write_segments(self, records: queue.SimpleQueue):
+        segment = None
+        number = 0
+        size = 0
+        stop = False
+        while not stop:
+            batch = []
+            record = records.get()
+            while record is not None:
+                batch.append(record)
+                try:
+                    record = records.get_nowait() # take everything queued meanwhile
+                except queue.Empty:
+                    break
+            stop = record is None
+            if not batch:
+                continue
+            data = b"".join(batch)
+            try:
+                if segment is None or size + len(data) > self.segment_bytes:
+                    if segment:
+                        segment.close()
+                        segment = None
+                    number += 1
+                    segment = self._new_segment(number)
+                    size = HEADER.size
+                segment.write(data)
+                segment.flush()
+                size += len(data)
+            except OSError as e:
+                log.error("Round log write failed, %d records lost: %s", len(batch), e)
+        if segment:
+            segment.close()
+
+
+# Round log of this process (every worker process opens its own)
+round_log = RoundLog()
+atexit.register(round_log.close)
@@ -1,34 +1,96 @@
+import argparse
+import itertools
+import random
 import socket
 import signal
-import sys
 import os
+import struct
 import threading
-
-# Add parent directory to path for package imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from black_jeck.BlackJeckLogic import BlackjackGame
+import time
+
+from black_jeck.BlackJeckLogic import BlackjackGame, Deck, Shoe, FULL_DECK, MAX_HAND_CARDS
+from black_jeck.BlackJeckDeadlines import SessionDeadlines, SessionTimeout, TIMEOUT_POLICIES, TIMEOUT_DROP,\
+     TIMEOUT_STAND, TIMEOUT_KINDS, DEFAULT_REQUEST_TIMEOUT_SEC, DEFAULT_DECISION_TIMEOUT_SEC, DEFAULT_SESSION_TIMEOUT_SEC
+from black_jeck.BlackJeckLog import log, session_id, new_session_id, setup_logging, LOG_LEVELS, DEFAULT_LOG_LEVEL
+from black_jeck.BlackJeckMetrics import metrics, install_dump_signal, start_metrics_server
+from black_jeck.BlackJeckRoundLog import round_log, FLAG_AUTO, DEFAULT_SEGMENT_BYTES
+from black_jeck.BlackJeckCapture import SessionCapture, capture_writer, DECISION_CODES
 from black_jeck.UDPBroadcastOffer import UDPBroadcastOffer
-from network.TCPConnection import recv_exact
-from black_jeck.BlackJeckPacketProtocol import decode_request, encode_server_payload, decode_client_payload,\
-     REQUEST_SIZE, CLIENT_PAYLOAD_SIZE
+from network.TCPConnection import FramedReader, BufferedWriter
+from black_jeck.BlackJeckPacketProtocol import decode_request_header, decode_auto_policy, decode_seed, derive_seed,\
+     auto_decision, encode_server_payload, decode_client_payload, MSG_AUTO_REQUEST, MSG_SEEDED_REQUEST, REQUEST_SIZE,\
+     AUTO_POLICY_SIZE, SEED_SIZE, CLIENT_PAYLOAD_SIZE, MAX_SEED
 
 SERVER_NAME = "Team_LOVE"
 DEFAULT_IP = "127.0.0.1"
+DEFAULT_MAX_SESSIONS = 1000
+DEFAULT_BACKLOG = 128 # connections the kernel queues before they are accepted
+SESSION_END_GRACE_SEC = 0.05 # blocking engine: how long a connection waits for a session that is just ending
+LINGER_RESET = struct.pack("ii", 1, 0) # SO_LINGER on, 0 s: close() sends a RST and leaves no TIME_WAIT
+DEFAULT_DRAIN_TIMEOUT_SEC = 30.0
+DEFAULT_TURN_TIMEOUT_SEC = 30.0
+# a table's shoe must hold a whole round (every seat and the dealer) - the largest shoe sets the limit
+MAX_TABLE_SEATS = Shoe.MAX_DECKS * len(FULL_DECK) // MAX_HAND_CARDS - 1
 
 # global variables for graceful shutdown
 tcp_sock = None
 stop_event = None
+server_counter = None
+drain_timeout = DEFAULT_DRAIN_TIMEOUT_SEC
+draining = threading.Event() # no new sessions, running ones end after their current round
 
+# sessions of this process that took their seed from --seed, in request order
+_seeded_sessions = itertools.count()
 
-def signal_handler(sig, frame):
-    """Handle graceful shutdown on Ctrl+C or kill command."""
-    print("\nShutting down server...")
+
+class SessionCounter:
+    """Active and total session counts and timeout counts of this process (read by the worker heartbeat)."""
+
+    def __init__(self):
+        self.active = 0
+        self.total = 0
+        self.timeouts = dict.fromkeys(TIMEOUT_KINDS, 0) # request / decision / session timeouts
+        self._lock = threading.Lock()
+
+    def session_started(self):
+        with self._lock:
+            self.active += 1
+            self.total += 1
+
+    def session_ended(self):
+        with self._lock:
+            self.active -= 1
+
+    def record_timeout(self, kind: str):
+        with self._lock:
+            self.timeouts[kind] += 1
+        log.warning("Session %s timeout (timeouts so far: %s)", kind, format_timeouts(self.timeouts))
+
+
+def format_timeouts(timeouts: dict) -> str:
+    return ", ".join(f"{kind} {count}" for kind, count in timeouts.items())
+
+
+def start_drain(active: int, drain_timeout: float) -> bool:
+    """
+    Enter drain mode: stop the offers and let the active sessions finish their round.
+
+    Returns False if the server was already draining (a second signal - stop now).
+    """
+    if draining.is_set():
+        return False
+    draining.set()
     if stop_event:
-        stop_event.set()
-    if tcp_sock:
-        tcp_sock.close()
-    sys.exit(0)
+        stop_event.set() # no more offers - clients pick another server
+    log.info("Shutting down server: draining %d active sessions (at most %.0f s, again to stop now)...",
+             active, drain_timeout)
+    return True
+
+
+def signal_handler(sig, frame):
+    """Graceful shutdown on Ctrl+C or SIGTERM (supervising process of --workers, before serving)."""
+    if not start_drain(server_counter.active if server_counter else 0, drain_timeout):
+        raise KeyboardInterrupt
 
 
 def get_local_ip() -> str:
@@ -42,119 +104,444 @@ def get_local_ip() -> str:
     except Exception:
         return DEFAULT_IP
 
-def main():
-    global tcp_sock, stop_event
-    
-    server_ip = get_local_ip()
-    print(f"Server started, listening on IP address {server_ip}") # print server IP
-
-    # Create TCP socket and bind to any available port
+def log_local_ip(tcp_port: int):
+    # runs in a daemon thread: resolving the outbound address must not delay the first accept
+    log.info("Server started, listening on IP address %s port %d", get_local_ip(), tcp_port) # log server IP
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="BlackJeck server")
+    parser.add_argument("--engine", choices=("asyncio", "blocking"), default="blocking",
+                        help="asyncio serves many clients concurrently, blocking serves one client at a time")
+    parser.add_argument("--max-sessions", type=int, default=DEFAULT_MAX_SESSIONS,
+                        help="maximum number of concurrent sessions per process (asyncio engine, the blocking "
+                             "engine plays one); connections over it are closed at once")
+    parser.add_argument("--backlog", type=int, default=DEFAULT_BACKLOG,
+                        help="connections the kernel queues until they are accepted")
+    parser.add_argument("--drain-timeout", type=float, default=DEFAULT_DRAIN_TIMEOUT_SEC,
+                        help="on SIGTERM or Ctrl+C: seconds active sessions get to finish their round")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes sharing the TCP port with SO_REUSEPORT")
+    parser.add_argument("--table-seats", type=int, default=0,
+                        help=f"seat up to this many players (at most {MAX_TABLE_SEATS}) at a table with one "
+                             "shared dealer (asyncio engine)")
+    parser.add_argument("--turn-timeout", type=float, default=DEFAULT_TURN_TIMEOUT_SEC,
+                        help="table mode: seconds a player has for each decision, on top of --decision-timeout "
+                             "(0 = no limit)")
+    parser.add_argument("--request-timeout", type=float, default=DEFAULT_REQUEST_TIMEOUT_SEC,
+                        help="seconds a new connection has to send its request (0 = no limit)")
+    parser.add_argument("--decision-timeout", type=float, default=DEFAULT_DECISION_TIMEOUT_SEC,
+                        help="seconds a player has for each Hit/Stand decision (0 = no limit)")
+    parser.add_argument("--session-timeout", type=float, default=DEFAULT_SESSION_TIMEOUT_SEC,
+                        help="total seconds a session may last (0 = no limit)")
+    parser.add_argument("--timeout-policy", choices=TIMEOUT_POLICIES, default=TIMEOUT_DROP,
+                        help="on a missed decision deadline: drop the connection, or stand and "
+                             "close the session after the round")
+    parser.add_argument("--decks", type=int, default=0,
+                        help=f"deal from a shoe of {Shoe.MIN_DECKS}-{Shoe.MAX_DECKS} decks kept for the whole session "
+                             "(default: a freshly shuffled single deck every round)")
+    parser.add_argument("--penetration", type=float, default=0.75,
+                        help="part of the shoe dealt before the cut card triggers a reshuffle")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics "
+                             "(worker N uses PORT+N; default: off)")
+    parser.add_argument("--log-level", choices=LOG_LEVELS, default=DEFAULT_LOG_LEVEL,
+                        help="DEBUG adds a line per round and result (off the game loop, but still costly)")
+    parser.add_argument("--log-json", action="store_true", help="write the log as JSON lines")
+    parser.add_argument("--round-log", metavar="DIR",
+                        help="append every finished round to binary segment files in DIR (default: off)")
+    parser.add_argument("--round-log-segment-mb", type=int, default=DEFAULT_SEGMENT_BYTES // (1024 * 1024),
+                        help="start a new round log segment after this many MiB")
+    parser.add_argument("--seed", type=int,
+                        help="derive every session's deck seed from this one (in request order, per worker) "
+                             "unless the client sends its own (default: random seeds)")
+    parser.add_argument("--capture", metavar="FILE",
+                        help="append every private session (request, seed, decisions, server bytes) to FILE as "
+                             "JSON lines for replay.py (worker N appends to FILE.N)")
+    parser.add_argument("--broadcast-all", action="store_true",
+                        help="send offers on every IPv4 interface instead of the default route only")
+    args = parser.parse_args(argv)
+    if args.table_seats and args.engine != "asyncio":
+        parser.error("--table-seats needs --engine asyncio")
+    if not 0 <= args.table_seats <= MAX_TABLE_SEATS:
+        parser.error(f"--table-seats must be between 0 and {MAX_TABLE_SEATS}")
+    if args.decks and not Shoe.MIN_DECKS <= args.decks <= Shoe.MAX_DECKS:
+        parser.error(f"--decks must be between {Shoe.MIN_DECKS} and {Shoe.MAX_DECKS}")
+    if not 0 < args.penetration <= 1:
+        parser.error("--penetration must be in (0, 1]")
+    if args.seed is not None and not 0 <= args.seed <= MAX_SEED:
+        parser.error(f"--seed must be between 0 and {MAX_SEED}")
+    if args.max_sessions < 1 or args.backlog < 1:
+        parser.error("--max-sessions and --backlog must be at least 1")
+    if args.workers > 1 and not hasattr(socket, "SO_REUSEPORT"):
+        parser.error("--workers needs SO_REUSEPORT, which this platform does not support")
+    return args
+
+def session_capacity(args: argparse.Namespace) -> int:
+    # sessions this server plays at the same time (advertised in the LOAD OFFER)
+    per_process = args.max_sessions if args.engine == "asyncio" else 1
+    return per_process * args.workers
+
+def session_seed(args: argparse.Namespace, requested: int = None) -> int:
+    # the client's seed (SEEDED REQUEST), else the next one derived from --seed, else a random one
+    if requested is not None:
+        return requested
+    if args.seed is not None:
+        return derive_seed(args.seed, next(_seeded_sessions))
+    return int.from_bytes(os.urandom(8), "big")
+
+def new_deck(args: argparse.Namespace, rng: random.Random = None) -> Deck:
+    # deck of one session
+    return Shoe(args.decks, args.penetration, rng) if args.decks else Deck(rng)
+
+def new_capture(args: argparse.Namespace, name: str, rounds: int, seed: int, hit_masks=None):
+    # None unless --capture is on
+    if not capture_writer.enabled:
+        return None
+    return SessionCapture(name, rounds, seed, hit_masks, args.decks, args.penetration)
+
+def create_tcp_socket(port: int = 0, reuse_port: bool = False, listen: bool = True,
+                      backlog: int = DEFAULT_BACKLOG) -> socket.socket:
     tcp_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM) # create TCP socket
     tcp_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1) # allow reuse of address
-    tcp_sock.bind(("", 0)) # bind to any available port
-    tcp_sock.listen(5) # listen for connections (5 connections at a time)
+    if reuse_port:
+        tcp_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1) # share the port between workers
+    tcp_sock.bind(("", port)) # bind to the given port (0 = any available port)
+    if listen:
+        tcp_sock.listen(backlog) # up to 'backlog' connections wait to be accepted
+    return tcp_sock
+
+def main(argv=None):
+    global tcp_sock, stop_event, server_counter, drain_timeout
+
+    args = parse_args(argv)
+    drain_timeout = args.drain_timeout
+    setup_logging(args.log_level, args.log_json)
+
+    # Create TCP socket and bind to any available port
+    # (with workers the parent only reserves the port, the workers listen on it)
+    multi_worker = args.workers > 1
+    tcp_sock = create_tcp_socket(reuse_port=multi_worker, listen=not multi_worker, backlog=args.backlog)
     tcp_port = tcp_sock.getsockname()[1] # get the port number
-    
+    threading.Thread(target=log_local_ip, args=(tcp_port,), daemon=True).start()
+
     # Create stop event and start broadcast thread
     stop_event = threading.Event() # create stop event
+    counter = server_counter = SessionCounter() # with workers: the sum of the workers' heartbeats
+    capacity = session_capacity(args)
     broadcaster = UDPBroadcastOffer()
     broadcast_thread = threading.Thread( # create broadcast thread
         target=broadcaster.broadcast,
-        args=(tcp_port, SERVER_NAME, stop_event),
+        args=(tcp_port, SERVER_NAME, stop_event, args.broadcast_all, lambda: (counter.active, capacity)),
         daemon=True # daemon thread (dies when main thread dies)
     )
     broadcast_thread.start() # start broadcast thread
     
     signal.signal(signal.SIGINT, signal_handler) # register signal handler for graceful shutdown
+    signal.signal(signal.SIGTERM, signal_handler) # the engines replace both with their own drain
+    if not multi_worker: # workers export their own metrics
+        install_dump_signal() # kill -USR1 <pid> prints the metrics
+        if args.metrics_port:
+            start_metrics_server(args.metrics_port)
+        if args.round_log:
+            round_log.open(args.round_log, args.round_log_segment_mb * 1024 * 1024)
+        if args.capture:
+            capture_writer.open(args.capture)
 
     # wait for connections
     try:
-        while True:
+        if multi_worker:
+            from black_jeck.BlackJeckWorkers import run_workers
+            run_workers(tcp_port, args, counter) # workers accept, this process only supervises
+        else:
+            serve(tcp_sock, args, counter)
+    except KeyboardInterrupt: # second Ctrl+C / SIGTERM - sessions were cut
+        pass
+    finally:
+        stop_event.set()
+        log.info("Server stopped")
+
+def serve(tcp_sock: socket.socket, args: argparse.Namespace, counter: SessionCounter = None):
+    counter = counter or SessionCounter()
+    metrics.sessions = counter
+    if args.engine == "asyncio":
+        from black_jeck.BlackJeckAsyncServer import serve as serve_asyncio
+        serve_asyncio(tcp_sock, args, counter) # one coroutine per client
+    else:
+        serve_blocking(tcp_sock, args, counter) # one client at a time
+
+def cut_sessions(in_play: list):
+    # the drain deadline passed: shut the session sockets down - their pending recv / send fails
+    # with a ConnectionError in the session's own thread, never in the middle of other code
+    for conn in list(in_play):
+        log.warning("Shutting down: drain deadline passed, closing the session in play")
+        try:
+            conn.shutdown(socket.SHUT_RDWR)
+        except OSError: # the session ended meanwhile
+            pass
+
+def install_drain_signals(tcp_sock: socket.socket, args: argparse.Namespace, counter: SessionCounter,
+                          in_play: list):
+    """SIGTERM / Ctrl+C of the blocking engine: stop accepting, end the session after its round."""
+
+    def on_signal(sig, frame):
+        if not start_drain(counter.active, args.drain_timeout):
+            raise KeyboardInterrupt # second signal - stop now
+        tcp_sock.close() # the pending accept fails, the session in play goes on
+        deadline = threading.Timer(args.drain_timeout, cut_sessions, args=(in_play,))
+        deadline.daemon = True
+        deadline.start()
+
+    signal.signal(signal.SIGTERM, on_signal)
+    if signal.getsignal(signal.SIGINT) is not signal.SIG_IGN: # workers leave Ctrl+C to the parent
+        signal.signal(signal.SIGINT, on_signal)
+
+def serve_blocking(tcp_sock: socket.socket, args: argparse.Namespace, counter: SessionCounter = None):
+    counter = counter or SessionCounter()
+    in_play = [] # socket of the session being served - shut down if the drain deadline passes
+    if threading.current_thread() is threading.main_thread(): # signals only reach the main thread
+        install_drain_signals(tcp_sock, args, counter, in_play)
+    accept_sessions(tcp_sock, args, counter, in_play)
+
+def shed_connection(conn: socket.socket):
+    """Refuse a connection at once - a session is in play or the server is draining - instead of queueing it."""
+    metrics.connections_shed += 1
+    conn.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, LINGER_RESET)
+    conn.close()
+
+def accept_sessions(tcp_sock: socket.socket, args: argparse.Namespace, counter: SessionCounter, in_play: list):
+    # the session plays in its own thread, so this one keeps accepting and sheds whoever arrives meanwhile
+    session = None
+    waited = False # already gave the session in play its grace to end
+    while not draining.is_set():
+        try:
             conn, addr = tcp_sock.accept() # accept connection from client
-            print(f"New client connected from {addr}") # print client address (IP and port)
-
-            try:
-                rounds, name = decode_request(recv_exact(conn, REQUEST_SIZE)) # decode request from client
-                if rounds < 1:
-                    print("Invalid number of rounds")
-                    conn.close()
-                    continue
-
-                play_game(conn, rounds, name) # play game with client
-
-            except Exception as e: # handle exception
-                print(f"Error handling client {addr}: {e}")
-            finally: # close connection
-                conn.close()
-    except KeyboardInterrupt: # Ctrl+C or kill command
-        print("\nShutting down server...")
-        signal_handler(None, None) # call signal handler
-
-def play_game(conn: socket.socket, rounds: int, player_name: str):
-
-    print(f"Starting {rounds} rounds with player {player_name}")
+        except OSError:
+            if draining.is_set(): # listening socket closed by the drain
+                break
+            raise
+        metrics.connections_accepted += 1
+        if counter.active and not waited: # its client may have its last result and reconnect before the thread ends
+            session.join(SESSION_END_GRACE_SEC)
+            waited = True
+        if counter.active or draining.is_set(): # one client at a time
+            shed_connection(conn)
+            continue
+        waited = False
+        counter.session_started()
+        in_play.append(conn)
+        session = threading.Thread(target=run_session, args=(conn, addr, args, counter, in_play, time.perf_counter()),
+                                   daemon=True) # a second signal stops the server without waiting for it
+        session.start()
+    if session:
+        session.join() # the session in play ends after its round (or at the drain deadline)
+
+def run_session(conn: socket.socket, addr, args: argparse.Namespace, counter: SessionCounter, in_play: list,
+                accepted_at: float):
+    """Serve one accepted client until its session ends, then release the server for the next one."""
+    conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1) # no Nagle delay on small payloads
+    deadlines = SessionDeadlines(args, counter.record_timeout)
+    reader = None
+    capture = None
+    try:
+        reader = FramedReader(conn) # buffered reads for the whole session
+        conn.settimeout(deadlines.request_timeout) # idle connections must not hold the server
+        try:
+            msg_type, rounds, name = decode_request_header(reader.read_frame(REQUEST_SIZE)) # decode request from client
+            hit_masks = None
+            seed = None
+            if msg_type == MSG_SEEDED_REQUEST: # client chose the seed - a reproducible session
+                seed, auto = decode_seed(reader.read_frame(SEED_SIZE))
+                if auto:
+                    hit_masks = decode_auto_policy(reader.read_frame(AUTO_POLICY_SIZE))
+            elif msg_type == MSG_AUTO_REQUEST: # client sent its decision policy - play without waiting for decisions
+                hit_masks = decode_auto_policy(reader.read_frame(AUTO_POLICY_SIZE))
+        except socket.timeout:
+            metrics.connections_rejected += 1
+            deadlines.timed_out("request")
+            raise SessionTimeout("request")
+        except ValueError:
+            metrics.connections_rejected += 1
+            raise
+        except ConnectionError: # closed without a request - usually a client measuring the connect RTT
+            metrics.connections_probed += 1
+            log.debug("Client %s closed the connection before sending a request", addr)
+            return
+        new_session_id() # stamped on every log record of this session
+        log.info("New client connected from %s", addr) # log client address (IP and port)
+        metrics.accept_to_request.observe(time.perf_counter() - accepted_at)
+        if rounds < 1:
+            metrics.connections_rejected += 1
+            log.warning("Invalid number of rounds")
+            return
+
+        seed = session_seed(args, seed)
+        log.debug("Session seed %d", seed)
+        capture = new_capture(args, name, rounds, seed, hit_masks)
+        conn.settimeout(deadlines.decision_timeout) # sends to a client that stopped reading time out too
+        play_game(conn, rounds, name, reader, new_deck(args, random.Random(seed)), hit_masks, deadlines,
+                  capture) # play game with client
+
+    except SessionTimeout as e:
+        log.warning("Dropped client %s: %s", addr, e)
+    except ConnectionError as e:
+        if draining.is_set(): # cut by the drain deadline
+            log.warning("Dropped client %s: server is shutting down", addr)
+        else:
+            log.error("Error handling client %s: %s", addr, e)
+    except Exception as e: # handle exception
+        log.error("Error handling client %s: %s", addr, e)
+    finally: # close connection
+        in_play.remove(conn)
+        conn.close()
+        session_id.set("")
+        counter.session_ended()
+        if reader:
+            metrics.bytes_received += reader.bytes_received
+        if capture:
+            capture_writer.write(capture) # cut sessions too - the replay compares what they were sent
+
+def read_decision(conn: socket.socket, reader: FramedReader, deadlines: SessionDeadlines = None) -> str:
+    """Read the next Hit/Stand decision within the session deadlines."""
+    if deadlines is None:
+        return decode_client_payload(reader.read_frame(CLIENT_PAYLOAD_SIZE))
+
+    timeout, kind = deadlines.next_wait()
+    try:
+        if timeout is not None and timeout <= 0: # session budget already spent
+            raise socket.timeout()
+        conn.settimeout(timeout)
+        return decode_client_payload(reader.read_frame(CLIENT_PAYLOAD_SIZE))
+    except socket.timeout:
+        deadlines.timed_out(kind)
+        if deadlines.policy == TIMEOUT_STAND:
+            return "STAND" # finish the round, the session ends after it
+        raise SessionTimeout(kind)
+
+def play_game(conn: socket.socket, rounds: int, player_name: str, reader: FramedReader = None,
+              deck: Deck = None, hit_masks=None, deadlines: SessionDeadlines = None,
+              capture: SessionCapture = None):
+    """
+    Play 'rounds' rounds with a connected client.
+
+    With 'hit_masks' (auto-play policy from an AUTO REQUEST) the decisions are taken
+    from the policy instead of the client, and every round leaves in one send.
+    With 'deadlines' every decision and the whole session are time limited.
+    With 'capture' the client's decisions and every byte sent are recorded for a replay.
+    """
+    reader = reader or FramedReader(conn)
+    writer = BufferedWriter(conn) # one send per round phase
+    if capture is not None:
+        writer.copy_to = capture.sent
+    game = BlackjackGame(deck) # one game for the whole session, the deck persists across rounds
+    auto = hit_masks is not None
+    flags = FLAG_AUTO if auto else 0 # round log flags
+
+    log.info("Starting %d rounds with player %s%s", rounds, player_name, " (auto-play)" if auto else "")
 
-    for round_num in range(1, rounds + 1):
-        print(f"{'='*50}")
-        print(f"Round {round_num}/{rounds} - {player_name}")
+    try:
+        for round_num in range(1, rounds + 1):
+            if deadlines and deadlines.session_over():
+                log.info("Closing session of player %s after a timeout", player_name)
+                rounds = round_num - 1
+                break
+            if draining.is_set():
+                log.info("Closing session of player %s: server is shutting down", player_name)
+                rounds = round_num - 1
+                break
+
+            log.debug("Round %d/%d - %s", round_num, rounds, player_name)
         
-        game = BlackjackGame() # create new round game
-
-        first_card_player = game.player_hit()
-        conn.sendall(encode_server_payload(game.result, first_card_player.rank, first_card_player.suit))
-
-        second_card_player = game.player_hit()
-        conn.sendall(encode_server_payload(game.result, second_card_player.rank, second_card_player.suit))
-
-        if game.result == game.ROUND_RESULT.DEALER_WINS: # player busts
-            server_print_winner(game.result, player_name)
-            continue # Dealer wins, no need to continue the round
-
-        first_card_dealer = game.dealer_hit()
-        conn.sendall(encode_server_payload(game.result, first_card_dealer.rank, first_card_dealer.suit))
-
-        second_card_dealer = game.dealer_hit() # second card of dealer hidden
-
-        # Player turn
-        while True:
-            decision = decode_client_payload(recv_exact(conn, CLIENT_PAYLOAD_SIZE)) # decode decision from client
-
-            if decision == "HITTT":
-                card = game.player_hit()
-                conn.sendall(encode_server_payload(game.result, card.rank, card.suit)) # send card to client
-
-                if game.result == game.ROUND_RESULT.DEALER_WINS: # player busts
-                    server_print_winner(game.result, player_name)
-                    break
-
-            elif decision == "STAND":
-                # expose the second card of the dealer (still NOT_OVER)
-                conn.sendall(encode_server_payload(game.result, second_card_dealer.rank, second_card_dealer.suit))
-
-                # Dealer draws until reaching 17+
-                while game.dealer_hand.total_value < 17:
-                    card = game.dealer_hit()
-                    # Always send NOT_OVER for cards (result will be sent after loop)
-                    conn.sendall(encode_server_payload(game.ROUND_RESULT.NOT_OVER, card.rank, card.suit))
+            game.new_round() # clear the hands, reshuffle if needed
+
+            # Initial deal phase
+            first_card_player = game.player_hit()
+            writer.write(encode_server_payload(game.result, first_card_player.rank, first_card_player.suit))
+
+            second_card_player = game.player_hit()
+            writer.write(encode_server_payload(game.result, second_card_player.rank, second_card_player.suit))
+
+            if game.result == game.ROUND_RESULT.DEALER_WINS: # player busts
+                writer.flush()
+                server_print_winner(game, player_name, round_num, flags)
+                continue # Dealer wins, no need to continue the round
+
+            first_card_dealer = game.dealer_hit()
+            writer.write(encode_server_payload(game.result, first_card_dealer.rank, first_card_dealer.suit))
+            if not auto:
+                writer.flush()
+
+            second_card_dealer = game.dealer_hit() # second card of dealer hidden
+
+            # Player turn
+            while True:
+                if auto:
+                    decision = auto_decision(hit_masks, game.player_hand.total_value, first_card_dealer.get_value())
+                else:
+                    decision = read_decision(conn, reader, deadlines) # decode decision from client
+                    decided_at = time.perf_counter()
+                    if capture is not None and decision in DECISION_CODES:
+                        capture.decisions.append(DECISION_CODES[decision])
+
+                if decision == "HITTT":
+                    card = game.player_hit()
+                    # NOT_OVER unless the player busts (the hidden dealer card must not leak)
+                    hit_result = game.ROUND_RESULT.DEALER_WINS if game.player_hand.is_bust() else game.ROUND_RESULT.NOT_OVER
+                    writer.write(encode_server_payload(hit_result, card.rank, card.suit)) # send card to client
+
+                    if game.result == game.ROUND_RESULT.DEALER_WINS: # player busts
+                        writer.flush()
+                        if not auto:
+                            metrics.decision_to_card.observe(time.perf_counter() - decided_at)
+                        server_print_winner(game, player_name, round_num, flags)
+                        break
+                    if not auto:
+                        writer.flush()
+                        metrics.decision_to_card.observe(time.perf_counter() - decided_at)
+
+                elif decision == "STAND":
+                    # Dealer phase - all dealer cards and the result leave together
+                    # expose the second card of the dealer (still NOT_OVER, even if two Aces bust the dealer)
+                    writer.write(encode_server_payload(game.ROUND_RESULT.NOT_OVER, second_card_dealer.rank, second_card_dealer.suit))
+
+                    # Dealer draws until reaching 17+
+                    while game.dealer_hand.total_value < 17:
+                        card = game.dealer_hit()
+                        # Always send NOT_OVER for cards (result will be sent after loop)
+                        writer.write(encode_server_payload(game.ROUND_RESULT.NOT_OVER, card.rank, card.suit))
                 
-                # After loop: dealer has 17+ or busted, decide winner
-                game.decide_winner()
-                # Send final result packet (use last card in hand)
-                last_card = game.dealer_hand.cards[-1]
-                conn.sendall(encode_server_payload(game.result, last_card.rank, last_card.suit))
-
-                server_print_winner(game.result, player_name)
-
-                break # Dealer played, decide winner of round
-
-def server_print_winner(result: int, player_name: str):
+                    # After loop: dealer has 17+ or busted, decide winner
+                    game.decide_winner()
+                    # Send final result packet (use last card in hand)
+                    last_card = game.dealer_hand.cards[-1]
+                    writer.write(encode_server_payload(game.result, last_card.rank, last_card.suit))
+                    writer.flush()
+                    if not auto:
+                        metrics.stand_to_result.observe(time.perf_counter() - decided_at)
+
+                    server_print_winner(game, player_name, round_num, flags)
+
+                    break # Dealer played, decide winner of round
+    finally:
+        metrics.bytes_sent += writer.bytes_sent
+
+    syscalls = reader.recv_calls + writer.send_calls
+    log.info("Finished %d rounds with player %s (%.1f syscalls per round)", rounds, player_name, syscalls / max(rounds, 1))
+
+def server_print_winner(game: BlackjackGame, player_name: str, round_num: int, flags: int = 0):
+    # every finished round of every engine passes here
+    result = game.result
+    round_log.record(game, player_name, round_num, flags)
+    metrics.rounds += 1
+    metrics.results[result] += 1
     if result == BlackjackGame.ROUND_RESULT.DEALER_WINS:
-        print("Dealer wins round")
+        log.debug("Dealer wins round")
     elif result == BlackjackGame.ROUND_RESULT.PLAYER_WINS:
-        print(f"Player {player_name} wins round")
+        log.debug("Player %s wins round", player_name)
     else:
-        print("Tie")
+        log.debug("Tie")
 
 if __name__ == "__main__":
+    # run the package module's main - the engines import their shared state (draining, stop_event) from it
+    from black_jeck.BlackJeckServer import main
     main()
 
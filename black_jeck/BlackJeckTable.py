@@ -0,0 +1,271 @@
+import argparse
+import asyncio
+import itertools
+import logging
+import time
+from typing import List
+
+from black_jeck.BlackJeckLogic import BlackjackGame, Card, Deck, Shoe, FULL_DECK, MAX_HAND_CARDS
+from black_jeck.BlackJeckServer import server_print_winner, draining
+from black_jeck.BlackJeckRoundLog import FLAG_AUTO
+from black_jeck.BlackJeckLog import log, session_id
+from black_jeck.BlackJeckMetrics import metrics
+from black_jeck.BlackJeckDeadlines import SessionDeadlines, TIMEOUT_STAND
+from network.TCPConnection import recv_exact_async
+from black_jeck.BlackJeckPacketProtocol import auto_decision, encode_server_payload, decode_client_payload,\
+     CLIENT_PAYLOAD_SIZE, SERVER_PAYLOAD_SIZE
+
+ROUND_RESULT = BlackjackGame.ROUND_RESULT
+
+
+def table_deck(args: argparse.Namespace, max_seats: int) -> Deck:
+    """
+    Deck of a table, big enough for a full round of every seat and the dealer.
+
+    Without --decks a table still starts every round from a fresh shuffle, but from
+    as many decks as a full table needs.
+    """
+    decks = -(-MAX_HAND_CARDS * (max_seats + 1) // len(FULL_DECK)) # rounded up
+    if args.decks:
+        return Shoe(max(args.decks, decks), args.penetration)
+    return Deck() if decks == 1 else Shoe(decks, 1.0)
+
+
+class Seat:
+    """One connected player at a table. Each seat sees the same packets as in a private game."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, name: str, rounds: int,
+                 hit_masks=None, deadlines: SessionDeadlines = None):
+        self.reader = reader
+        self.writer = writer
+        self.name = name
+        self.rounds_left = rounds
+        self.hit_masks = hit_masks # auto-play policy, None = interactive
+        self.flags = FLAG_AUTO if hit_masks is not None else 0 # round log flags
+        self.deadlines = deadlines # the session's decision and session deadlines
+        self.session_id = session_id.get() # the table task logs as the table - rounds are recorded under this
+        self.round_num = 0 # rounds of this seat - seats join tables mid-way
+        self.game = None # BlackjackGame sharing the table's deck and dealer hand
+        self.standing = False
+        self.active = True
+        self.frames = [] # payloads of the current round phase
+        self.done = asyncio.get_running_loop().create_future() # set when the seat leaves the table
+
+    def send(self, result: int, card: Card):
+        self.frames.append(encode_server_payload(result, card.rank, card.suit))
+
+    async def flush(self):
+        if not self.active or not self.frames:
+            return
+        self.writer.writelines(self.frames) # one transport write per phase
+        metrics.bytes_sent += len(self.frames) * SERVER_PAYLOAD_SIZE
+        self.frames.clear()
+        try:
+            await self.writer.drain()
+        except ConnectionError as e:
+            self.leave(f"connection lost ({e})")
+
+    def round_over(self):
+        # record the finished round under the seat's own session, not the table's
+        token = session_id.set(self.session_id)
+        try:
+            server_print_winner(self.game, self.name, self.round_num, self.flags)
+        finally:
+            session_id.reset(token)
+
+    def leave(self, reason: str = None):
+        if not self.active:
+            return
+        self.active = False
+        if reason:
+            log.info("Player %s left the table: %s", self.name, reason)
+        if not self.done.done():
+            self.done.set_result(None)
+
+
+class Table:
+    """
+    Up to 'max_seats' players against one dealer hand.
+
+    Every seat plays its own hand, all seats take their turns at the same time,
+    and the dealer plays once per round after every seat stood or busted.
+    """
+
+    def __init__(self, table_id: int, max_seats: int, args: argparse.Namespace, manager: "TableManager"):
+        self.table_id = table_id
+        self.max_seats = max_seats
+        self.turn_timeout = args.turn_timeout or None # table cap on each decision, on top of the session's
+        self.manager = manager
+        self.dealer = BlackjackGame(table_deck(args, max_seats)) # owns the table's deck and dealer hand
+        self.round_cards = MAX_HAND_CARDS * (max_seats + 1) # most cards one round can take
+        self.fresh_deck = not args.decks # reshuffle every round, like a private game
+        self.seats: List[Seat] = []
+        self.waiting: List[Seat] = [] # joined during a round, play from the next one
+        self.task = None # task running the table's rounds
+
+    @property
+    def free_seats(self) -> int:
+        return self.max_seats - len(self.seats) - len(self.waiting)
+
+    def join(self, seat: Seat):
+        seat.game = BlackjackGame(self.dealer.deck)
+        seat.game.dealer_hand = self.dealer.dealer_hand # shared dealer hand
+        self.waiting.append(seat)
+
+    async def run(self):
+        session_id.set(f"table-{self.table_id}") # the task started from the first seat's session
+        round_num = 0
+        while True:
+            self.seats = [seat for seat in self.seats + self.waiting if seat.active]
+            self.waiting.clear()
+            if not self.seats: # table is empty - close it
+                self.manager.tables.remove(self)
+                return
+
+            round_num += 1
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("Table %d - round %d - %s", self.table_id, round_num, ", ".join(seat.name for seat in self.seats))
+            try:
+                await self.play_round()
+            except Exception as e: # never leave the seats waiting on a dead table
+                log.error("Error on table %d: %s", self.table_id, e)
+                for seat in self.seats + self.waiting:
+                    seat.leave()
+                self.manager.tables.remove(self)
+                return
+
+            for seat in self.seats:
+                seat.rounds_left -= 1
+                if seat.rounds_left == 0:
+                    seat.leave()
+                elif seat.deadlines.session_over(): # missed a deadline (stand policy) or session budget spent
+                    seat.leave("session closed after a timeout")
+            if draining.is_set(): # server shutting down - that was the table's last round
+                for seat in self.seats + self.waiting:
+                    seat.leave("server is shutting down")
+
+    async def play_round(self):
+        dealer = self.dealer
+        deck = dealer.deck
+        # only here, never mid-round: a reset would reshuffle cards that are in hands
+        if self.fresh_deck or deck.needs_shuffle() or deck.remaining < self.round_cards:
+            deck.reset()
+        dealer.dealer_hand.clear()
+
+        # Initial deal - two cards to every seat, then the dealer's up and hidden cards
+        for seat in self.seats:
+            seat.game.player_hand.clear()
+            seat.game.result = ROUND_RESULT.NOT_OVER
+            seat.standing = False
+            seat.round_num += 1
+            for _ in range(2):
+                card = seat.game.player_hit()
+                seat.send(seat.game.result, card)
+
+        up_card = dealer.deck.deal_card()
+        dealer.dealer_hand.add_card(up_card)
+        hole_card = dealer.deck.deal_card()
+        dealer.dealer_hand.add_card(hole_card)
+
+        playing = []
+        for seat in self.seats:
+            if seat.game.result == ROUND_RESULT.DEALER_WINS: # player busts (two Aces)
+                seat.round_over()
+            else:
+                seat.send(ROUND_RESULT.NOT_OVER, up_card)
+                playing.append(seat)
+        await asyncio.gather(*(seat.flush() for seat in self.seats))
+
+        # Player turns - every seat in parallel, each with its own deadline
+        await asyncio.gather(*(self.play_turn(seat, up_card) for seat in playing))
+
+        standing = [seat for seat in playing if seat.active and seat.standing]
+        if not standing:
+            return # everyone busted or left - the dealer does not play
+
+        # Dealer plays once for the whole table
+        drawn = []
+        while dealer.dealer_hand.total_value < 17:
+            card = dealer.deck.deal_card()
+            dealer.dealer_hand.add_card(card)
+            drawn.append(card)
+        last_card = drawn[-1] if drawn else hole_card
+
+        # Fan the dealer's cards and every seat's result out
+        for seat in standing:
+            seat.send(ROUND_RESULT.NOT_OVER, hole_card)
+            for card in drawn:
+                seat.send(ROUND_RESULT.NOT_OVER, card)
+            seat.game.decide_winner()
+            seat.send(seat.game.result, last_card)
+            seat.round_over()
+        await asyncio.gather(*(seat.flush() for seat in standing))
+
+    def decision_wait(self, seat: Seat):
+        """Seconds the seat's next decision may take and which limit that is (None = no limit)."""
+        timeout, kind = seat.deadlines.next_wait()
+        if self.turn_timeout is not None and (timeout is None or self.turn_timeout < timeout):
+            timeout, kind = self.turn_timeout, "decision"
+        return timeout, kind
+
+    async def play_turn(self, seat: Seat, up_card: Card):
+        game = seat.game
+        try:
+            while seat.active:
+                if seat.hit_masks is not None:
+                    decision = auto_decision(seat.hit_masks, game.player_hand.total_value, up_card.get_value())
+                else:
+                    timeout, kind = self.decision_wait(seat)
+                    try:
+                        data = await asyncio.wait_for(recv_exact_async(seat.reader, CLIENT_PAYLOAD_SIZE), timeout)
+                    except asyncio.TimeoutError: # slow seat - the table keeps going without it
+                        seat.deadlines.timed_out(kind)
+                        if seat.deadlines.policy == TIMEOUT_STAND:
+                            seat.standing = True # stands this round, leaves after it
+                        else:
+                            seat.leave(f"{kind} timeout")
+                        return
+                    metrics.bytes_received += CLIENT_PAYLOAD_SIZE
+                    decision = decode_client_payload(data)
+                    decided_at = time.perf_counter()
+
+                if decision == "HITTT":
+                    card = game.player_hit()
+                    busted = game.player_hand.is_bust()
+                    seat.send(ROUND_RESULT.DEALER_WINS if busted else ROUND_RESULT.NOT_OVER, card)
+                    await seat.flush()
+                    if seat.hit_masks is None:
+                        metrics.decision_to_card.observe(time.perf_counter() - decided_at)
+                    if busted:
+                        seat.round_over()
+                        return
+
+                elif decision == "STAND":
+                    seat.standing = True
+                    return
+        except (ConnectionError, ValueError) as e:
+            seat.leave(str(e))
+
+
+class TableManager:
+    """Seats players at the first table with a free seat, opening tables as needed."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.tables: List[Table] = []
+        self._table_ids = itertools.count(1)
+
+    async def play(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, rounds: int, player_name: str,
+                   hit_masks=None, deadlines: SessionDeadlines = None):
+        """Seat a player and return once they played all their rounds or left."""
+        seat = Seat(reader, writer, player_name, rounds, hit_masks, deadlines or SessionDeadlines(self.args))
+        table = next((table for table in self.tables if table.free_seats > 0), None)
+        if table is None:
+            table = Table(next(self._table_ids), self.args.table_seats, self.args, self)
+            self.tables.append(table)
+            table.join(seat)
+            table.task = asyncio.get_running_loop().create_task(table.run())
+        else:
+            table.join(seat)
+        log.info("Player %s joined table %d for %d rounds", player_name, table.table_id, rounds)
+        await seat.done
@@ -0,0 +1,148 @@
+import argparse
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from dataclasses import dataclass
+
+from black_jeck.BlackJeckServer import SessionCounter, create_tcp_socket, serve, draining
+from black_jeck.BlackJeckLog import log, setup_logging
+from black_jeck.BlackJeckMetrics import install_dump_signal, start_metrics_server
+from black_jeck.BlackJeckRoundLog import round_log
+from black_jeck.BlackJeckCapture import capture_writer
+from black_jeck.BlackJeckPacketProtocol import derive_seed
+
+HEARTBEAT_SEC = 1.0 # how often a worker reports its status
+HEALTH_TIMEOUT_SEC = 5.0 # worker without heartbeat for this long is restarted
+REPORT_INTERVAL_SEC = 10.0 # how often the parent prints a summary
+GENERATION_SHIFT = 20 # --seed: a worker's seeds are split into 2**12 restarts of 2**20 sessions each
+
+
+@dataclass
+class WorkerStatus:
+    pid: int
+    active_sessions: int
+    total_sessions: int
+    timeouts: int # sessions cut by a request / decision / session deadline
+    last_seen: float
+
+
+def worker_seed(seed: int, worker_id: int, generation: int) -> int:
+    """First --seed derived seed of a worker process - a restarted worker must not deal its predecessor's decks."""
+    return derive_seed(seed, (worker_id << 32) | (generation << GENERATION_SHIFT))
+
+
+def worker_main(worker_id: int, generation: int, tcp_port: int, args: argparse.Namespace, status_queue):
+    """Entry point of a worker process: listen on the shared port and serve clients."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN) # the parent handles Ctrl+C and stops the workers
+    setup_logging(args.log_level, args.log_json) # the parent's log listener thread is not forked
+    install_dump_signal() # kill -USR1 <worker pid> prints this worker's metrics
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port + worker_id)
+    if args.round_log: # own segment files, named by pid
+        round_log.open(args.round_log, args.round_log_segment_mb * 1024 * 1024)
+    if args.capture: # own capture file, whole lines only
+        capture_writer.open(f"{args.capture}.{worker_id}")
+    if args.seed is not None: # each worker and each restart continues the seed sequence at its own offset
+        args.seed = worker_seed(args.seed, worker_id, generation)
+
+    counter = SessionCounter()
+    tcp_sock = create_tcp_socket(tcp_port, reuse_port=True, backlog=args.backlog) # kernel spreads accepts between workers
+
+    heartbeat_thread = threading.Thread(
+        target=_heartbeat,
+        args=(worker_id, counter, status_queue),
+        daemon=True
+    )
+    heartbeat_thread.start()
+
+    serve(tcp_sock, args, counter)
+
+
+def _heartbeat(worker_id: int, counter: SessionCounter, status_queue):
+    pid = os.getpid()
+    while True:
+        status_queue.put((worker_id, pid, counter.active, counter.total, sum(counter.timeouts.values())))
+        time.sleep(HEARTBEAT_SEC)
+
+
+def run_workers(tcp_port: int, args: argparse.Namespace, counter: SessionCounter = None):
+    """
+    Fork the worker processes and supervise them until the server drains.
+
+    'counter' (read by the offer broadcaster) is kept at the workers' total sessions.
+    On drain the workers get SIGTERM and drain their own sessions; after a second
+    signal they are killed.
+    """
+    ctx = multiprocessing.get_context("fork")
+    status_queue = ctx.Queue()
+    workers = {} # worker id -> process
+    health = {} # worker id -> last reported WorkerStatus
+    generations = {} # worker id -> times it was started
+
+    def spawn(worker_id: int):
+        generation = generations.get(worker_id, 0)
+        generations[worker_id] = generation + 1
+        process = ctx.Process(
+            target=worker_main,
+            args=(worker_id, generation, tcp_port, args, status_queue),
+            daemon=True
+        )
+        process.start()
+        workers[worker_id] = process
+
+    for worker_id in range(args.workers):
+        spawn(worker_id)
+    log.info("Started %d workers on TCP port %d", args.workers, tcp_port)
+
+    next_report = time.monotonic() + REPORT_INTERVAL_SEC
+    stop_now = False
+    try:
+        while not draining.is_set():
+            try:
+                worker_id, pid, active, total, timeouts = status_queue.get(timeout=HEARTBEAT_SEC)
+                health[worker_id] = WorkerStatus(pid, active, total, timeouts, time.monotonic())
+                if counter:
+                    counter.active = sum(status.active_sessions for status in health.values())
+            except queue.Empty:
+                pass
+
+            now = time.monotonic()
+            for worker_id, process in list(workers.items()):
+                status = health.get(worker_id)
+                stale = status is not None and now - status.last_seen > HEALTH_TIMEOUT_SEC
+                if not process.is_alive() or stale:
+                    log.warning("Worker %d (pid %d) is down, restarting", worker_id, process.pid)
+                    process.kill()
+                    process.join()
+                    health.pop(worker_id, None)
+                    spawn(worker_id)
+
+            if now >= next_report:
+                print_workers_report(health, len(workers))
+                next_report = now + REPORT_INTERVAL_SEC
+    except KeyboardInterrupt: # second Ctrl+C / SIGTERM
+        stop_now = True
+        raise
+    finally:
+        for process in workers.values():
+            if stop_now:
+                process.kill()
+            else:
+                process.terminate() # SIGTERM - the worker drains its sessions
+        deadline = time.monotonic() + args.drain_timeout + HEARTBEAT_SEC
+        for process in workers.values():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+
+def print_workers_report(health: dict, num_workers: int):
+    active = sum(status.active_sessions for status in health.values())
+    total = sum(status.total_sessions for status in health.values())
+    timeouts = sum(status.timeouts for status in health.values())
+    log.info("Workers alive: %d/%d | active sessions: %d | total sessions: %d | timeouts: %d",
+             len(health), num_workers, active, total, timeouts)
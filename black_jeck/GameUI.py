@@ -1,64 +1,109 @@
-from typing import List
-from BlackJeckLogic import Card, RANK_NAMES, SUITS, BlackjackGame
+import sys
+from typing import List, Sequence
+from black_jeck.BlackJeckLogic import Card, CARDS, RANK_NAMES, SUITS, BlackjackGame
+
+SUIT_SYMBOLS = {'H': '♥', 'D': '♦', 'C': '♣', 'S': '♠'}
+
+
+def _card_art(card: Card) -> tuple:
+    rank_str = RANK_NAMES.get(card.rank, str(card.rank))
+    suit_letter = SUITS[card.suit] if isinstance(card.suit, int) and 0 <= card.suit < 4 else card.suit
+    suit_symbol = SUIT_SYMBOLS.get(suit_letter, suit_letter)
+
+    return (
+        "┌─────────┐",
+        f"│ {rank_str:<7} │",
+        "│         │",
+        f"│    {suit_symbol}    │",
+        "│         │",
+        f"│ {rank_str:>7} │",
+        "└─────────┘"
+    )
+
+# Art of every card, by card code - built once (None for unused codes)
+CARD_ART = [_card_art(card) if card else None for card in CARDS]
+
+# ANSI control sequences of the in-place redraw
+CURSOR_UP = "\x1b[{}F" # to the start of the line N lines up
+CLEAR_DOWN = "\x1b[J" # clear from the cursor to the end of the screen
+
+RULE = "─" * 50
+DOUBLE_RULE = "=" * 50
+WIDE_RULE = "─" * 60
 
 
 class GameUI:
 
-    SUIT_SYMBOLS = {'H': '♥', 'D': '♦', 'C': '♣', 'S': '♠'}
+    SUIT_SYMBOLS = SUIT_SYMBOLS
+
+    # In-place redraw (set by the client with --redraw, only on a terminal): each
+    # update of a round rewrites just the lines of the frame that changed
+    redraw = False
+    _shown: List[str] = [] # lines of the frame of the current round on screen
+    _below = 0 # lines written under that frame since (the prompts)
 
     @staticmethod
-    def _format_card(card: Card) -> List[str]:
-        rank_str = RANK_NAMES.get(card.rank, str(card.rank))
-        suit_letter = SUITS[card.suit] if isinstance(card.suit, int) and 0 <= card.suit < 4 else card.suit
-        suit_symbol = GameUI.SUIT_SYMBOLS.get(suit_letter, suit_letter)
-        
-        return [
-            "┌─────────┐",
-            f"│ {rank_str:<7} │",
-            "│         │",
-            f"│    {suit_symbol}    │",
-            "│         │",
-            f"│ {rank_str:>7} │",
-            "└─────────┘"
-        ]
+    def _format_card(card: Card) -> Sequence[str]:
+        return CARD_ART[card.code]
 
     @staticmethod
-    def _print_cards_row(cards: List[Card]):
-        """Print multiple cards side by side."""
+    def _cards_row(cards: List[Card], lines: List[str]):
+        """Append the lines of multiple cards side by side."""
         if not cards:
             return
-        
-        card_lines = [GameUI._format_card(card) for card in cards]
-        num_lines = len(card_lines[0])
-        
-        for line_idx in range(num_lines):
-            line_parts = [card_lines[i][line_idx] for i in range(len(cards))]
-            print("  ".join(line_parts))
+        card_lines = [CARD_ART[card.code] for card in cards]
+        lines.extend("  ".join(row) for row in zip(*card_lines))
+
+    @staticmethod
+    def _write(lines: List[str], prefix: str = ""):
+        # one write per frame - a frame is dozens of lines
+        sys.stdout.write(prefix + ("\n".join(lines) + "\n" if lines else ""))
+        sys.stdout.flush()
 
     @staticmethod
-    def print_game_state(round_num: int, player_cards: List[Card], dealer_cards: List[Card], 
+    def render_game_state(round_num: int, player_cards: List[Card], dealer_cards: List[Card],
+                          player_sum: int, dealer_sum: int) -> List[str]:
+        lines = ["", RULE, f"  🎴 Round {round_num} 🎴", RULE, "", "  👤 YOUR CARDS:"]
+        GameUI._cards_row(player_cards, lines)
+        lines += [f"  📊 Your sum: {player_sum}", "", "  🎰 DEALER'S CARDS:"]
+        GameUI._cards_row(dealer_cards, lines)
+        lines += [f"  🎰 Dealer sum: {dealer_sum}", RULE, ""]
+        return lines
+
+    @classmethod
+    def print_game_state(cls, round_num: int, player_cards: List[Card], dealer_cards: List[Card],
                          player_sum: int, dealer_sum: int):
 
         # Only print if player has at least 2 cards and dealer has at least 1 card
         if len(player_cards) < 2 or len(dealer_cards) < 1:
             return
-        
-        print("\n" + "─"*50)
-        print(f"  🎴 Round {round_num} 🎴")
-        print("─"*50)
-        
-        print("\n  👤 YOUR CARDS:")
-        GameUI._print_cards_row(player_cards)
-        print(f"  📊 Your sum: {player_sum}")
-        
-        print("\n  🎰 DEALER'S CARDS:")
-        GameUI._print_cards_row(dealer_cards)
-        print(f"  🎰 Dealer sum: {dealer_sum}")
-        
-        print("─"*50 + "\n")
-    
-    @staticmethod
-    def print_result(round_result: int, round_num: int, player_sum: int, dealer_sum: int):
+
+        lines = cls.render_game_state(round_num, player_cards, dealer_cards, player_sum, dealer_sum)
+        if not (cls.redraw and cls._shown):
+            cls._write(lines)
+        else:
+            # move up to the first line that changed, clear from there and write the rest
+            shown = cls._shown
+            changed = 0
+            for changed, (old, new) in enumerate(zip(shown, lines)):
+                if old != new:
+                    break
+            else:
+                changed = min(len(shown), len(lines))
+            up = len(shown) - changed + cls._below
+            cls._write(lines[changed:], CURSOR_UP.format(up) + CLEAR_DOWN if up else "")
+        cls._shown = lines if cls.redraw else []
+        cls._below = 0
+
+    @classmethod
+    def ask(cls, prompt: str) -> str:
+        """input() that keeps track of the lines under the frame being redrawn."""
+        answer = input(prompt)
+        cls._below += 1
+        return answer
+
+    @classmethod
+    def print_result(cls, round_result: int, round_num: int, player_sum: int, dealer_sum: int):
 
         if round_result == BlackjackGame.ROUND_RESULT.PLAYER_WINS:
             result_msg = "🎉 YOU WIN! 🎉"
@@ -72,37 +117,48 @@ class GameUI:
         else:
             result_msg = "❓ Unknown Result ❓"
             result_emoji = "❓"
-        
-        print("\n" + "="*50)
-        print(f"  {'ROUND ' + str(round_num) + ' RESULT':^44}")
-        print("="*50)
-        print(f"  👤 Your sum: {player_sum}  |  🎰 Dealer sum: {dealer_sum}")
-        print("─"*50)
-        print(f"  {result_msg:^44}")
-        print(f"  {result_emoji:^44}")
-        print("="*50 + "\n")
-    
-    @staticmethod
-    def print_statistics(player_name: str, wins: int, ties: int, losses: int):
+
+        cls._write([
+            "",
+            DOUBLE_RULE,
+            f"  {'ROUND ' + str(round_num) + ' RESULT':^44}",
+            DOUBLE_RULE,
+            f"  👤 Your sum: {player_sum}  |  🎰 Dealer sum: {dealer_sum}",
+            RULE,
+            f"  {result_msg:^44}",
+            f"  {result_emoji:^44}",
+            DOUBLE_RULE,
+            "",
+        ])
+        cls._shown = [] # the next round starts a new frame under the result
+
+    @classmethod
+    def print_statistics(cls, player_name: str, wins: int, ties: int, losses: int):
 
         total_rounds = wins + ties + losses
         win_rate = (wins / total_rounds * 100) if total_rounds > 0 else 0
-        
-        print("\n" + "🎰" + "═"*56 + "🎰")
-        print("           📊 GAME STATISTICS 📊")
-        print("═"*60)
-        print(f"  👤 Player: {player_name}")
-        print(f"  🎮 Total Rounds: {total_rounds}")
-        print("─"*60)
-        print(f"  🏆 Wins:   {wins}")
-        print(f"  🤝 Ties:   {ties}")
-        print(f"  💔 Losses: {losses}")
-        print(f"  📈 Win Rate: {win_rate:.1f}%")
-        print("─"*60)
+
         if win_rate >= 50:
-            print("  🎉 Great job! You beat the house! 🎉")
+            verdict = "  🎉 Great job! You beat the house! 🎉"
         elif win_rate > 0 or ties > 0:
-            print("  💪 Better luck next time! 💪")
+            verdict = "  💪 Better luck next time! 💪"
         else:
-            print("  😢 The house always wins... 😢")
-        print("🎰" + "═"*56 + "🎰\n")
+            verdict = "  😢 The house always wins... 😢"
+        cls._write([
+            "",
+            "🎰" + "═"*56 + "🎰",
+            "           📊 GAME STATISTICS 📊",
+            "═"*60,
+            f"  👤 Player: {player_name}",
+            f"  🎮 Total Rounds: {total_rounds}",
+            WIDE_RULE,
+            f"  🏆 Wins:   {wins}",
+            f"  🤝 Ties:   {ties}",
+            f"  💔 Losses: {losses}",
+            f"  📈 Win Rate: {win_rate:.1f}%",
+            WIDE_RULE,
+            verdict,
+            "🎰" + "═"*56 + "🎰",
+            "",
+        ])
+        cls._shown = []
@@ -1,18 +1,44 @@
-from typing import Tuple
-import sys
+from typing import Callable, List, Tuple
 import os
 
-# Add parent directory to path for package imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 from network.UDPBroadcast import UDPBroadcast
-from black_jeck.BlackJeckPacketProtocol import encode_offer, decode_offer
+from black_jeck.BlackJeckPacketProtocol import encode_offer, encode_offer_ext, decode_offer_info, encode_probe,\
+     decode_probe, OfferInfo
 
 class UDPBroadcastOffer(UDPBroadcast):
     # Implements encode/decode for offer messages.
 
+    def __init__(self):
+        self.instance_id = int.from_bytes(os.urandom(8), "big") # identifies this server process in LOAD OFFERs
+
     def encode(self, tcp_port: int, server_name: str) -> bytes:
         return encode_offer(tcp_port, server_name)
     
     def decode(self, data: bytes) -> Tuple[int, str]:
-        return decode_offer(data)  # returns (tcp_port, server_name)
+        info = decode_offer_info(data) # OFFER or LOAD OFFER
+        return info.port, info.name  # returns (tcp_port, server_name)
+
+    def decode_info(self, data: bytes) -> OfferInfo:
+        return decode_offer_info(data)
+
+    def replaces(self, latest: OfferInfo, kept: OfferInfo) -> bool:
+        # every tick sends a plain OFFER next to the LOAD OFFER - it must not erase the load
+        return latest.version >= kept.version
+
+    def offer_packets(self, tcp_port: int, server_name: str, load: Callable[[], Tuple[int, int]] = None) -> List[bytes]:
+        # the plain OFFER for every client, and the LOAD OFFER when the server knows its load
+        offers = [self.encode(tcp_port, server_name)]
+        if load:
+            active, capacity = load()
+            offers.append(encode_offer_ext(tcp_port, server_name, active, capacity, self.instance_id))
+        return offers
+
+    def is_probe(self, data: bytes) -> bool:
+        try:
+            decode_probe(data)
+            return True
+        except Exception:
+            return False
+
+    def encode_probe(self) -> bytes:
+        return encode_probe()
@@ -0,0 +1,223 @@
+"""
+Exact odds of the BlackJeck house rules, no sampling.
+
+The rules make the game small enough to solve exactly: an Ace always counts 11
+(Card.get_value), so a hand is fully described by its total; the dealer draws to 17;
+a player bust loses at once. The dealer's final total distribution and the
+expected value (EV, per unit bet, even-money payout) of Hit and Stand are computed
+by recursion over the cards still in the deck, memoised on (total, deck
+composition). Cards dealt face down are interchangeable with the ones still in
+the deck, so the dealer's hidden card is drawn when the dealer plays.
+
+--decks 1 (default) is the server's default game, a fresh deck every round;
+--decks N approximates a shoe of N decks and --decks 0 is an infinite deck.
+The decision table it writes is the StrategyTable JSON of BlackJeckBot (and of
+simulate.py --policy table and the client's --hints).
+
+Run from the project root:
+    python3 -m black_jeck.odds --decks 1 --output strategy.json
+"""
+import argparse
+import json
+import time
+from functools import lru_cache
+from typing import Dict, Tuple
+
+from black_jeck.BlackJeckLogic import RANK_VALUES
+
+# A deck composition is a tuple of card counts per value, index = value - MIN_VALUE
+MIN_VALUE = 2
+VALUES = tuple(range(MIN_VALUE, max(RANK_VALUES) + 1)) # 2..11
+BLACKJACK = 21
+DEALER_STANDS_ON = 17
+# Dealer outcomes: final totals 17..21, then bust
+DEALER_TOTALS = tuple(range(DEALER_STANDS_ON, BLACKJACK + 1))
+BUST = len(DEALER_TOTALS)
+DECISION_TOTALS = range(2 * MIN_VALUE, BLACKJACK + 1) # every total a player can decide on
+
+Composition = Tuple[int, ...]
+
+
+def deck_composition(decks: int = 1) -> Composition:
+    """Cards per value in 'decks' full decks (Card.get_value of every rank, four suits)."""
+    counts = [0] * len(VALUES)
+    for rank_value in RANK_VALUES[1:]:
+        counts[rank_value - MIN_VALUE] += 4 * decks
+    return tuple(counts)
+
+
+def remove(composition: Composition, value: int) -> Composition:
+    index = value - MIN_VALUE
+    return composition[:index] + (composition[index] - 1,) + composition[index + 1:]
+
+
+class Odds:
+    """
+    Memoised exact odds for one deck configuration.
+
+    Every method takes the composition of the cards not yet seen by the player
+    (the dealer's hidden card is among them). The caches are keyed by composition,
+    so the many hands that leave the same cards behind are solved once.
+    """
+
+    def __init__(self, decks: int = 1):
+        self.decks = decks
+        self.infinite = decks == 0
+        self.full = deck_composition(decks or 1)
+        # per instance, so two configurations never share entries
+        self.dealer_outcomes = lru_cache(maxsize=None)(self._dealer_outcomes)
+        self.best_ev = lru_cache(maxsize=None)(self._best_ev)
+
+    def draws(self, composition: Composition):
+        """(value, probability, composition after the draw) of every value that can be drawn."""
+        cards = sum(composition)
+        for index, count in enumerate(composition):
+            if count:
+                value = VALUES[index]
+                yield value, count / cards, composition if self.infinite else remove(composition, value)
+
+    def _dealer_outcomes(self, total: int, composition: Composition) -> Tuple[float, ...]:
+        """Probabilities of the dealer's final totals 17..21 and of a bust, from 'total'."""
+        if total >= DEALER_STANDS_ON:
+            outcomes = [0.0] * (BUST + 1)
+            outcomes[BUST if total > BLACKJACK else total - DEALER_STANDS_ON] = 1.0
+            return tuple(outcomes)
+        outcomes = [0.0] * (BUST + 1)
+        for value, probability, rest in self.draws(composition):
+            for outcome, p in enumerate(self.dealer_outcomes(total + value, rest)):
+                outcomes[outcome] += probability * p
+        return tuple(outcomes)
+
+    def stand_ev(self, total: int, dealer_up: int, composition: Composition) -> float:
+        # the same order as BlackjackGame.decide_winner: dealer bust, then the higher total
+        outcomes = self.dealer_outcomes(dealer_up, composition)
+        ev = outcomes[BUST]
+        for outcome, dealer_total in enumerate(DEALER_TOTALS):
+            if total > dealer_total:
+                ev += outcomes[outcome]
+            elif total < dealer_total:
+                ev -= outcomes[outcome]
+        return ev
+
+    def hit_ev(self, total: int, dealer_up: int, composition: Composition) -> float:
+        """EV of one more card, playing on optimally."""
+        ev = 0.0
+        for value, probability, rest in self.draws(composition):
+            ev += probability * (-1.0 if total + value > BLACKJACK else self.best_ev(total + value, dealer_up, rest))
+        return ev
+
+    def _best_ev(self, total: int, dealer_up: int, composition: Composition) -> float:
+        return max(self.stand_ev(total, dealer_up, composition), self.hit_ev(total, dealer_up, composition))
+
+    def policy_ev(self, table: Dict[Tuple[int, int], str], total: int, dealer_up: int,
+                  composition: Composition) -> float:
+        """EV of playing 'table' ((total, up) -> "HITTT"/"STAND") from this hand on."""
+        if table.get((total, dealer_up)) != "HITTT":
+            return self.stand_ev(total, dealer_up, composition)
+        ev = 0.0
+        for value, probability, rest in self.draws(composition):
+            if total + value > BLACKJACK:
+                ev -= probability
+            else:
+                ev += probability * self.policy_ev(table, total + value, dealer_up, rest)
+        return ev
+
+    def deals(self):
+        """(player total, dealer up-card, probability, unseen cards) of every initial deal, in deal order."""
+        for first, p_first, after_first in self.draws(self.full):
+            for second, p_second, after_second in self.draws(after_first):
+                for dealer_up, p_up, rest in self.draws(after_second):
+                    yield first + second, dealer_up, p_first * p_second * p_up, rest
+
+    def decision_table(self) -> Dict[Tuple[int, int], Tuple[float, float]]:
+        """
+        (Stand EV, Hit EV) per (player total, dealer up-card).
+
+        With a finite deck the EV of a total depends on the cards that made it, so
+        each entry is the average over the two-card hands with that total, weighted
+        by how likely they are.
+        """
+        sums: Dict[Tuple[int, int], list] = {}
+        for total, dealer_up, probability, rest in self.deals():
+            if total > BLACKJACK: # two Aces - lost before any decision
+                continue
+            entry = sums.setdefault((total, dealer_up), [0.0, 0.0, 0.0])
+            entry[0] += probability * self.stand_ev(total, dealer_up, rest)
+            entry[1] += probability * self.hit_ev(total, dealer_up, rest)
+            entry[2] += probability
+        table = {key: (stand / weight, hit / weight) for key, (stand, hit, weight) in sums.items()}
+        # totals a two-card hand cannot make under this deck (none for a full deck) are solved from the full deck
+        for total in DECISION_TOTALS:
+            for dealer_up in VALUES:
+                if (total, dealer_up) not in table:
+                    rest = self.full if self.infinite else remove(self.full, dealer_up)
+                    table[(total, dealer_up)] = (self.stand_ev(total, dealer_up, rest),
+                                                 self.hit_ev(total, dealer_up, rest))
+        return table
+
+    def round_ev(self, table: Dict[Tuple[int, int], str]) -> float:
+        """Exact EV of a round played by 'table' - minus the house edge."""
+        ev = 0.0
+        for total, dealer_up, probability, rest in self.deals():
+            ev += probability * (-1.0 if total > BLACKJACK else self.policy_ev(table, total, dealer_up, rest))
+        return ev
+
+
+def strategy(evs: Dict[Tuple[int, int], Tuple[float, float]]) -> Dict[Tuple[int, int], str]:
+    """Decision per (player total, dealer up-card), in BlackJeckBot.StrategyTable form."""
+    return {key: "HITTT" if hit > stand else "STAND" for key, (stand, hit) in evs.items()}
+
+
+def to_json(table: Dict[Tuple[int, int], str]) -> Dict[str, str]:
+    """The StrategyTable JSON mapping: "<player_total>,<dealer_up>" -> "HIT" / "STAND"."""
+    return {f"{total},{dealer_up}": "HIT" if decision == "HITTT" else "STAND"
+            for (total, dealer_up), decision in sorted(table.items())}
+
+
+def print_table(table: Dict[Tuple[int, int], str]):
+    print("total " + " ".join(f"{dealer_up:>2}" for dealer_up in VALUES))
+    for total in DECISION_TOTALS:
+        print(f"{total:>5} " + " ".join(" H" if table[(total, dealer_up)] == "HITTT" else " S"
+                                        for dealer_up in VALUES))
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Exact BlackJeck odds and optimal decision table")
+    parser.add_argument("--decks", type=int, default=1,
+                        help="decks in play (1 = the server's fresh deck per round, 0 = infinite deck)")
+    parser.add_argument("--output", help="write the decision table as StrategyTable JSON to this file")
+    parser.add_argument("--ev", action="store_true", help="also print the Stand and Hit EV of every entry")
+    args = parser.parse_args(argv)
+    if not 0 <= args.decks <= 8:
+        parser.error("--decks must be between 0 and 8")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    odds = Odds(args.decks)
+
+    started_at = time.perf_counter()
+    evs = odds.decision_table()
+    table = strategy(evs)
+    house_edge = -odds.round_ev(table)
+    elapsed = time.perf_counter() - started_at
+
+    deck = "infinite deck" if odds.infinite else f"{args.decks} deck{'s' if args.decks > 1 else ''}"
+    print(f"Decision table for {deck} (H = hit, S = stand; columns: dealer up-card)")
+    print_table(table)
+    if args.ev:
+        for (total, dealer_up), (stand, hit) in sorted(evs.items()):
+            print(f"{total:>2},{dealer_up:>2}: stand {stand:+.4f} hit {hit:+.4f}")
+    print(f"House edge with this table: {house_edge * 100:.3f}%")
+    print(f"Solved in {elapsed:.2f}s ({odds.dealer_outcomes.cache_info().currsize} dealer states, "
+          f"{odds.best_ev.cache_info().currsize} player states)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(to_json(table), f, indent=1)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
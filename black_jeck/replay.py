@@ -0,0 +1,175 @@
+"""
+Replays sessions captured by the server (--capture FILE) and checks the answers.
+
+Every captured session is sent again as a SEEDED REQUEST with its seed, policy and
+the client's decisions - all in one send, the server reads them as it needs them -
+and the server's bytes are compared with the captured ones. The server must run
+with the same --decks and --penetration as the one that captured the sessions.
+With --speed the sessions start with the captured spacing (scaled), by default
+they are replayed as fast as --concurrency connections allow.
+
+Run from the project root:
+    python3 -m black_jeck.replay sessions.jsonl --host 127.0.0.1 --port 5000 --concurrency 32
+"""
+import argparse
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from black_jeck.BlackJeckCapture import SessionCapture, DECISIONS, read_captures
+from black_jeck.BlackJeckDiscovery import discover
+from black_jeck.BlackJeckPacketProtocol import encode_seeded_request, encode_client_payload, SERVER_PAYLOAD_SIZE
+
+DEFAULT_TIMEOUT_SEC = 10.0
+MAX_REPORTED_MISMATCHES = 10
+
+
+@dataclass
+class ReplayStats:
+    matched: int = 0
+    mismatched: int = 0
+    errors: int = 0
+    bytes_received: int = 0
+    mismatches: List[str] = field(default_factory=list) # first few, for the report
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+def replay_request(capture: SessionCapture) -> bytes:
+    """The request and every decision of a captured session, in one buffer."""
+    decisions = [encode_client_payload(DECISIONS[code]) for code in capture.decisions]
+    return encode_seeded_request(capture.rounds, capture.name, capture.seed, capture.hit_masks) + b"".join(decisions)
+
+
+def receive(sock: socket.socket, size: int) -> bytes:
+    """Up to 'size' bytes - fewer if the server closes first."""
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return bytes(data)
+
+
+def first_difference(expected: bytes, received: bytes) -> Optional[int]:
+    for offset, (a, b) in enumerate(zip(expected, received)):
+        if a != b:
+            return offset
+    return None if len(expected) == len(received) else min(len(expected), len(received))
+
+
+def replay_session(host: str, port: int, capture: SessionCapture, timeout: float) -> Optional[str]:
+    """Replay one session, returns None if the server answered byte for byte as captured."""
+    expected = bytes(capture.sent)
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.sendall(replay_request(capture))
+        received = receive(sock, len(expected))
+    offset = first_difference(expected, received)
+    if offset is None:
+        return None
+    return (f"{capture.name} seed {capture.seed}: payload {offset // SERVER_PAYLOAD_SIZE} differs "
+            f"(byte {offset}, {len(received)}/{len(expected)} bytes received)")
+
+
+def run(host: str, port: int, captures: List[SessionCapture], concurrency: int, speed: float,
+        timeout: float) -> ReplayStats:
+    stats = ReplayStats()
+    first = min((capture.started for capture in captures), default=0.0)
+    started_at = time.perf_counter()
+
+    def replay(capture: SessionCapture):
+        if speed > 0: # keep the captured spacing between session starts
+            delay = (capture.started - first) / speed - (time.perf_counter() - started_at)
+            if delay > 0:
+                time.sleep(delay)
+        try:
+            mismatch = replay_session(host, port, capture, timeout)
+        except OSError as e:
+            with stats.lock:
+                stats.errors += 1
+                if len(stats.mismatches) < MAX_REPORTED_MISMATCHES:
+                    stats.mismatches.append(f"{capture.name} seed {capture.seed}: {e}")
+            return
+        with stats.lock:
+            stats.bytes_received += len(capture.sent)
+            if mismatch is None:
+                stats.matched += 1
+            else:
+                stats.mismatched += 1
+                if len(stats.mismatches) < MAX_REPORTED_MISMATCHES:
+                    stats.mismatches.append(mismatch)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for capture in sorted(captures, key=lambda capture: capture.started):
+            pool.submit(replay, capture)
+    return stats
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay captured sessions against a server and compare the answers")
+    parser.add_argument("captures", nargs="+", help="capture files written by the server's --capture")
+    parser.add_argument("--host", help="server address (default: wait for a UDP offer)")
+    parser.add_argument("--port", type=int, help="server TCP port (required with --host)")
+    parser.add_argument("--concurrency", type=int, default=8, help="sessions replayed at the same time")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="start sessions with the captured spacing divided by this (0 = as fast as possible)")
+    parser.add_argument("--repeat", type=int, default=1, help="replay the captures this many times")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT_SEC, help="socket timeout in seconds")
+    args = parser.parse_args(argv)
+
+    if args.host and args.port is None:
+        parser.error("--port is required with --host")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.speed < 0:
+        parser.error("--speed must not be negative")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        captures = [capture for path in args.captures for capture in read_captures(path)]
+    except (OSError, ValueError) as e:
+        sys.exit(f"Cannot read captures: {e}")
+    if not captures:
+        print("No sessions captured")
+        return
+
+    if args.host:
+        server_ip, server_port = args.host, args.port
+    else:
+        print("Listening for server offers...")
+        server = discover(use_cache=False)
+        server_ip, server_port = server.ip, server.port
+        print(f"Server offer received from {server_ip}:{server_port} - {server.name}")
+
+    configs = {(capture.decks, capture.penetration) for capture in captures}
+    if len(configs) > 1:
+        print(f"Warning: captures come from {len(configs)} server configurations (--decks, --penetration)")
+
+    started_at = time.perf_counter()
+    stats = run(server_ip, server_port, captures * args.repeat, args.concurrency, args.speed, args.timeout)
+    elapsed = time.perf_counter() - started_at
+
+    sessions = stats.matched + stats.mismatched + stats.errors
+    print("=" * 50)
+    print(f"Sessions: {sessions} | matched {stats.matched} | mismatched {stats.mismatched} | "
+          f"failed {stats.errors} in {elapsed:.2f}s")
+    if elapsed > 0:
+        print(f"Sessions/sec: {sessions / elapsed:.1f} | "
+              f"Payloads/sec: {stats.bytes_received / SERVER_PAYLOAD_SIZE / elapsed:.1f}")
+    for mismatch in stats.mismatches:
+        print(f"  {mismatch}")
+    print("=" * 50)
+    if stats.mismatched or stats.errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
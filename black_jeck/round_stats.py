@@ -0,0 +1,170 @@
+"""
+Aggregates over the server's binary round log (--round-log DIR).
+
+Every segment file is memory-mapped and viewed as a NumPy record array, so
+millions of rounds are counted with array operations - no Python object per
+round. Reports the result distribution, the house edge per player (players are
+stored as name hashes; --player NAME labels the ones you know) and rounds per hour.
+
+Run from the project root:
+    python3 -m black_jeck.round_stats rounds/ --player Alice --player Bob
+"""
+import argparse
+import glob
+import json
+import mmap
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from black_jeck.BlackJeckLogic import BlackjackGame
+from black_jeck.BlackJeckRoundLog import HEADER, RECORD, MAGIC, VERSION, MAX_CARDS, SEGMENT_SUFFIX, name_hash
+
+ROUND_RESULT = BlackjackGame.ROUND_RESULT
+
+# Same layout as BlackJeckRoundLog.RECORD
+RECORD_DTYPE = np.dtype({
+    "names": ["time", "player", "session", "player_cards", "dealer_cards", "round", "result", "flags"],
+    "formats": ["<f8", "<u8", "S16", f"S{MAX_CARDS}", f"S{MAX_CARDS}", "<u2", "u1", "u1"],
+    "offsets": [0, 8, 16, 32, 32 + MAX_CARDS, 32 + 2 * MAX_CARDS, 34 + 2 * MAX_CARDS, 35 + 2 * MAX_CARDS],
+    "itemsize": RECORD.size,
+})
+SECONDS_PER_HOUR = 3600
+
+
+@dataclass
+class PlayerStats:
+    rounds: int = 0
+    wins: int = 0
+    ties: int = 0
+    losses: int = 0
+
+    @property
+    def house_edge(self) -> float:
+        """Expected house gain per unit bet (even-money payout)."""
+        return (self.losses - self.wins) / self.rounds if self.rounds else 0.0
+
+
+@dataclass
+class RoundStats:
+    rounds: int = 0
+    results: List[int] = field(default_factory=lambda: [0] * (max(ROUND_RESULT) + 1)) # indexed by ROUND_RESULT
+    players: Dict[int, PlayerStats] = field(default_factory=dict) # by name hash
+    hours: Dict[int, int] = field(default_factory=dict) # rounds per hour since the epoch
+    first: float = float("inf")
+    last: float = float("-inf")
+
+    def add(self, records: np.ndarray):
+        """Fold in a record array (a whole segment at once)."""
+        if not len(records):
+            return
+        self.rounds += len(records)
+        results = records["result"]
+        for result, count in enumerate(np.bincount(results, minlength=len(self.results))):
+            self.results[result] += int(count)
+
+        # per player: one pass of np.unique, then one weighted count per result
+        players, index = np.unique(records["player"], return_inverse=True)
+        per_player = {result: np.bincount(index, weights=results == result, minlength=len(players))
+                      for result in (ROUND_RESULT.PLAYER_WINS, ROUND_RESULT.TIE, ROUND_RESULT.DEALER_WINS)}
+        rounds = np.bincount(index, minlength=len(players))
+        for i, player in enumerate(players.tolist()):
+            stats = self.players.setdefault(player, PlayerStats())
+            stats.rounds += int(rounds[i])
+            stats.wins += int(per_player[ROUND_RESULT.PLAYER_WINS][i])
+            stats.ties += int(per_player[ROUND_RESULT.TIE][i])
+            stats.losses += int(per_player[ROUND_RESULT.DEALER_WINS][i])
+
+        times = records["time"]
+        hours, counts = np.unique((times // SECONDS_PER_HOUR).astype(np.int64), return_counts=True)
+        for hour, count in zip(hours.tolist(), counts.tolist()):
+            self.hours[hour] = self.hours.get(hour, 0) + count
+        self.first = min(self.first, float(times.min()))
+        self.last = max(self.last, float(times.max()))
+
+    @property
+    def rounds_per_hour(self) -> float:
+        """Average over the hours that had at least one round."""
+        return self.rounds / len(self.hours) if self.hours else 0.0
+
+
+def segment_paths(paths: Iterable[str]) -> List[str]:
+    """Segment files of the given files and directories, oldest first."""
+    segments = []
+    for path in paths:
+        if os.path.isdir(path):
+            segments.extend(sorted(glob.glob(os.path.join(path, f"*{SEGMENT_SUFFIX}"))))
+        else:
+            segments.append(path)
+    return segments
+
+
+def read_segment(path: str, stats: RoundStats):
+    """Map one segment and fold its records into 'stats'."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size <= HEADER.size:
+            return # no records yet
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            magic, version, record_size = HEADER.unpack_from(mapped)
+            if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+                raise ValueError(f"{path}: not a version {VERSION} round log segment")
+            count = (len(mapped) - HEADER.size) // RECORD.size # a torn last record is skipped
+            records = np.frombuffer(mapped, dtype=RECORD_DTYPE, count=count, offset=HEADER.size)
+            stats.add(records)
+            del records # release the buffer before the map is closed
+
+
+def read_round_log(paths: Iterable[str]) -> RoundStats:
+    stats = RoundStats()
+    for path in segment_paths(paths):
+        read_segment(path, stats)
+    return stats
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Aggregates over the server's binary round log")
+    parser.add_argument("paths", nargs="+", help="round log directories or segment files")
+    parser.add_argument("--player", action="append", default=[],
+                        help="label this player's name hash with the name (repeatable)")
+    parser.add_argument("--top", type=int, default=20, help="players to list, by rounds played")
+    parser.add_argument("--json", action="store_true", help="print the aggregates as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    stats = read_round_log(args.paths)
+    names = {name_hash(name): name for name in args.player}
+    players = sorted(stats.players.items(), key=lambda item: -item[1].rounds)[:args.top]
+
+    if args.json:
+        print(json.dumps({
+            "rounds": stats.rounds,
+            "results": {result.name: stats.results[result] for result in
+                        (ROUND_RESULT.PLAYER_WINS, ROUND_RESULT.TIE, ROUND_RESULT.DEALER_WINS)},
+            "rounds_per_hour": stats.rounds_per_hour,
+            "players": [{"player": names.get(player, f"{player:016x}"), "rounds": player_stats.rounds,
+                         "wins": player_stats.wins, "ties": player_stats.ties, "losses": player_stats.losses,
+                         "house_edge": player_stats.house_edge} for player, player_stats in players],
+        }, indent=2))
+        return
+
+    if not stats.rounds:
+        print("No rounds logged")
+        return
+    print(f"Rounds: {stats.rounds} over {len(stats.hours)} active hours "
+          f"({stats.rounds_per_hour:,.1f} rounds/hour)")
+    wins, ties, losses = (stats.results[result] for result in
+                          (ROUND_RESULT.PLAYER_WINS, ROUND_RESULT.TIE, ROUND_RESULT.DEALER_WINS))
+    print(f"Wins / Ties / Losses: {wins} / {ties} / {losses} "
+          f"({wins / stats.rounds * 100:.1f}% / {ties / stats.rounds * 100:.1f}% / {losses / stats.rounds * 100:.1f}%)")
+    print(f"{'player':<18} {'rounds':>10} {'wins':>8} {'ties':>8} {'losses':>8} {'house edge':>11}")
+    for player, player_stats in players:
+        print(f"{names.get(player, f'{player:016x}'):<18} {player_stats.rounds:>10} {player_stats.wins:>8} "
+              f"{player_stats.ties:>8} {player_stats.losses:>8} {player_stats.house_edge * 100:>10.2f}%")
+
+
+if __name__ == "__main__":
+    main()
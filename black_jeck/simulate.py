@@ -0,0 +1,441 @@
+"""
+Vectorised Monte Carlo simulator for the BlackJeck house rules.
+
+Plays a batch of rounds at once on NumPy integer arrays, with the same rules as
+BlackjackGame and the server's round flow: Ace always counts 11, a fresh shuffled
+deck every round, a player bust ends the round immediately, the dealer draws to 17
+and the rest is decided like BlackjackGame.decide_winner.
+
+A job is split into fixed-size shards, each dealt from its own seed derived from
+(--seed, shard index), and the shards run on a process pool. Every shard returns
+counts and Welford mean/variance, merged in shard order - so a seed gives the
+same result whatever the number of workers, and a --checkpoint file lets a long
+run stop and resume with only the unfinished shards.
+
+Run from the project root:
+    python3 -m black_jeck.simulate --rounds 1000000 --policy hit-below --threshold 17
+"""
+import argparse
+import hashlib
+import json
+import math
+import sys
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from black_jeck.BlackJeckLogic import BlackjackGame, Card, card_code
+
+ROUND_RESULT = BlackjackGame.ROUND_RESULT
+
+NUM_CARDS = 52
+# Most cards a single round can use: player 2,2,2,2,3,3,3,3 + bust card (9),
+# dealer at most 7 more - only this many deck positions are ever shuffled.
+MAX_CARDS_PER_ROUND = 24
+DEFAULT_BATCH_SIZE = 1 << 16
+DEFAULT_SHARD_ROUNDS = 1 << 18 # rounds per shard - the unit of work, seeding and checkpointing
+CHECKPOINT_INTERVAL_SEC = 10.0 # also how often progress is printed
+STOP_POLL_SEC = 0.2 # how often a multi-process run checks for Ctrl+C
+Z_95 = 1.959964 # two-sided 95% normal quantile
+
+# Card id = suit * 13 + (rank - 1), the order Deck.reset builds the deck in
+CARD_RANKS = np.tile(np.arange(1, 14, dtype=np.int8), 4)
+CARD_SUITS = np.repeat(np.arange(4, dtype=np.int8), 13)
+CARD_VALUES = np.array([Card(int(rank), 0).get_value() for rank in CARD_RANKS], dtype=np.int8)
+
+# A policy is a boolean table: HIT[player_total, dealer_up_value]
+MAX_DECISION_TOTAL = 21
+MAX_CARD_VALUE = 11
+
+
+def threshold_policy(threshold: int) -> np.ndarray:
+    """Hit while the player total is below 'threshold'."""
+    policy = np.zeros((MAX_DECISION_TOTAL + 1, MAX_CARD_VALUE + 1), dtype=bool)
+    policy[:threshold, :] = True
+    return policy
+
+
+def table_policy(table: Dict[Tuple[int, int], str], stand_on: int = 17) -> np.ndarray:
+    """Policy from a (player_total, dealer_up) -> "HITTT"/"STAND" table (BlackJeckBot.StrategyTable)."""
+    policy = threshold_policy(stand_on)
+    for (player_total, dealer_up), decision in table.items():
+        if player_total <= MAX_DECISION_TOTAL and dealer_up <= MAX_CARD_VALUE:
+            policy[player_total, dealer_up] = decision == "HITTT"
+    return policy
+
+
+@dataclass
+class SimulationResult:
+    """
+    Mergeable accumulator: result counts plus the Welford mean and sum of squared
+    deviations (m2) of the player's payoff per round (+1 win, 0 tie, -1 loss).
+    """
+    rounds: int = 0
+    wins: int = 0
+    ties: int = 0
+    losses: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    def add(self, results: np.ndarray):
+        wins = int(np.count_nonzero(results == ROUND_RESULT.PLAYER_WINS))
+        ties = int(np.count_nonzero(results == ROUND_RESULT.TIE))
+        losses = int(np.count_nonzero(results == ROUND_RESULT.DEALER_WINS))
+        rounds = wins + ties + losses
+        if not rounds:
+            return
+        mean = (wins - losses) / rounds # payoffs take three values - the batch moments come from the counts
+        m2 = wins * (1 - mean) ** 2 + ties * mean ** 2 + losses * (1 + mean) ** 2
+        self.merge(SimulationResult(rounds, wins, ties, losses, mean, m2))
+
+    def merge(self, other: "SimulationResult"):
+        """Fold in another accumulator (Chan et al. pairwise update)."""
+        if not other.rounds:
+            return
+        rounds = self.rounds + other.rounds
+        delta = other.mean - self.mean
+        self.mean += delta * other.rounds / rounds
+        self.m2 += other.m2 + delta * delta * self.rounds * other.rounds / rounds
+        self.rounds = rounds
+        self.wins += other.wins
+        self.ties += other.ties
+        self.losses += other.losses
+
+    @property
+    def house_edge(self) -> float:
+        """Expected house gain per unit bet (even-money payout)."""
+        return (self.losses - self.wins) / self.rounds if self.rounds else 0.0
+
+    @property
+    def variance(self) -> float:
+        """Sample variance of the payoff per round."""
+        return self.m2 / (self.rounds - 1) if self.rounds > 1 else 0.0
+
+    def confidence(self, z: float = Z_95) -> float:
+        """Half width of the confidence interval of the house edge."""
+        return z * math.sqrt(self.variance / self.rounds) if self.rounds else 0.0
+
+
+def shuffled_decks(rng: np.random.Generator, num_rounds: int) -> np.ndarray:
+    """
+    Deal order of 'num_rounds' shuffled decks, shape (MAX_CARDS_PER_ROUND, num_rounds).
+
+    Partial Fisher-Yates: only the positions a round can reach are drawn, and the
+    batch is stored position-major so every step works on contiguous rows.
+    """
+    decks = np.repeat(np.arange(NUM_CARDS, dtype=np.int8)[:, None], num_rounds, axis=1)
+    flat = decks.reshape(-1)
+    columns = np.arange(num_rounds)
+    for position in range(MAX_CARDS_PER_ROUND):
+        swap = rng.integers(position, NUM_CARDS, size=num_rounds) * num_rounds + columns
+        drawn = flat[swap]
+        flat[swap] = decks[position]
+        decks[position] = drawn
+    return decks[:MAX_CARDS_PER_ROUND]
+
+
+def play_rounds(decks: np.ndarray, policy: np.ndarray) -> np.ndarray:
+    """Play one round per deck column, return the ROUND_RESULT of every round."""
+    values = CARD_VALUES[decks] # card values in deal order
+    num_rounds = decks.shape[1]
+    columns = np.arange(num_rounds)
+
+    player_total = values[0] + values[1]
+    dealer_up = values[2]
+    dealer_total = dealer_up + values[3]
+    next_card = np.full(num_rounds, 4)
+
+    player_bust = player_total > 21 # two Aces
+    # Player turn - hit while the policy says so and the player is not bust
+    active = ~player_bust & policy[np.minimum(player_total, MAX_DECISION_TOTAL), dealer_up]
+    while active.any():
+        rows = np.flatnonzero(active)
+        player_total[rows] += values[next_card[rows], rows]
+        next_card[rows] += 1
+        player_bust[rows] = player_total[rows] > 21
+        active[rows] = ~player_bust[rows] & policy[np.minimum(player_total[rows], MAX_DECISION_TOTAL), dealer_up[rows]]
+
+    # Dealer turn - only when the player stood
+    drawing = ~player_bust & (dealer_total < 17)
+    while drawing.any():
+        rows = np.flatnonzero(drawing)
+        dealer_total[rows] += values[next_card[rows], rows]
+        next_card[rows] += 1
+        drawing[rows] = dealer_total[rows] < 17
+
+    # Same order as BlackjackGame.decide_winner
+    diff = player_total.astype(np.int16) - dealer_total
+    results = np.where(diff > 0, ROUND_RESULT.PLAYER_WINS,
+                       np.where(diff < 0, ROUND_RESULT.DEALER_WINS, ROUND_RESULT.TIE)).astype(np.int8)
+    results[dealer_total > 21] = ROUND_RESULT.PLAYER_WINS
+    results[player_bust] = ROUND_RESULT.DEALER_WINS
+    return results
+
+
+def shard_sizes(num_rounds: int, shard_rounds: int = DEFAULT_SHARD_ROUNDS) -> List[int]:
+    full, last = divmod(num_rounds, shard_rounds)
+    return [shard_rounds] * full + ([last] if last else [])
+
+
+def run_shard(index: int, num_rounds: int, policy: np.ndarray, entropy: int,
+              batch_size: int = DEFAULT_BATCH_SIZE) -> Tuple[int, SimulationResult]:
+    """Play shard 'index' - its decks depend only on (entropy, index), not on the worker."""
+    rng = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(index,)))
+    result = SimulationResult()
+    remaining = num_rounds
+    while remaining > 0:
+        batch = min(batch_size, remaining)
+        result.add(play_rounds(shuffled_decks(rng, batch), policy))
+        remaining -= batch
+    return index, result
+
+
+class Checkpoint:
+    """
+    Finished shards of one job in a JSON file, rewritten atomically.
+
+    The file names the job (rounds, shard and batch size, policy, seed); resuming
+    with different parameters is refused instead of mixing two jobs.
+    """
+
+    def __init__(self, path: str, job: dict):
+        self.path = path
+        self.job = job
+
+    def load(self) -> Tuple[Optional[int], Dict[int, SimulationResult]]:
+        """(seed entropy, finished shards) of an earlier run - (None, {}) if there is none."""
+        if not os.path.exists(self.path):
+            return None, {}
+        with open(self.path) as f:
+            saved = json.load(f)
+        if saved.get("job") != self.job:
+            raise ValueError(f"{self.path} is a checkpoint of a different job: {saved.get('job')}")
+        return saved["entropy"], {int(index): SimulationResult(**result) for index, result in saved["shards"].items()}
+
+    def save(self, entropy: int, shards: Dict[int, SimulationResult]):
+        partial_path = self.path + ".tmp"
+        with open(partial_path, "w") as f:
+            json.dump({"job": self.job, "entropy": entropy,
+                       "shards": {index: asdict(result) for index, result in sorted(shards.items())}}, f)
+        os.replace(partial_path, self.path) # a crash leaves the old or the new file, never half of one
+
+
+def job_description(num_rounds: int, policy: np.ndarray, shard_rounds: int, batch_size: int) -> dict:
+    return {"rounds": num_rounds, "shard_rounds": shard_rounds, "batch_size": batch_size,
+            "policy": hashlib.sha256(np.packbits(policy).tobytes()).hexdigest()[:16]}
+
+
+def merge_shards(shards: Dict[int, SimulationResult]) -> SimulationResult:
+    # always in shard order - float merges of the same shards give the same bits
+    result = SimulationResult()
+    for index in sorted(shards):
+        result.merge(shards[index])
+    return result
+
+
+def resume(checkpoint: Optional[Checkpoint], seed: int = None) -> Tuple[int, Dict[int, SimulationResult]]:
+    """
+    (seed entropy, finished shards) a job starts from.
+
+    The checkpoint's shards and seed if it has any - 'seed' must then be None or the
+    same; else 'seed', or a fresh random one.
+    """
+    entropy, shards = checkpoint.load() if checkpoint else (None, {})
+    if seed is not None:
+        if entropy is not None and entropy != seed:
+            raise ValueError(f"{checkpoint.path} was started with seed {entropy}, not {seed}")
+        entropy = seed
+    if entropy is None:
+        entropy = np.random.SeedSequence().entropy # fresh run - random, but saved in the checkpoint
+    return entropy, shards
+
+
+def _ignore_sigint():
+    signal.signal(signal.SIGINT, signal.SIG_IGN) # the parent handles Ctrl+C and stops handing out shards
+
+
+def simulate(num_rounds: int, policy: np.ndarray, seed: int = None, batch_size: int = DEFAULT_BATCH_SIZE,
+             shard_rounds: int = DEFAULT_SHARD_ROUNDS, workers: int = 1, checkpoint: Checkpoint = None,
+             finished: Dict[int, SimulationResult] = None, progress=None,
+             stop: threading.Event = None) -> SimulationResult:
+    """
+    Play 'num_rounds' rounds in seeded shards on 'workers' processes.
+
+    With 'checkpoint' the finished shards are saved every CHECKPOINT_INTERVAL_SEC
+    (and when the run ends) and a rerun only plays the missing ones. A caller that
+    already ran resume() passes its seed and 'finished' shards instead.
+    progress(done_shards, total_shards, result) is called at the same interval.
+    Once 'stop' is set no new shard starts; the result covers the finished ones.
+    """
+    stop = stop or threading.Event()
+    sizes = shard_sizes(num_rounds, shard_rounds)
+    if finished is None:
+        entropy, shards = resume(checkpoint, seed)
+    else:
+        entropy, shards = seed, dict(finished)
+    pending = [index for index in range(len(sizes)) if index not in shards]
+
+    last_report = time.perf_counter()
+
+    def shard_done(index: int, result: SimulationResult):
+        nonlocal last_report
+        shards[index] = result
+        if time.perf_counter() - last_report >= CHECKPOINT_INTERVAL_SEC or len(shards) == len(sizes):
+            last_report = time.perf_counter()
+            if checkpoint:
+                checkpoint.save(entropy, shards)
+            if progress:
+                progress(len(shards), len(sizes), merge_shards(shards))
+
+    try:
+        if workers <= 1: # same shards in this process
+            for index in pending:
+                if stop.is_set():
+                    break
+                shard_done(*run_shard(index, sizes[index], policy, entropy, batch_size))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_ignore_sigint) as pool:
+                running = {pool.submit(run_shard, index, sizes[index], policy, entropy, batch_size)
+                           for index in pending}
+                while running and not stop.is_set():
+                    finished, running = wait(running, timeout=STOP_POLL_SEC, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        shard_done(*future.result())
+                for future in running: # stopped - shards not started yet are dropped
+                    future.cancel()
+            for future in running: # the pool waited for the ones already playing
+                if not future.cancelled():
+                    shard_done(*future.result())
+    finally:
+        if checkpoint:
+            checkpoint.save(entropy, shards)
+    return merge_shards(shards)
+
+
+# Cross-validation against the object based game #
+
+def play_reference_round(deal_order, policy: np.ndarray) -> int:
+    """Play one round through BlackjackGame with a fixed deal order, like BlackJeckServer.play_game."""
+    game = BlackjackGame()
+    # Deck.deal_card deals from the end of the deck
+    game.deck.cards = bytearray(card_code(int(CARD_RANKS[card]), int(CARD_SUITS[card])) for card in reversed(deal_order))
+    game.deck.remaining = len(game.deck.cards)
+
+    game.player_hit()
+    game.player_hit()
+    if game.result == game.ROUND_RESULT.DEALER_WINS: # player busts
+        return game.result
+
+    dealer_up = game.dealer_hit().get_value()
+    game.dealer_hit() # hidden card
+
+    while policy[min(game.player_hand.total_value, MAX_DECISION_TOTAL), dealer_up]:
+        game.player_hit()
+        if game.result == game.ROUND_RESULT.DEALER_WINS: # player busts
+            return game.result
+
+    while game.dealer_hand.total_value < 17:
+        game.dealer_hit()
+    game.decide_winner()
+    return game.result
+
+
+def cross_validate(num_rounds: int, policy: np.ndarray, seed: int = None) -> int:
+    """Play the same decks through both engines, return the number of rounds that differ."""
+    decks = shuffled_decks(np.random.default_rng(seed), num_rounds)
+    results = play_rounds(decks, policy)
+    mismatches = 0
+    for column in range(num_rounds):
+        if play_reference_round(decks[:, column], policy) != results[column]:
+            mismatches += 1
+    return mismatches
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Vectorised BlackJeck Monte Carlo simulator")
+    parser.add_argument("--rounds", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed of the whole job - the same seed gives the same result with any --workers")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes playing shards")
+    parser.add_argument("--shard-rounds", type=int, default=DEFAULT_SHARD_ROUNDS,
+                        help="rounds per shard (part of the job: changing it changes the result)")
+    parser.add_argument("--checkpoint", metavar="FILE",
+                        help="save finished shards to FILE and resume from it if it exists")
+    parser.add_argument("--policy", choices=("stand", "hit-below", "table"), default="hit-below")
+    parser.add_argument("--threshold", type=int, default=17, help="hit-below: hit while the sum is below this")
+    parser.add_argument("--table", help="table: JSON strategy table file (see BlackJeckBot)")
+    parser.add_argument("--check", type=int, default=0, metavar="N",
+                        help="also replay N rounds through BlackjackGame and compare the results")
+    args = parser.parse_args(argv)
+    if args.policy == "table" and not args.table:
+        parser.error("--table is required with --policy table")
+    if args.rounds < 1 or args.shard_rounds < 1 or args.workers < 1:
+        parser.error("--rounds, --shard-rounds and --workers must be at least 1")
+    if args.seed is not None and args.seed < 0:
+        parser.error("--seed must not be negative")
+    return args
+
+
+def make_policy(args: argparse.Namespace) -> np.ndarray:
+    if args.policy == "stand":
+        return threshold_policy(0)
+    if args.policy == "hit-below":
+        return threshold_policy(args.threshold)
+    from black_jeck.BlackJeckBot import StrategyTable
+    return table_policy(StrategyTable.load(args.table).table)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    policy = make_policy(args)
+
+    checkpoint = None
+    if args.checkpoint:
+        checkpoint = Checkpoint(args.checkpoint, job_description(args.rounds, policy, args.shard_rounds,
+                                                                 DEFAULT_BATCH_SIZE))
+    try:
+        seed, shards = resume(checkpoint, args.seed)
+    except ValueError as e:
+        sys.exit(str(e))
+    resumed = sum(shard.rounds for shard in shards.values()) # rounds an earlier run finished
+    if resumed:
+        print(f"Resuming from {args.checkpoint}: {resumed:,} rounds already played")
+    elif args.seed is None:
+        print(f"Seed: {seed} (--seed {seed} plays the same rounds again)")
+
+    def progress(done: int, total: int, result: SimulationResult):
+        print(f"Shards {done}/{total}: {result.rounds:,} rounds, "
+              f"house edge {result.house_edge * 100:.3f}% +/- {result.confidence() * 100:.3f}%")
+
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set()) # finish the running shards, then stop
+    started_at = time.perf_counter()
+    result = simulate(args.rounds, policy, seed, shard_rounds=args.shard_rounds, workers=args.workers,
+                      checkpoint=checkpoint, finished=shards, progress=progress, stop=stop)
+    elapsed = time.perf_counter() - started_at
+    if stop.is_set():
+        print(f"Interrupted after {result.rounds:,} of {args.rounds:,} rounds"
+              + (f" - run the same command again to resume from {args.checkpoint}" if checkpoint else ""))
+
+    played = result.rounds - resumed
+    print(f"Rounds: {result.rounds} ({played} in {elapsed:.2f}s, {played / elapsed:,.0f} rounds/sec, "
+          f"{args.workers} worker{'s' if args.workers > 1 else ''})")
+    print(f"Wins / Ties / Losses: {result.wins} / {result.ties} / {result.losses}")
+    print(f"House edge: {result.house_edge * 100:.3f}% +/- {result.confidence() * 100:.3f}% (95%), "
+          f"payoff std {math.sqrt(result.variance):.4f}")
+
+    if args.check:
+        mismatches = cross_validate(args.check, policy, args.seed)
+        print(f"Cross-check against BlackjackGame: {mismatches} of {args.check} rounds differ")
+        if mismatches:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
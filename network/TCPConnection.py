@@ -1,4 +1,9 @@
 import socket
+import time
+from typing import TYPE_CHECKING, List, Optional
+
+if TYPE_CHECKING: # asyncio is only imported by the asyncio engine
+    import asyncio
 
 
 def recv_exact(sock: socket.socket, size: int) -> bytes:
@@ -10,3 +15,116 @@ def recv_exact(sock: socket.socket, size: int) -> bytes:
             raise ConnectionError("Connection closed unexpectedly")
         data += chunk
     return data
+
+
+def probe_connect_rtt(host: str, port: int, timeout: float) -> Optional[float]:
+    """Seconds a TCP connect to host:port takes, None if it fails or takes longer than 'timeout'."""
+    started_at = time.perf_counter()
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return time.perf_counter() - started_at
+    except OSError:
+        return None
+
+
+async def recv_exact_async(reader: "asyncio.StreamReader", size: int) -> bytes:
+    """Receive exactly 'size' bytes from the stream reader."""
+    try:
+        return await reader.readexactly(size)
+    except EOFError: # asyncio.IncompleteReadError
+        raise ConnectionError("Connection closed unexpectedly")
+
+
+class FramedReader:
+    """
+    Buffered reader for fixed-size frames.
+
+    Fills one preallocated buffer with large recv_into calls and hands out frames as
+    memoryview slices of it, without copying. A frame is only valid until the next
+    read from the same reader - decode it (or copy it with bytes()) before reading again.
+    """
+
+    DEFAULT_BUFFER_SIZE = 4096
+
+    def __init__(self, sock: socket.socket, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        self.sock = sock
+        self._buffer = bytearray(buffer_size)
+        self._view = memoryview(self._buffer)
+        self._start = 0 # first unread byte
+        self._end = 0 # end of received data
+        self.recv_calls = 0 # number of recv syscalls made
+        self.bytes_received = 0
+
+    def read_frame(self, size: int) -> memoryview:
+        """Return the next 'size' bytes."""
+        self._fill(size)
+        frame = self._view[self._start:self._start + size]
+        self._start += size
+        return frame
+
+    def read_frames(self, size: int, count: int) -> List[memoryview]:
+        """Return the next 'count' frames of 'size' bytes each."""
+        self._fill(size * count)
+        start = self._start
+        frames = [self._view[offset:offset + size] for offset in range(start, start + size * count, size)]
+        self._start += size * count
+        return frames
+
+    def _fill(self, size: int):
+        """Receive until at least 'size' unread bytes are buffered."""
+        if size > len(self._buffer):
+            raise ValueError(f"Frame of {size} bytes does not fit in a {len(self._buffer)} byte buffer")
+
+        if self._start == self._end: # everything consumed - start from the beginning
+            self._start = self._end = 0
+        elif self._start + size > len(self._buffer): # not enough room - move unread bytes to the front
+            pending = self._end - self._start
+            self._view[:pending] = self._view[self._start:self._end]
+            self._start, self._end = 0, pending
+
+        while self._end - self._start < size:
+            received = self.sock.recv_into(self._view[self._end:])
+            self.recv_calls += 1
+            if not received:
+                raise ConnectionError("Connection closed unexpectedly")
+            self._end += received
+            self.bytes_received += received
+
+
+class BufferedWriter:
+    """
+    Collects frames and sends them together.
+
+    Frames written between two flush() calls leave in one sendmsg (writev) call,
+    so the bytes on the wire are the same as sending each frame on its own.
+    """
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self._frames: List[bytes] = []
+        self.send_calls = 0 # number of send syscalls made
+        self.bytes_sent = 0
+        self.copy_to: Optional[bytearray] = None # if set, every byte sent is appended to it too
+
+    def write(self, frame: bytes):
+        self._frames.append(frame)
+
+    def flush(self):
+        """Send all pending frames."""
+        if not self._frames:
+            return
+        frames, self._frames = self._frames, []
+        size = sum(len(frame) for frame in frames)
+        self.bytes_sent += size
+        if self.copy_to is not None:
+            self.copy_to += b''.join(frames)
+
+        if hasattr(self.sock, "sendmsg"):
+            sent = self.sock.sendmsg(frames)
+            self.send_calls += 1
+            if sent < size: # partial write - send the rest
+                self.sock.sendall(b''.join(frames)[sent:])
+                self.send_calls += 1
+        else: # no sendmsg (Windows)
+            self.sock.sendall(b''.join(frames))
+            self.send_calls += 1
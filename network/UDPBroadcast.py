@@ -1,17 +1,18 @@
-import ipaddress
+import select
 import socket
 import time
-from typing import Tuple
+from typing import Any, Callable, List, Optional, Tuple
 import threading
 from abc import ABC, abstractmethod
 
-import psutil
-
 
 class UDPBroadcast(ABC): # abstract base class for UDP broadcast
 
     UDP_PORT = 13122
+    PROBE_PORT = 13123 # servers answer probes sent here with an immediate unicast offer
     OFFER_INTERVAL_SEC = 1.0
+    ADDRESS_REFRESH_SEC = 60.0 # re-resolve the broadcast addresses at least this often
+    FALLBACK_BROADCAST_ADDRESS = "255.255.255.255"
 
     def get_broadcast_address(self):
         """Get the broadcast address for wifi or hotspot networks."""
@@ -23,6 +24,8 @@ class UDPBroadcast(ABC): # abstract base class for UDP broadcast
             s.close()
 
             # Find the interface with the IP address and calculate the broadcast address
+            import ipaddress
+            import psutil # only the broadcasting side needs these - keeps client start-up light
             for interface, snics in psutil.net_if_addrs().items():
                 for snic in snics:
                     if snic.address == local_ip:
@@ -31,17 +34,79 @@ class UDPBroadcast(ABC): # abstract base class for UDP broadcast
                         return str(net.network.broadcast_address)
         except Exception:
             pass
-        return "255.255.255.255" # fallback to broadcast address for all networks
+        return self.FALLBACK_BROADCAST_ADDRESS # fallback to broadcast address for all networks
+
+    def get_all_broadcast_addresses(self) -> List[str]:
+        """Get the broadcast address of every IPv4 interface (loopback excluded)."""
+        addresses = []
+        try:
+            import ipaddress
+            import psutil
+            for interface, snics in psutil.net_if_addrs().items():
+                for snic in snics:
+                    if snic.family != socket.AF_INET or not snic.netmask or snic.address.startswith("127."):
+                        continue
+                    net = ipaddress.IPv4Interface(f"{snic.address}/{snic.netmask}")
+                    address = str(net.network.broadcast_address)
+                    if address not in addresses:
+                        addresses.append(address)
+        except Exception:
+            pass
+        return addresses or [self.FALLBACK_BROADCAST_ADDRESS]
+
+    def interfaces_generation(self) -> Optional[tuple]:
+        """Cheap fingerprint of the network interfaces - changes when one is added or removed."""
+        try:
+            return tuple(socket.if_nameindex())
+        except (OSError, AttributeError): # not supported on this platform
+            return None
+
+    def offer_packets(self, server_tcp_port: int, server_name: str, load: Callable[[], Any] = None) -> List[bytes]:
+        """Datagrams of one offer - subclasses may add extensions built from load()."""
+        return [self.encode(server_tcp_port, server_name)] # encode - subclass must implement
+
+    def is_probe(self, data: bytes) -> bool:
+        """True if 'data' is a client probe - servers without probe support never answer."""
+        return False
+
+    def encode_probe(self) -> Optional[bytes]:
+        return None
+
+    def decode_info(self, data: bytes):
+        """Everything an offer says - at least (tcp_port, server_name) as its first two fields."""
+        return self.decode(data)
+
+    def replaces(self, latest, kept) -> bool:
+        """True if the decoded offer 'latest' should replace 'kept', an earlier one from the same server."""
+        return True
+
+    def _probe_socket(self) -> Optional[socket.socket]:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1) # several servers on one machine
+        if hasattr(socket, "SO_REUSEPORT"):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        try:
+            sock.bind(("", self.PROBE_PORT))
+        except OSError: # port taken - periodic offers still work
+            sock.close()
+            return None
+        return sock
 
     # Broadcast the offers (Server side)
-    def broadcast(self, server_tcp_port: int, server_name: str, stop_event: threading.Event = None) -> None:
+    def broadcast(self, server_tcp_port: int, server_name: str, stop_event: threading.Event = None,
+                  all_interfaces: bool = False, load: Callable[[], Any] = None) -> None:
         # Create a socket and set the broadcast option
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
         # OS chooses the interface
         sock.bind(('', 0))
+        probe_sock = self._probe_socket() # probes are answered between two offers
 
-        offer_bytes = self.encode(server_tcp_port, server_name) # encode - subclass must implement
+        # Broadcast addresses are resolved once and cached - only resolved again when
+        # the interfaces change or every ADDRESS_REFRESH_SEC (catches address changes)
+        broadcast_addrs = None
+        generation = None
+        next_refresh = 0.0
 
         try:
             while True:
@@ -50,31 +115,70 @@ class UDPBroadcast(ABC): # abstract base class for UDP broadcast
                     break
                     
                 try:
-                    broadcast_addr = self.get_broadcast_address()
-                    
-                    # Send to the calculated broadcast address
-                    sock.sendto(offer_bytes, (broadcast_addr, self.UDP_PORT))
+                    now = time.monotonic()
+                    current_generation = self.interfaces_generation()
+                    if broadcast_addrs is None or current_generation != generation or now >= next_refresh:
+                        if all_interfaces:
+                            broadcast_addrs = self.get_all_broadcast_addresses()
+                        else:
+                            broadcast_addrs = [self.get_broadcast_address()]
+                        generation = current_generation
+                        next_refresh = now + self.ADDRESS_REFRESH_SEC
+
+                    offers = self.offer_packets(server_tcp_port, server_name, load)
+
+                    # Send to the calculated broadcast address(es)
+                    for broadcast_addr in broadcast_addrs:
+                        for offer_bytes in offers:
+                            try:
+                                sock.sendto(offer_bytes, (broadcast_addr, self.UDP_PORT))
+                            except Exception:
+                                pass
                     
                     # Also send to localhost in case server and client are on same machine
-                    try:
-                        sock.sendto(offer_bytes, ('127.0.0.1', self.UDP_PORT))
-                    except Exception:
-                        pass
+                    for offer_bytes in offers:
+                        try:
+                            sock.sendto(offer_bytes, ('127.0.0.1', self.UDP_PORT))
+                        except Exception:
+                            pass
                         
                 except Exception:
                     pass
                     
-                time.sleep(self.OFFER_INTERVAL_SEC)
+                self._answer_probes(probe_sock, server_tcp_port, server_name, load, self.OFFER_INTERVAL_SEC)
         except KeyboardInterrupt:
             # Ctrl+C -> stop the broadcast
             pass
         finally:
             sock.close()
+            if probe_sock:
+                probe_sock.close()
 
+    def _answer_probes(self, probe_sock: Optional[socket.socket], server_tcp_port: int, server_name: str,
+                       load: Callable[[], Any], wait_sec: float):
+        """Wait 'wait_sec' seconds, answering every probe that arrives meanwhile."""
+        if probe_sock is None:
+            time.sleep(wait_sec)
+            return
+        deadline = time.monotonic() + wait_sec
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            readable, _, _ = select.select([probe_sock], [], [], remaining)
+            if not readable:
+                return
+            try:
+                data, addr = probe_sock.recvfrom(1024)
+                if self.is_probe(data):
+                    for offer_bytes in self.offer_packets(server_tcp_port, server_name, load):
+                        probe_sock.sendto(offer_bytes, addr) # unicast reply to the asking client
+            except OSError:
+                pass
 
-    # Listen for offers (Client side)
-    def listen(self) -> Tuple[str, int, str]:
 
+    # Listen for offers (Client side)
+    def _listen_socket(self) -> socket.socket:
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1) # allow multiple clients on the same machine
         # allow port reuse (exists on macOS/Linux; usually not on Windows)
@@ -86,7 +190,11 @@ class UDPBroadcast(ABC): # abstract base class for UDP broadcast
             sock.ioctl(socket.SIO_UDP_CONNRESET, False)
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1) # enable broadcast reception
         sock.bind(("", self.UDP_PORT))
+        return sock
 
+    def listen(self) -> Tuple[str, int, str]:
+        """Wait for the first valid offer."""
+        sock = self._listen_socket()
         try:
             while True:
                 data, addr = sock.recvfrom(1024)
@@ -98,6 +206,51 @@ class UDPBroadcast(ABC): # abstract base class for UDP broadcast
         finally:
             sock.close()
 
+    def collect(self, window_sec: float, probe: bool = False) -> List[Tuple[str, Any]]:
+        """
+        (ip, decode_info(offer)) of every server that sent an offer within 'window_sec'
+        seconds, once per (ip, port) with its latest offer (as far as replaces() allows),
+        in order of arrival.
+        A window of OFFER_INTERVAL_SEC hears every running server. With 'probe' the
+        servers are also asked for an immediate reply, so a window of a few round-trip
+        times is enough for servers that answer probes.
+        """
+        offers = {} # (ip, port) -> decoded offer
+        sock = self._listen_socket()
+        sockets = [sock]
+        probe_bytes = self.encode_probe() if probe else None
+        if probe_bytes:
+            probe_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+            probe_sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+            probe_sock.bind(("", 0)) # replies come back to this socket
+            sockets.append(probe_sock)
+            for address in self.get_all_broadcast_addresses() + ["127.0.0.1"]:
+                try:
+                    probe_sock.sendto(probe_bytes, (address, self.PROBE_PORT))
+                except OSError:
+                    pass
+
+        deadline = time.monotonic() + window_sec
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                readable, _, _ = select.select(sockets, [], [], remaining)
+                for ready in readable:
+                    data, addr = ready.recvfrom(1024)
+                    try:
+                        info = self.decode_info(data)
+                    except Exception:
+                        continue  # Invalid packet, keep waiting
+                    key = (addr[0], info[0])
+                    if key not in offers or self.replaces(info, offers[key]):
+                        offers[key] = info
+        finally:
+            for ready in sockets:
+                ready.close()
+        return [(ip, info) for (ip, _), info in offers.items()]
+
 
     @abstractmethod
     def encode(self, data: bytes) -> bytes:
@@ -0,0 +1,31 @@
+import random
+
+import pytest
+
+from black_jeck.BlackJeckLogic import BlackjackGame, Shoe
+
+ROUNDS = 20_000
+SEED = 20240601
+
+
+def play_round(game: BlackjackGame, rng: random.Random) -> bytes:
+    # deal a round the way the server does and return every card code it used
+    game.new_round()
+    game.player_hit()
+    game.dealer_hit()
+    game.player_hit()
+    while not game.player_hand.is_bust() and rng.random() < 0.7: # hit at random, often to a bust
+        game.player_hit()
+    while game.dealer_hand.total_value < 17:
+        game.dealer_hit()
+    return bytes(game.player_hand.codes + game.dealer_hand.codes)
+
+
+@pytest.mark.parametrize("penetration", [0.75, 0.9, 1.0])
+def test_shoe_never_repeats_a_card_within_a_round(penetration):
+    # a one-deck shoe holds every card once, so a repeat means a reshuffle in the middle of the round
+    rng = random.Random(SEED)
+    game = BlackjackGame(Shoe(1, penetration, rng))
+    for _ in range(ROUNDS):
+        codes = play_round(game, rng)
+        assert len(set(codes)) == len(codes)
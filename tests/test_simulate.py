@@ -0,0 +1,14 @@
+import pytest
+
+np = pytest.importorskip("numpy") # the simulator is an optional extra (pip install .[simulate])
+
+from black_jeck.simulate import cross_validate, threshold_policy
+
+CHECK_ROUNDS = 20_000
+SEED = 20240601
+
+
+@pytest.mark.parametrize("threshold", [0, 12, 17, 21])
+def test_simulator_matches_blackjack_game(threshold):
+    # the same decks through the vectorised engine and BlackjackGame - every round must agree
+    assert cross_validate(CHECK_ROUNDS, threshold_policy(threshold), SEED) == 0
@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.bench_startup import ENTRY_POINTS, PROJECT_ROOT, measure
+
+# multiplies every budget - raise it on slow or busy machines (like bench_startup.py --scale)
+SCALE = float(os.environ.get("BLACKJECK_STARTUP_SCALE", "1"))
+
+# imports every module of the package in a fresh interpreter and fails if one touched sys.path
+SYS_PATH_CHECK = """
+import pkgutil, sys
+import black_jeck
+before = list(sys.path)
+for module in pkgutil.iter_modules(black_jeck.__path__):
+    try:
+        __import__("black_jeck." + module.name)
+    except ImportError as e:
+        if e.name != "numpy": # optional extra
+            raise
+    assert sys.path == before, module.name + " changed sys.path"
+"""
+
+
+@pytest.mark.parametrize("module", sorted(ENTRY_POINTS))
+def test_entry_point_cold_start(module):
+    budget_ms, forbidden = ENTRY_POINTS[module]
+    elapsed_ms, times = measure(module)
+    assert elapsed_ms <= budget_ms * SCALE, f"{module} imports in {elapsed_ms:.1f} ms, budget {budget_ms * SCALE:.1f} ms"
+    assert [name for name in forbidden if name in times] == []
+
+
+def test_imports_leave_sys_path_alone():
+    subprocess.run([sys.executable, "-c", SYS_PATH_CHECK], cwd=PROJECT_ROOT, check=True)
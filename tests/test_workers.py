@@ -0,0 +1,22 @@
+from black_jeck.BlackJeckPacketProtocol import derive_seed
+from black_jeck.BlackJeckWorkers import worker_seed
+
+SEED = 20240601
+SESSIONS = 1000 # per worker start
+
+
+def session_seeds(worker_id: int, generation: int):
+    # the seeds session_seed() hands out in one worker process under --seed
+    base = worker_seed(SEED, worker_id, generation)
+    return {derive_seed(base, session) for session in range(SESSIONS)}
+
+
+def test_restarted_worker_deals_new_seeds():
+    # a restart must not replay the decks of the sessions its predecessor served
+    assert session_seeds(0, 0).isdisjoint(session_seeds(0, 1))
+    assert session_seeds(1, 0).isdisjoint(session_seeds(1, 1))
+
+
+def test_workers_and_restarts_never_share_seeds():
+    starts = [session_seeds(worker_id, generation) for worker_id in range(4) for generation in range(3)]
+    assert len(set().union(*starts)) == len(starts) * SESSIONS